@@ -1 +1,28 @@
 # A2C DRL agent (for future ensemble)
+from stable_baselines3 import A2C
+from agents.base_agent import BaseAgent
+from agents.ppo_agent import RolloutLoggerCallback
+
+class A2CAgent(BaseAgent):
+    def __init__(self, env, learning_rate=0.0007, policy="MlpPolicy", verbose=1):
+        self.model = A2C(
+            policy,
+            env,
+            learning_rate=learning_rate,
+            verbose=verbose,
+            ent_coef=0.01
+        )
+
+    def predict(self, state, deterministic=False):
+        action, _ = self.model.predict(state, deterministic=deterministic)
+        return int(action.item())
+
+    def train(self, env, timesteps=500000):
+        self.model.set_env(env)
+        self.model.learn(total_timesteps=timesteps, log_interval=100, callback=RolloutLoggerCallback())
+
+    def save(self, path):
+        self.model.save(path)
+
+    def load(self, path):
+        self.model = A2C.load(path, env=self.model.env if hasattr(self.model, 'env') else None)
@@ -1 +1,57 @@
 # DDPG DRL agent (for future ensemble)
+import gymnasium as gym
+import numpy as np
+from stable_baselines3 import DDPG
+from stable_baselines3.common.noise import NormalActionNoise
+from agents.base_agent import BaseAgent
+
+def continuous_to_discrete(values, threshold=1 / 3):
+    """Map actions in [-1, 1] to ForexEnv actions: above threshold buy (1), below -threshold sell (2), else hold."""
+    values = np.asarray(values, dtype=np.float64).reshape(len(np.atleast_1d(values)), -1)[:, 0]
+    return np.select([values > threshold, values < -threshold], [1, 2], default=0).astype(np.int64)
+
+class ContinuousActionWrapper(gym.ActionWrapper):
+    """Expose ForexEnv's Discrete(3) actions as one continuous value in [-1, 1] for DDPG."""
+
+    def __init__(self, env, threshold=1 / 3):
+        super().__init__(env)
+        self.threshold = threshold
+        self.action_space = gym.spaces.Box(low=-1.0, high=1.0, shape=(1,), dtype=np.float32)
+
+    def action(self, action):
+        return int(continuous_to_discrete(action, self.threshold)[0])
+
+class DDPGAgent(BaseAgent):
+    def __init__(self, env, learning_rate=0.001, policy="MlpPolicy", verbose=1, noise_sigma=0.2):
+        env = self.wrap(env)
+        self.model = DDPG(
+            policy,
+            env,
+            learning_rate=learning_rate,
+            verbose=verbose,
+            action_noise=NormalActionNoise(mean=np.zeros(1), sigma=noise_sigma * np.ones(1))
+        )
+
+    @staticmethod
+    def wrap(env):
+        """Wrap a discrete ForexEnv once; VecEnvs must be built from already wrapped envs."""
+        if isinstance(env, gym.Env) and isinstance(env.action_space, gym.spaces.Discrete):
+            return ContinuousActionWrapper(env)
+        return env
+
+    def to_discrete(self, actions):
+        return continuous_to_discrete(actions)
+
+    def predict(self, state, deterministic=False):
+        action, _ = self.model.predict(state, deterministic=deterministic)
+        return int(self.to_discrete(action)[0])
+
+    def train(self, env, timesteps=500000):
+        self.model.set_env(self.wrap(env))
+        self.model.learn(total_timesteps=timesteps, log_interval=10)
+
+    def save(self, path):
+        self.model.save(path)
+
+    def load(self, path):
+        self.model = DDPG.load(path, env=self.model.env if hasattr(self.model, 'env') else None)
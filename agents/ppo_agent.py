@@ -1,18 +1,56 @@
+from functools import partial
 from stable_baselines3 import PPO
 from agents.base_agent import BaseAgent
+from environments.forex_env import ForexEnv
 import logging
+import numpy as np
 from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
+
+# PPO settings config.yaml's agent section may set besides learning_rate (stable-baselines3 names)
+PPO_HYPERPARAMETERS = [
+    "n_steps", "batch_size", "n_epochs", "gamma", "gae_lambda", "clip_range", "ent_coef", "vf_coef",
+    "max_grad_norm", "net_arch"
+]
+
+def ppo_kwargs(settings):
+    """PPOAgent keyword arguments from a config section (e.g. config["agent"]), skipping unset keys."""
+    return {name: settings[name] for name in PPO_HYPERPARAMETERS if settings.get(name) is not None}
+
+def make_forex_vec_env(data, n_envs=1, vec_env="dummy", start_method=None, **env_kwargs):
+    """Build n_envs ForexEnv copies over data, each starting at a different offset.
+
+    Args:
+        data (pd.DataFrame): Preprocessed training window.
+        n_envs (int): Number of parallel environments.
+        vec_env (str): "dummy" steps envs in-process, "subproc" runs one worker process per env.
+        start_method (str): multiprocessing start method for "subproc" (SB3 default if None).
+        **env_kwargs: Passed to every ForexEnv.
+    Returns:
+        VecEnv: Monitored vectorized environment.
+    """
+    stride = len(data) // n_envs
+    env_fns = [partial(ForexEnv, data=data, start_offset=i * stride, **env_kwargs) for i in range(n_envs)]
+    if vec_env == "subproc":
+        venv = SubprocVecEnv(env_fns, start_method=start_method)
+    elif vec_env == "dummy":
+        venv = DummyVecEnv(env_fns)
+    else:
+        raise ValueError(f"Unknown vec_env '{vec_env}', expected 'dummy' or 'subproc'")
+    return VecMonitor(venv)
 
 class RolloutLoggerCallback(BaseCallback):
     def __init__(self, verbose=0):
         super(RolloutLoggerCallback, self).__init__(verbose)
         self.action_counts = {0: 0, 1: 0, 2: 0}
-    
+
     def _on_step(self) -> bool:
-        action = self.locals["actions"][0]
-        self.action_counts[action] += 1
+        # One action per env; count them all, not just the first env's
+        counts = np.bincount(np.asarray(self.locals["actions"]).ravel(), minlength=3)
+        for action, count in enumerate(counts):
+            self.action_counts[action] += int(count)
         return True
-    
+
     def _on_rollout_end(self) -> None:
         ep_rew_mean = self.locals.get("rollout_buffer").rewards.mean()
         total_actions = sum(self.action_counts.values())
@@ -22,26 +60,37 @@ class RolloutLoggerCallback(BaseCallback):
         return True
 
 class PPOAgent(BaseAgent):
-    def __init__(self, env, learning_rate=0.0001, policy="MlpPolicy"):
+    def __init__(self, env, learning_rate=0.0001, policy="MlpPolicy", verbose=1, ent_coef=0.01, net_arch=None,
+                 seed=None, **hyperparameters):
+        """
+        Args:
+            net_arch (list): Hidden layer sizes of the policy and value networks, e.g. [64, 64].
+            seed (int): Seed for the policy initialization and action sampling.
+            **hyperparameters: Further PPO arguments (n_steps, batch_size, gamma, clip_range, ...).
+        """
         self.model = PPO(
             policy,
             env,
             learning_rate=learning_rate,
-            verbose=1,
-            ent_coef=0.01
+            verbose=verbose,
+            ent_coef=ent_coef,
+            policy_kwargs={"net_arch": list(net_arch)} if net_arch else None,
+            seed=seed,
+            **hyperparameters
         )
-    
+
     def predict(self, state, deterministic=False):
         action, _ = self.model.predict(state, deterministic=deterministic)
         return int(action.item())
-    
-    def train(self, env, timesteps=500000):  # More timesteps
+
+    def train(self, env, timesteps=500000, callback=None, reset_num_timesteps=True):  # More timesteps
+        """Train for timesteps more steps; callback (e.g. a tuning validation callback) can stop early."""
         self.model.set_env(env)
-        callback = RolloutLoggerCallback()
-        self.model.learn(total_timesteps=timesteps, log_interval=1, callback=callback)
-    
+        callbacks = [RolloutLoggerCallback()] + ([callback] if callback is not None else [])
+        self.model.learn(total_timesteps=timesteps, log_interval=1, callback=callbacks, reset_num_timesteps=reset_num_timesteps)
+
     def save(self, path):
         self.model.save(path)
-    
+
     def load(self, path):
-        self.model = PPO.load(path, env=self.model.env if hasattr(self.model, 'env') else None)
\ No newline at end of file
+        self.model = PPO.load(path, env=self.model.env if hasattr(self.model, 'env') else None)
@@ -0,0 +1,321 @@
+# PPO hyperparameter search: parallel trials, median pruning on a validation slice, resumable
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import shutil
+import numpy as np
+from backtesting.walk_forward import init_worker, shared_frame
+from utils.shared_arrays import share_arrays, release_arrays
+
+# Trial states in the store; queued and running trials are (re)started by the next search
+QUEUED, RUNNING, COMPLETE, PRUNED, FAILED = "queued", "running", "complete", "pruned", "failed"
+
+def sample_params(space, rng):
+    """
+    Draw one value per hyperparameter.
+    Args:
+        space (dict): name -> list of choices, or {low, high, log} for a float range
+            (integer bounds give an integer).
+        rng (np.random.Generator): Source of randomness.
+    Returns:
+        dict: name -> value.
+    """
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            params[name] = spec[int(rng.integers(len(spec)))]
+        elif spec.get("log", False):
+            params[name] = float(np.exp(rng.uniform(np.log(spec["low"]), np.log(spec["high"]))))
+        elif isinstance(spec["low"], int) and isinstance(spec["high"], int):
+            params[name] = int(rng.integers(spec["low"], spec["high"] + 1))
+        else:
+            params[name] = float(rng.uniform(spec["low"], spec["high"]))
+    return params
+
+class TrialStore:
+    """
+    Trial records (params, state, validation values, timesteps) and checkpoints in a directory.
+
+    Each trial is one JSON file written only by the process running it and replaced atomically,
+    so concurrent workers need no locks and readers never see a partial record.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, number):
+        return os.path.join(self.directory, f"trial_{number:04d}.json")
+
+    def checkpoint_path(self, number):
+        return os.path.join(self.directory, f"trial_{number:04d}.zip")
+
+    def load(self, number):
+        path = self.path(number)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, trial):
+        path = self.path(trial["number"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(trial, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def trials(self):
+        records = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "trial_*.json"))):
+            with open(path) as f:
+                records.append(json.load(f))
+        return records
+
+    def pending(self, n_trials):
+        """Numbers of the first n_trials trials still to run: queued ones and interrupted running ones."""
+        return [trial["number"] for trial in self.trials() if trial["number"] < n_trials and trial["state"] in (QUEUED, RUNNING)]
+
+class MedianPruner:
+    """
+    Prune a trial whose k-th validation value is below the median of the other trials' k-th values.
+    Args:
+        n_startup_trials (int): Other trials that must have a k-th value before pruning at k.
+        n_warmup_evals (int): Evaluations every trial gets before it can be pruned.
+    """
+
+    def __init__(self, n_startup_trials=4, n_warmup_evals=1):
+        self.n_startup_trials = n_startup_trials
+        self.n_warmup_evals = n_warmup_evals
+
+    def should_prune(self, store, number, values):
+        k = len(values) - 1
+        if k < self.n_warmup_evals - 1:
+            return False
+        others = [trial["values"][k] for trial in store.trials() if trial["number"] != number and len(trial["values"]) > k]
+        if len(others) < self.n_startup_trials:
+            return False
+        return values[k] < float(np.median(others))
+
+def validation_score(model, data, env_kwargs):
+    """Profit % of a greedy replay over data (the episode, and equity, stop at a rule breach)."""
+    from environments.forex_env import ForexEnv
+    env = ForexEnv(data=data, **env_kwargs)
+    state, _ = env.reset()
+    done = False
+    info = {"equity": env.initial_balance}
+    while not done:
+        action, _ = model.predict(state, deterministic=True)
+        state, reward, done, truncated, info = env.step(int(action.item()))
+    return (info["equity"] - env.initial_balance) / env.initial_balance * 100
+
+class ValidationMonitor:
+    """
+    Every eval_interval timesteps: score the policy on the validation slice, checkpoint the model
+    and the trial record, and stop training if the pruner says the trial is losing. The evaluation
+    at the end of the timesteps budget is never pruned, since stopping there saves nothing.
+
+    Plain class so this module imports without torch; _run_trial wraps it in an SB3 callback.
+    """
+
+    def __init__(self, trial, store, pruner, validation_data, env_kwargs, eval_interval, timesteps):
+        self.trial = trial
+        self.store = store
+        self.pruner = pruner
+        self.validation_data = validation_data
+        self.env_kwargs = env_kwargs
+        self.eval_interval = eval_interval
+        self.timesteps = timesteps
+        self.pruned = False
+
+    def on_step(self, model, num_timesteps):
+        """Called after every environment step; returns False to stop training."""
+        values = self.trial["values"]
+        if num_timesteps < (len(values) + 1) * self.eval_interval:
+            return True
+        values.append(validation_score(model, self.validation_data, self.env_kwargs))
+        # Model first: a record never claims more progress than the checkpoint holds
+        model.save(self.store.checkpoint_path(self.trial["number"]))
+        self.trial["timesteps"] = int(num_timesteps)
+        if num_timesteps < self.timesteps and self.pruner.should_prune(self.store, self.trial["number"], values):
+            self.trial["state"] = PRUNED
+            self.pruned = True
+        self.store.save(self.trial)
+        return not self.pruned
+
+def _as_callback(monitor):
+    """SB3 callback that forwards every step to a ValidationMonitor (imports torch, workers only)."""
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class MonitorCallback(BaseCallback):
+        def _on_step(self) -> bool:
+            return monitor.on_step(self.model, self.num_timesteps)
+
+    return MonitorCallback()
+
+def _run_trial(task):
+    """Train (or resume) one trial in a worker until it completes or is pruned."""
+    from stable_baselines3 import PPO
+    from agents.ppo_agent import PPOAgent, make_forex_vec_env
+
+    number, settings = task
+    store = TrialStore(settings["storage"])
+    trial = store.load(number)
+    train_start, validation_start, validation_end = settings["ranges"]
+    train_data = shared_frame(train_start, validation_start)
+    validation_data = shared_frame(validation_start, validation_end)
+    env_kwargs = settings["env_kwargs"]
+    train_env = make_forex_vec_env(train_data, n_envs=settings["n_envs"], vec_env="dummy", **env_kwargs)
+    try:
+        agent = PPOAgent(train_env, verbose=0, seed=settings["seed"] + number, **trial["params"])
+        checkpoint = store.checkpoint_path(number)
+        resumed = trial["state"] == RUNNING and os.path.exists(checkpoint)
+        if resumed:
+            agent.model = PPO.load(checkpoint, env=train_env)
+        trial["state"] = RUNNING
+        store.save(trial)
+        monitor = ValidationMonitor(
+            trial, store, MedianPruner(settings["n_startup_trials"], settings["n_warmup_evals"]),
+            validation_data, env_kwargs, settings["eval_interval"], settings["timesteps"]
+        )
+        remaining = settings["timesteps"] - agent.model.num_timesteps
+        if remaining > 0:
+            # Without a reset SB3 adds num_timesteps, so training stops at the full budget
+            agent.train(train_env, timesteps=remaining, callback=_as_callback(monitor), reset_num_timesteps=not resumed)
+        if not monitor.pruned:
+            if len(trial["values"]) * settings["eval_interval"] < settings["timesteps"] or not trial["values"]:
+                trial["values"].append(validation_score(agent.model, validation_data, env_kwargs))
+            agent.model.save(checkpoint)
+            trial["timesteps"] = int(agent.model.num_timesteps)
+            trial["state"] = COMPLETE
+        trial["value"] = trial["values"][-1]
+        store.save(trial)
+    except Exception as error:
+        trial["state"] = FAILED
+        trial["error"] = repr(error)
+        store.save(trial)
+    finally:
+        train_env.close()
+    return trial
+
+def run_search(data, env_kwargs, space, n_trials=16, timesteps=200000, eval_interval=20000, validation_bars=2000,
+               n_startup_trials=4, n_warmup_evals=1, n_envs=1, workers=None, torch_threads=None,
+               storage="models/tuning/ppo", seed=0, start_method=None):
+    """
+    Run (or resume) a PPO hyperparameter search over data.
+
+    The last validation_bars rows are the validation slice; trials train on the rows before it.
+    Trial params depend only on (seed, trial number), so a rerun with the same storage skips
+    finished trials and continues interrupted ones from their last checkpoint.
+    Args:
+        data (pd.DataFrame): Preprocessed history (test bars already removed).
+        env_kwargs (dict): ForexEnv settings for training and validation.
+        space (dict): Search space for sample_params().
+        n_trials (int): Trials in the search.
+        timesteps (int): Training timesteps of a trial that is never pruned.
+        eval_interval (int): Timesteps between validation replays/checkpoints.
+        validation_bars (int): Rows in the validation slice.
+        n_startup_trials (int): MedianPruner setting.
+        n_warmup_evals (int): MedianPruner setting.
+        n_envs (int): In-process training environments per trial.
+        workers (int): Trials run at once, defaults to min(n_trials, cpu count).
+        torch_threads (int): torch/BLAS threads per worker, defaults to cpu_count // workers.
+        storage (str): Directory of trial records and checkpoints.
+        seed (int): Seed of the parameter draws and policies.
+        start_method (str): multiprocessing start method, None for the platform default.
+    Returns:
+        list: Trial records, ordered by number.
+    """
+    store = TrialStore(storage)
+    for number in range(n_trials):
+        if store.load(number) is None:
+            params = sample_params(space, np.random.default_rng([seed, number]))
+            store.save({"number": number, "params": params, "state": QUEUED, "values": [], "timesteps": 0, "value": None})
+    pending = store.pending(n_trials)
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(pending) or 1))
+    torch_threads = torch_threads or max(1, cpus // workers)
+    settings = {
+        "storage": storage, "env_kwargs": env_kwargs, "timesteps": timesteps, "eval_interval": eval_interval,
+        "n_startup_trials": n_startup_trials, "n_warmup_evals": n_warmup_evals, "n_envs": n_envs, "seed": seed,
+        "ranges": (0, len(data) - validation_bars, len(data))
+    }
+    print(f"Tuning: {n_trials} trials ({len(pending)} to run), {workers} workers x {torch_threads} torch threads")
+
+    handles, spec = share_arrays({
+        "values": data.to_numpy(dtype=np.float64),
+        "index": np.asarray(data.index, dtype="datetime64[ns]")
+    })
+    try:
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(workers, initializer=init_worker, initargs=(spec, list(data.columns), torch_threads)) as pool:
+            for trial in pool.imap_unordered(_run_trial, [(number, settings) for number in pending]):
+                value = "n/a" if trial.get("value") is None else f"{trial['value']:.2f}%"
+                print(f"Trial {trial['number']}: {trial['state']} after {trial['timesteps']} timesteps, validation {value}")
+    finally:
+        release_arrays(handles, unlink=True)
+    return [trial for trial in store.trials() if trial["number"] < n_trials]
+
+def register_best(trials, store, name, pair="EURUSD", save_dir="models/saved_models", config=None, metadata=None):
+    """Copy the best completed trial's checkpoint into ModelManager under name and register it."""
+    from models.model_manager import ModelManager
+    complete = [trial for trial in trials if trial["state"] == COMPLETE]
+    if not complete:
+        raise ValueError("No completed trial to register")
+    best = max(complete, key=lambda trial: trial["value"])
+    model_dir = os.path.join(save_dir, name)
+    os.makedirs(model_dir, exist_ok=True)
+    shutil.copyfile(store.checkpoint_path(best["number"]), os.path.join(model_dir, f"{name}.zip"))
+    ModelManager(save_dir).register_model(name, metadata=dict(metadata or {}, **{
+        "pair": pair,
+        "version": "tuned",
+        "params": best["params"],
+        "metrics": {"validation_profit_pct": best["value"], "trial": best["number"], "timesteps": best["timesteps"]}
+    }), config=config)
+    return best
+
+def main(argv=None):
+    from data.economic_calendar import load_calendar
+    from data.preprocessor import load_forex_data
+    from utils.config import load_config
+    from utils.prop_firm_rules import load_ruleset
+
+    parser = argparse.ArgumentParser(description="Parallel PPO hyperparameter search with median pruning")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--n-trials", type=int, default=None)
+    parser.add_argument("--name", default=None, help="Model name for the best trial (default ppo_<pair>_tuned)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    settings = config["tuning"]
+    # Same firm rules and news blackout as backtest.py
+    env_kwargs = {"initial_balance": config["initial_balance"], "rules": load_ruleset(config)}
+    data = load_forex_data(calendar=load_calendar(config))
+    data = data[data.index < settings.get("test_start", "2025-01-01")]
+    n_trials = args.n_trials or settings["n_trials"]
+    timesteps = settings["timesteps"]
+    trials = run_search(
+        data, env_kwargs, settings["space"], n_trials=n_trials, timesteps=timesteps,
+        eval_interval=settings["eval_interval"], validation_bars=settings["validation_bars"],
+        n_startup_trials=settings.get("n_startup_trials", 4), n_warmup_evals=settings.get("n_warmup_evals", 1),
+        n_envs=settings.get("n_envs", 1), workers=args.workers or settings.get("workers"),
+        torch_threads=settings.get("torch_threads"), storage=settings["storage"], seed=settings.get("seed", 0)
+    )
+
+    used = sum(trial["timesteps"] for trial in trials)
+    states = {state: sum(trial["state"] == state for trial in trials) for state in (COMPLETE, PRUNED, FAILED)}
+    print(f"\nTrials: {states}")
+    print(f"Timesteps trained: {used:,} of {n_trials * timesteps:,} for full-length runs "
+          f"({n_trials * timesteps / max(used, 1):.1f}x less compute)")
+    name = args.name or f"ppo_{config['pair']}_tuned"
+    best = register_best(trials, TrialStore(settings["storage"]), name, pair=config["pair"], config=config, metadata={
+        "train_start": str(data.index[0]), "train_end": str(data.index[-settings["validation_bars"] - 1])
+    })
+    print(f"Best trial {best['number']}: validation {best['value']:.2f}%, params {best['params']}")
+    print(f"Registered as {name}")
+
+if __name__ == "__main__":
+    main()
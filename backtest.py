@@ -1,13 +1,18 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+from datetime import datetime
 from environments.forex_env import ForexEnv
-from agents.ppo_agent import PPOAgent
 from agents.rule_based import RuleBasedAgent
+from backtesting.vectorized import run_vectorized_backtest
+from data.economic_calendar import load_calendar
 from data.preprocessor import load_forex_data
 from utils.config import load_config
-from models.model_manager import ModelManager
+from utils.logger import EventRecorder
+from utils.prop_firm_rules import load_ruleset
+from utils.metrics import check_table_format, compute_metrics, export_table, period_table
+
+TRADE_COLUMNS = ['trade_number', 'trade_type', 'open_time', 'open_price', 'close_time', 'close_price', 'spread', 'profit', 'balance']
 
 def create_plot_folder():
     folder = "backtest_plots"
@@ -15,64 +20,65 @@ def create_plot_folder():
         os.makedirs(folder)
     return folder
 
-def plot_price_with_trades(test_data, trade_log):
-    plt.figure(figsize=(14, 7))
-    # Plot close prices
-    plt.plot(test_data.index, test_data['close'], label='Close Price', color='blue', alpha=0.7)
-    
-    # Plot Long and Short trades
-    for trade in trade_log:
-        if trade['trade_type'] == 'long':
-            plt.scatter(trade['open_time'], trade['open_price'], color='green', marker='^', s=100, label='Long Open (Buy)' if 'Long Open (Buy)' not in plt.gca().get_legend_handles_labels()[1] else '')
-            plt.scatter(trade['close_time'], trade['close_price'], color='lime', marker='v', s=100, label='Long Close' if 'Long Close' not in plt.gca().get_legend_handles_labels()[1] else '')
-        elif trade['trade_type'] == 'short':
-            plt.scatter(trade['open_time'], trade['open_price'], color='red', marker='v', s=100, label='Short Open (Sell)' if 'Short Open (Sell)' not in plt.gca().get_legend_handles_labels()[1] else '')
-            plt.scatter(trade['close_time'], trade['close_price'], color='orange', marker='^', s=100, label='Short Close' if 'Short Close' not in plt.gca().get_legend_handles_labels()[1] else '')
-    
-    plt.title('EUR/USD Price with Long/Short Trades (2025)')
-    plt.xlabel('Date')
-    plt.ylabel('Price')
-    plt.legend()
-    plt.grid()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    
-    # Save plot
-    folder = create_plot_folder()
-    plt.savefig(f"{folder}/price_trades_2025.png", dpi=300)
-    
-    # Show plot
-    plt.show()
-    plt.close()
+def run_backtest(pair="EURUSD", model_name="ppo_EURUSD_2025", use_rule_based=False, vectorized=False,
+                 data=None, config=None, plot=True):
+    """
+    Backtest the PPO model (or the rule-based agent) on bars from 2025-01-01 on.
 
-def run_backtest(pair="EURUSD", model_name="ppo_EURUSD_2025", use_rule_based=False):
-    config = load_config()
-    data = load_forex_data()
+    data and config default to the preprocessed CSV and config.yaml; benchmarks pass synthetic
+    data and plot=False.
+    """
+    config = config if config is not None else load_config()
+    check_table_format(config.get("report", {}).get("format", "csv"))
+    if data is None:
+        data = load_forex_data(calendar=load_calendar(config))
     
     test_data = data[data.index >= '2025-01-01']
     print(f"Testing data: {len(test_data)} rows")
-    
+    rules = load_ruleset(config)
+    
+    if vectorized:
+        # Rule-based signals are known up front, so replay them with the batch engine
+        if not use_rule_based:
+            raise ValueError("The vectorized engine needs precomputed signals; use use_rule_based=True")
+        result = run_vectorized_backtest(
+            test_data,
+            RuleBasedAgent().batch_actions(test_data),
+            initial_balance=config["initial_balance"],
+            rules=rules
+        )
+        return report_backtest(
+            config, rules, test_data, result["final_balance"], result["equity_curve"], result["daily_pnl"],
+            result["trading_days"], result["trade_log"], dict(enumerate(result["action_counts"].tolist())), plot,
+            open_time=test_data.index[result["open_position_step"]] if result["open_position_step"] >= 0 else None
+        )
+    
+    # Fills, breaches (and every step at level "steps") go to a JSONL/Parquet event log instead of stdout
+    events = config.get("events", {})
+    recorder = EventRecorder(
+        level=events.get("level", "trades"),
+        path=os.path.join("logs", f"backtest_{datetime.now().strftime('%Y-%m-%d_%H-%M')}_events.{events.get('format', 'jsonl')}")
+    )
     env = ForexEnv(
         data=test_data,
         initial_balance=config["initial_balance"],
-        daily_loss_limit=config["challenge"]["daily_loss_limit"],
-        max_drawdown=config["challenge"]["max_drawdown"]
+        recorder=recorder,
+        rules=rules
     )
     
     if use_rule_based:
         agent = RuleBasedAgent(env)
     else:
+        # torch/stable-baselines3 load only for the PPO path
+        from agents.ppo_agent import PPOAgent
+        from models.model_manager import ModelManager
         model_manager = ModelManager()
-        agent = PPOAgent(env)
-        agent.load(f"models/saved_models/{model_name}/{model_name}.zip")
+        agent = model_manager.load_agent(PPOAgent(env), model_name)
     
     state, _ = env.reset()
     done = False
     trades = 0
-    daily_pnl = []
-    trading_days = set()
-    current_day = None
-    trade_profits = []
+    equity = []
     action_counts = {0: 0, 1: 0, 2: 0}
     trade_log = []
     position_open = None
@@ -84,31 +90,23 @@ def run_backtest(pair="EURUSD", model_name="ppo_EURUSD_2025", use_rule_based=Fal
         current_price = test_data.iloc[env.current_step]['close']
         current_time = test_data.index[env.current_step]
         
-        if action == 1 and env.position == 0 and position_open is None:
-            position_open = {
-                'action': action,
-                'trade_type': 'long',
-                'open_time': current_time,
-                'open_price': current_price + (env.spread * 0.0001)
-            }
-        elif action == 2 and env.position == 0 and position_open is None:
-            position_open = {
+        opening = None
+        if action in [1, 2] and env.position == 0 and position_open is None:
+            opening = {
                 'action': action,
-                'trade_type': 'short',
+                'trade_type': 'long' if action == 1 else 'short',
                 'open_time': current_time,
-                'open_price': current_price - (env.spread * 0.0001)
+                'open_price': current_price + (env.spread * 0.0001) * (1 if action == 1 else -1)
             }
         
         state, reward, done, truncated, info = env.step(action)
-        
-        action_str = {0: "Hold", 1: "Buy", 2: "Sell"}[action]
-        day = test_data.index[env.current_step].date()
+        equity.append(info["equity"])
+        if opening and env.position != 0:  # Opens inside a news window are skipped by the env
+            position_open = opening
         
         if action in [1, 2] and env.position == 0 and prev_balance != info["balance"] and position_open:
             trade_profit = info["balance"] - prev_balance
             trades += 1
-            trading_days.add(day)
-            trade_profits.append(trade_profit)
             trade_log.append({
                 'trade_number': trades,
                 'trade_type': position_open['trade_type'],
@@ -120,62 +118,94 @@ def run_backtest(pair="EURUSD", model_name="ppo_EURUSD_2025", use_rule_based=Fal
                 'profit': trade_profit,
                 'balance': info["balance"]
             })
-            print(f"Trade {trades}, Type: {position_open['trade_type'].capitalize()}, Action: {action_str}, Profit: {trade_profit:.2f}, Open: {position_open['open_price']:.5f}, Close: {current_price:.5f}")
             position_open = None
         
-        if current_day != day:
-            if current_day is not None:
-                daily_pnl.append(env.daily_pnl)
-            env.daily_pnl = 0
-            current_day = day
-        
-        profit_pct = (info["balance"] - config["initial_balance"]) / config["initial_balance"] * 100
-        if profit_pct >= config["challenge"]["profit_target"] * 100 and len(trading_days) >= config["challenge"]["min_trading_days"]:
+        if info["passed"]:
             done = True
-            print(f"Challenge passed at step {env.current_step}: Profit {profit_pct:.2f}%, Days {len(trading_days)}")
-        
-        if env.current_step % 24 == 0 or done:
-            print(f"Step {env.current_step}, Day {len(daily_pnl) + 1}, Action: {action_str}, Balance: {info['balance']:.2f}, Equity: {info['equity']:.2f}, Trades: {trades}")
+            profit_pct = (info["balance"] - config["initial_balance"]) / config["initial_balance"] * 100
+            print(f"Challenge passed at step {env.current_step}: Profit {profit_pct:.2f}%, Days {info['trading_days']}")
     
-    if current_day is not None:
-        daily_pnl.append(env.daily_pnl)
+    recorder.close()
+    print(f"Events saved to {recorder.path}")
     
-    profit_pct = (info["balance"] - config["initial_balance"]) / config["initial_balance"] * 100
-    max_daily_loss = min(daily_pnl) / config["initial_balance"] * 100 if daily_pnl else 0
-    avg_trade_profit = sum(trade_profits) / len(trade_profits) if trade_profits else 0
+    equity = pd.Series(equity, index=test_data.index[1:len(equity) + 1], name="equity")
+    return report_backtest(
+        config, rules, test_data, info["balance"], equity, env.tracker.daily_pnls(), info["trading_days"],
+        pd.DataFrame(trade_log, columns=TRADE_COLUMNS), action_counts, plot,
+        open_time=position_open["open_time"] if position_open is not None and env.position != 0 else None
+    )
+
+def report_backtest(config, rules, test_data, balance, equity, daily_pnl, trading_days, trade_df, action_counts, plot=True,
+                    open_time=None):
+    """
+    Print the results and trade table, export the trade/period tables and plot.
+
+    open_time is the entry time of a position still open at the end, which counts toward
+    exposure up to the last bar.
+    """
+    initial_balance = config["initial_balance"]
+    trades = len(trade_df)
+    # An empty trade log has object columns; the time formatting below needs datetimes
+    trade_df = trade_df.astype({"open_time": "datetime64[ns]", "close_time": "datetime64[ns]"})
+    profit_pct = (balance - initial_balance) / initial_balance * 100
+    max_daily_loss = np.min(daily_pnl) / initial_balance * 100 if len(daily_pnl) else 0
     total_steps = sum(action_counts.values())
+    index = test_data.index
+    open_times = trade_df["open_time"] if open_time is None else pd.concat([trade_df["open_time"], pd.Series([open_time])])
+    metrics = compute_metrics(
+        equity.to_numpy(), rules.day_numbers(equity.index), initial_balance, trade_df["profit"].to_numpy(),
+        index.searchsorted(open_times) - 1, index.searchsorted(trade_df["close_time"]) - 1
+    )
+    avg_trade_profit = metrics["avg_trade"]
     
     print(f"\nBacktest Results:")
     print(f"Profit: {profit_pct:.2f}%")
     print(f"Max Daily Loss: {max_daily_loss:.2f}%")
-    print(f"Trading Days: {len(trading_days)}")
+    print(f"Trading Days: {trading_days}")
     print(f"Total Trades: {trades}")
     print(f"Avg Trade Profit: {avg_trade_profit:.2f}")
+    print(f"Win Rate: {metrics['win_rate'] * 100:.1f}%, Profit Factor: {metrics['profit_factor']:.2f}")
+    print(f"Sharpe: {metrics['sharpe']:.2f}, Sortino: {metrics['sortino']:.2f}")
+    print(f"Max Drawdown: {metrics['max_drawdown_pct']:.2f}% ({metrics['max_drawdown_bars']} bars underwater), Exposure: {metrics['exposure_pct']:.1f}%")
     print(f"Action Counts: {action_counts} (Total: {total_steps})")
-    print(f"Success: {profit_pct >= config['challenge']['profit_target'] * 100 and max_daily_loss > -config['challenge']['daily_loss_limit'] * 100 and len(trading_days) >= config['challenge']['min_trading_days']}")
+    # Without a profit target the challenge never passes, as in RuleTracker
+    print(f"Success: {rules.profit_target is not None and profit_pct >= rules.profit_target * 100 and max_daily_loss > -rules.daily_loss_limit * 100 and trading_days >= rules.min_trading_days}")
     
     # Trade Analysis Table
+    export = trade_df.assign(
+        open_time=trade_df["open_time"].dt.strftime('%Y-%m-%d %H:%M'),
+        close_time=trade_df["close_time"].dt.strftime('%Y-%m-%d %H:%M')
+    )
     print("\nTrade Analysis:")
-    print("-" * 90)
-    print(f"{'Trade':<6} {'Type':<6} {'Open Time':<20} {'Open Price':<11} {'Close Time':<20} {'Close Price':<12} {'Spread':<7} {'Profit':<7} {'Balance':<9}")
-    print("-" * 90)
-    for trade in trade_log:
-        print(f"{trade['trade_number']:<6} {trade['trade_type'].capitalize():<6} {trade['open_time'].strftime('%Y-%m-%d %H:%M'):<20} {trade['open_price']:<11.5f} {trade['close_time'].strftime('%Y-%m-%d %H:%M'):<20} {trade['close_price']:<12.5f} {trade['spread']:<7.2f} {trade['profit']:<7.2f} {trade['balance']:<9.2f}")
-    print("-" * 90)
+    print(export.assign(trade_type=export["trade_type"].str.capitalize()).to_string(index=False, formatters={
+        "open_price": "{:.5f}".format, "close_price": "{:.5f}".format,
+        "spread": "{:.2f}".format, "profit": "{:.2f}".format, "balance": "{:.2f}".format
+    }))
     
-    # Save Trade Analysis to Excel
-    folder = create_plot_folder()
-    trade_df = pd.DataFrame(trade_log)
-    trade_df['open_time'] = trade_df['open_time'].dt.strftime('%Y-%m-%d %H:%M')
-    trade_df['close_time'] = trade_df['close_time'].dt.strftime('%Y-%m-%d %H:%M')
-    trade_df = trade_df[['trade_number', 'trade_type', 'open_time', 'open_price', 'close_time', 'close_price', 'spread', 'profit', 'balance']]
-    trade_df.to_excel(f"{folder}/trade_analysis.xlsx", index=False)
-    print(f"Trade analysis saved to {folder}/trade_analysis.xlsx")
+    monthly = period_table(equity, initial_balance, "ME")
+    print("\nMonthly Returns:")
+    print(monthly.to_string(float_format=lambda value: f"{value:.2f}"))
     
-    # Generate price plot
-    plot_price_with_trades(test_data, trade_log)
-    
-    return profit_pct, len(trading_days), trades, avg_trade_profit, action_counts
+    # Save trade analysis and per-period aggregates (CSV or Parquet)
+    folder = create_plot_folder()
+    report = config.get("report", {})
+    report_format = report.get("format", "csv")
+    export_table(export, f"{folder}/trade_analysis.{report_format}")
+    export_table(period_table(equity, initial_balance, "D").rename_axis("date"), f"{folder}/daily_returns.{report_format}", index=True)
+    export_table(monthly.rename_axis("month"), f"{folder}/monthly_returns.{report_format}", index=True)
+    print(f"Trade analysis saved to {folder}/trade_analysis.{report_format}")
+    
+    # Generate price plot (Agg, decimated; optionally rendered in a background process)
+    if plot:
+        from utils.plotting import plot_price_with_trades
+        path = f"{folder}/price_trades_2025.png"
+        plot_price_with_trades(
+            test_data, trade_df, path, background=report.get("plot_background", False),
+            max_points=report.get("plot_max_points", 5000), dpi=report.get("plot_dpi", 150)
+        )
+        print(f"Price plot {'rendering in the background to' if report.get('plot_background', False) else 'saved to'} {path}")
+    
+    return profit_pct, trading_days, trades, avg_trade_profit, action_counts
 
 if __name__ == "__main__":
     run_backtest()
\ No newline at end of file
@@ -0,0 +1,307 @@
+# Monte Carlo robustness tests: resampled trade logs and multi-seed policy replays
+import argparse
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from backtesting.vectorized import PIP, PIP_MULTIPLIER
+from utils.metrics import check_table_format
+
+METHODS = ["bootstrap", "shuffle", "none"]
+# Upper bound on simulations x trades per batch (a few float64 matrices of this size are live at once)
+CHUNK_CELLS = 4_000_000
+OUTCOME_COLUMNS = ["profit_pct", "max_drawdown_pct", "worst_daily_loss_pct", "trading_days", "trades", "breach", "passed"]
+
+def resample_indices(rng, n_sims, n_trades, method="bootstrap"):
+    """
+    Trade order of every simulation as an (n_sims, n_trades) index matrix.
+    Args:
+        method (str): "bootstrap" draws trades with replacement, "shuffle" permutes them,
+            "none" keeps the original order (for cost perturbation alone).
+    """
+    if method == "bootstrap":
+        return rng.integers(0, n_trades, size=(n_sims, n_trades))
+    order = np.broadcast_to(np.arange(n_trades), (n_sims, n_trades))
+    if method == "shuffle":
+        return rng.permuted(order, axis=1)
+    if method == "none":
+        return order
+    raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+
+def trading_costs(rng, shape, extra_spread_pips=0.0, slippage_pips=0.0):
+    """
+    Extra cost per trade in account currency: a spread widening drawn from [0, extra_spread_pips]
+    plus adverse slippage of |N(0, slippage_pips)| on both the entry and the exit fill.
+    """
+    pips = np.zeros(shape)
+    if extra_spread_pips:
+        pips += rng.uniform(0.0, extra_spread_pips, size=shape)
+    if slippage_pips:
+        pips += np.abs(rng.normal(0.0, slippage_pips, size=(2,) + tuple(shape))).sum(axis=0)
+    return pips * (PIP * PIP_MULTIPLIER)
+
+def simulate_paths(profits, day, rules, initial_balance=10000):
+    """
+    Apply the challenge rules to many trade sequences at once.
+
+    Trade k of every path closes on day[k] of the original log, so resampling moves outcomes
+    while the trading calendar stays the same. Rules are checked after every trade on the
+    closed balance (the log has no intra-trade equity): realized daily loss, trailing or static
+    drawdown, and the profit target once min_trading_days is met. A path stops at its first
+    breach, or when it passes.
+    Args:
+        profits (np.ndarray): (n_sims, n_trades) trade PnL.
+        day (np.ndarray): (n_trades,) non-decreasing day numbers.
+        rules (RuleSet): Challenge rules.
+        initial_balance (float): Starting balance.
+    Returns:
+        dict: (n_sims,) arrays named as OUTCOME_COLUMNS.
+    """
+    n_sims, n_trades = profits.shape
+    if n_trades == 0:
+        zeros = np.zeros(n_sims)
+        return {
+            "profit_pct": zeros, "max_drawdown_pct": zeros, "worst_daily_loss_pct": zeros,
+            "trading_days": zeros.astype(np.int64), "trades": zeros.astype(np.int64),
+            "breach": zeros.astype(bool), "passed": zeros.astype(bool)
+        }
+    cumulative = np.cumsum(profits, axis=1)
+    balance = initial_balance + cumulative
+
+    # Realized PnL since the start of each trade's day
+    new_day = np.ones(n_trades, dtype=bool)
+    new_day[1:] = day[1:] != day[:-1]
+    day_start = np.maximum.accumulate(np.where(new_day, np.arange(n_trades), 0))
+    before = np.concatenate((np.zeros((n_sims, 1)), cumulative), axis=1)
+    daily_loss = -(cumulative - before[:, day_start]) / initial_balance
+
+    if rules.drawdown_type == "trailing":
+        peak = np.maximum(np.maximum.accumulate(balance, axis=1), initial_balance)
+        drawdown = (peak - balance) / peak
+    else:
+        drawdown = (initial_balance - balance) / initial_balance
+
+    trading_days = np.cumsum(new_day)
+    breach = (daily_loss > rules.daily_loss_limit) | (drawdown > rules.max_drawdown)
+    first_breach = np.where(breach.any(axis=1), breach.argmax(axis=1), n_trades)
+    if rules.profit_target is not None:
+        passing = (cumulative >= rules.profit_target * initial_balance) & (trading_days >= rules.min_trading_days)
+        first_pass = np.where(passing.any(axis=1), passing.argmax(axis=1), n_trades)
+    else:
+        first_pass = np.full(n_sims, n_trades)
+    end = np.minimum(np.minimum(first_breach, first_pass), n_trades - 1)
+
+    rows = np.arange(n_sims)
+    live = np.arange(n_trades) <= end[:, None]
+    return {
+        "profit_pct": cumulative[rows, end] / initial_balance * 100,
+        "max_drawdown_pct": np.where(live, drawdown, 0.0).max(axis=1) * 100,
+        # 0 for paths without a losing day, as in the policy replays
+        "worst_daily_loss_pct": np.maximum(np.where(live, daily_loss, 0.0).max(axis=1), 0.0) * 100,
+        "trading_days": trading_days[end],
+        "trades": end + 1,
+        "breach": first_breach <= end,
+        "passed": first_pass < first_breach
+    }
+
+def monte_carlo(profits, day, rules, initial_balance=10000, n_sims=100000, method="bootstrap",
+                extra_spread_pips=0.0, slippage_pips=0.0, seed=0, chunk_size=20000):
+    """
+    Distribution of challenge outcomes over resampled and cost-perturbed trade logs.
+
+    Simulations run in chunks of at most chunk_size rows (and CHUNK_CELLS matrix cells), so
+    memory stays at a few (chunk x trades) matrices however many paths are requested.
+    Args:
+        profits (np.ndarray): Trade PnL of one backtest, in close order.
+        day (np.ndarray): Day number of each trade's close (RuleSet.day_numbers).
+        rules (RuleSet): Challenge rules.
+        initial_balance (float): Starting balance.
+        n_sims (int): Number of simulated paths.
+        method (str): One of METHODS, see resample_indices().
+        extra_spread_pips (float): Upper bound of the per-trade spread widening.
+        slippage_pips (float): Scale of the per-fill adverse slippage.
+        seed (int): RNG seed.
+        chunk_size (int): Paths per vectorized batch.
+    Returns:
+        pd.DataFrame: One row per path with OUTCOME_COLUMNS.
+    """
+    profits = np.asarray(profits, dtype=np.float64)
+    day = np.asarray(day, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, min(chunk_size, CHUNK_CELLS // max(1, len(profits))))
+    chunks = []
+    for start in range(0, n_sims, chunk_size):
+        size = min(chunk_size, n_sims - start)
+        paths = profits[resample_indices(rng, size, len(profits), method)]
+        paths -= trading_costs(rng, paths.shape, extra_spread_pips, slippage_pips)
+        chunks.append(simulate_paths(paths, day, rules, initial_balance))
+    return pd.DataFrame({column: np.concatenate([chunk[column] for chunk in chunks]) for column in OUTCOME_COLUMNS})
+
+def summarize(outcomes, percentiles=(5, 25, 50, 75, 95)):
+    """Pass/breach probabilities and percentiles of the outcome columns."""
+    summary = {
+        "paths": len(outcomes),
+        "pass_probability": float(outcomes["passed"].mean()),
+        "breach_probability": float(outcomes["breach"].mean()),
+        "profit_probability": float((outcomes["profit_pct"] > 0).mean())
+    }
+    table = outcomes[["profit_pct", "max_drawdown_pct", "worst_daily_loss_pct", "trading_days"]].quantile(np.array(percentiles) / 100)
+    table.index = [f"p{p}" for p in percentiles]
+    table.loc["mean"] = outcomes[table.columns].mean()
+    return summary, table
+
+def _run_seed(task):
+    """Replay the PPO model over a shared test frame with sampled actions under one seed."""
+    from agents.ppo_agent import PPOAgent
+    from backtesting.walk_forward import shared_frame
+    from environments.forex_env import ForexEnv
+    from models.model_manager import ModelManager
+
+    seed, settings = task
+    data = shared_frame(0, settings["n_rows"])
+    rules = settings["rules"]
+    env = ForexEnv(data=data, initial_balance=settings["initial_balance"], rules=rules)
+    agent = ModelManager(settings["save_dir"]).load_agent(PPOAgent(env, verbose=0), settings["model_name"])
+    agent.model.set_random_seed(seed)
+    state, _ = env.reset(seed=seed)
+    done = False
+    profits = []
+    days = []
+    max_drawdown = 0.0
+    while not done:
+        balance = env.balance
+        state, reward, done, truncated, info = env.step(agent.predict(state, deterministic=False))
+        max_drawdown = max(max_drawdown, info["drawdown"])
+        if info["balance"] != balance:
+            profits.append(info["balance"] - balance)
+            days.append(int(env._day[env.current_step]))
+        done = done or info["passed"]
+    initial_balance = settings["initial_balance"]
+    profit_pct = (info["balance"] - initial_balance) / initial_balance * 100
+    daily = env.tracker.daily_pnls()
+    worst_daily_loss_pct = max(0.0, -min(daily) / initial_balance * 100)
+    return {
+        "seed": seed,
+        "profit_pct": profit_pct,
+        "max_drawdown_pct": max_drawdown * 100,
+        "worst_daily_loss_pct": worst_daily_loss_pct,
+        "trading_days": info["trading_days"],
+        "trades": len(profits),
+        "breach": env.tracker.breached,
+        # Passed before any breach, the same rule simulate_paths applies to resampled trades
+        "passed": bool(info["passed"] and not env.tracker.breached),
+        "profits": profits,
+        "days": days
+    }
+
+def evaluate_policy_seeds(data, model_name, seeds, rules, initial_balance=10000, workers=None, torch_threads=None,
+                          save_dir="models/saved_models", start_method=None):
+    """
+    Rerun the stochastic (deterministic=False) PPO backtest once per seed, in parallel.
+
+    The test frame is shared with the workers like in walk-forward training. Each run stops at
+    a breach, at the last bar, or when the challenge is passed, as run_backtest does; passed
+    means the RuleTracker passed before any breach, as in simulate_paths().
+    Returns:
+        tuple: (pd.DataFrame with one OUTCOME_COLUMNS row per seed, list of per-seed
+                (profits, days) trade arrays for pooling into monte_carlo()).
+    """
+    from backtesting.walk_forward import init_worker
+    from utils.shared_arrays import share_arrays, release_arrays
+
+    cpus = os.cpu_count() or 1
+    workers = workers or min(len(seeds), cpus)
+    torch_threads = torch_threads or max(1, cpus // workers)
+    settings = {
+        "n_rows": len(data), "rules": rules, "initial_balance": initial_balance, "model_name": model_name,
+        "save_dir": save_dir
+    }
+    handles, spec = share_arrays({
+        "values": data.to_numpy(dtype=np.float64),
+        "index": np.asarray(data.index, dtype="datetime64[ns]")
+    })
+    try:
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(workers, initializer=init_worker, initargs=(spec, list(data.columns), torch_threads)) as pool:
+            results = pool.map(_run_seed, [(seed, settings) for seed in seeds])
+    finally:
+        release_arrays(handles, unlink=True)
+    table = pd.DataFrame([{column: result[column] for column in ["seed"] + OUTCOME_COLUMNS} for result in results])
+    trades = [(np.array(result["profits"]), np.array(result["days"], dtype=np.int64)) for result in results]
+    return table, trades
+
+def load_trade_log(path, rules):
+    """Profits and close days from a trade_analysis.csv/.parquet written by run_backtest."""
+    if path.endswith(".parquet"):
+        check_table_format("parquet")
+        trades = pd.read_parquet(path)
+    else:
+        trades = pd.read_csv(path)
+    trades = trades.sort_values("close_time", kind="stable")
+    return trades["profit"].to_numpy(dtype=np.float64), rules.day_numbers(pd.to_datetime(trades["close_time"]))
+
+def _print_summary(title, outcomes):
+    summary, table = summarize(outcomes)
+    print(f"\n{title}: {summary['paths']:,} paths")
+    print(f"Pass probability: {summary['pass_probability'] * 100:.1f}%, breach probability: "
+          f"{summary['breach_probability'] * 100:.1f}%, P(profit > 0): {summary['profit_probability'] * 100:.1f}%")
+    print(table.to_string(float_format=lambda value: f"{value:.2f}"))
+
+def main(argv=None):
+    from utils.config import load_config
+    from utils.prop_firm_rules import load_ruleset
+
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness test of a backtest trade log")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--trades", default="backtest_plots/trade_analysis.csv", help="Trade log from run_backtest")
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--sims", type=int, default=None)
+    parser.add_argument("--seeds", type=int, default=0, help="Also replay the PPO model under this many seeds")
+    parser.add_argument("--model", default="ppo_EURUSD_2025")
+    parser.add_argument("--test-start", default=None, help="First bar of the policy replays (default monte_carlo.test_start)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="CSV of every simulated path")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    settings = config.get("monte_carlo", {})
+    rules = load_ruleset(config)
+    initial_balance = config["initial_balance"]
+    method = args.method or settings.get("method", "bootstrap")
+    n_sims = args.sims or settings.get("n_sims", 100000)
+    mc_kwargs = {
+        "n_sims": n_sims, "method": method, "extra_spread_pips": settings.get("extra_spread_pips", 0.0),
+        "slippage_pips": settings.get("slippage_pips", 0.0), "seed": settings.get("seed", 0),
+        "chunk_size": settings.get("chunk_size", 20000)
+    }
+
+    profits, day = load_trade_log(args.trades, rules)
+    outcomes = monte_carlo(profits, day, rules, initial_balance, **mc_kwargs)
+    _print_summary(f"{method} over {len(profits)} trades from {args.trades}", outcomes)
+    if args.out:
+        outcomes.to_csv(args.out, index=False)
+        print(f"Paths saved to {args.out}")
+
+    if args.seeds:
+        from data.economic_calendar import load_calendar
+        from data.preprocessor import load_forex_data
+        data = load_forex_data(calendar=load_calendar(config))
+        data = data[data.index >= (args.test_start or settings.get("test_start", "2025-01-01"))]
+        seeds = list(range(settings.get("seed", 0), settings.get("seed", 0) + args.seeds))
+        table, trades = evaluate_policy_seeds(
+            data, args.model, seeds, rules, initial_balance, workers=args.workers or settings.get("workers")
+        )
+        print(f"\nPolicy replays of {args.model} over {len(seeds)} seeds:")
+        print(table.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+        print(f"Pass rate: {table['passed'].mean() * 100:.1f}%, profit mean {table['profit_pct'].mean():.2f}% "
+              f"(std {table['profit_pct'].std():.2f})")
+        # Resample each seed's log and pool the paths: seed noise and trade-order luck together
+        per_seed = max(1, n_sims // len(seeds))
+        pooled = pd.concat([
+            monte_carlo(seed_profits, seed_days, rules, initial_balance, **dict(mc_kwargs, n_sims=per_seed, seed=seed))
+            for seed, (seed_profits, seed_days) in zip(seeds, trades)
+        ], ignore_index=True)
+        _print_summary(f"{method} pooled over {len(seeds)} policy seeds", pooled)
+
+if __name__ == "__main__":
+    main()
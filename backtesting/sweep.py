@@ -0,0 +1,206 @@
+# Parallel parameter sweep over vectorized MA-crossover backtests
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import numpy as np
+from strategies.trend_following import crossover_actions
+from backtesting.vectorized import simulate, day_numbers
+from utils.metrics import compute_metrics
+from utils.shared_arrays import share_arrays, attach_arrays, release_arrays
+
+RESULT_COLUMNS = [
+    "run_id", "profit_pct", "final_balance", "trades", "trading_days", "max_daily_loss_pct",
+    "max_drawdown_pct", "max_drawdown_bars", "sharpe", "sortino", "win_rate", "profit_factor", "exposure_pct",
+    "breach", "passed", "end_step"
+]
+
+# Set in each worker by _init_worker; the arrays are views onto the parent's shared memory
+_SHARED = {}
+_SMA_CACHE = {}
+
+def expand_grid(grid):
+    """Cartesian product of a {param: [values]} grid as a list of param dicts."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def run_id(params, context=None):
+    """
+    Stable identifier for a parameter set, used to skip finished runs on resume.
+
+    context holds everything else the result depends on (base settings, test window, data
+    digest), so a rerun after changing any of them does not reuse old rows.
+    """
+    key = {"params": params, "context": context} if context is not None else params
+    return hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def data_digest(data):
+    """Short digest of the bar times and closes a sweep runs on."""
+    digest = hashlib.sha1(np.asarray(data.index, dtype="datetime64[ns]").tobytes())
+    digest.update(data["close"].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+def rolling_mean(values, window):
+    """Simple moving average via cumulative sums; NaN until the window is full."""
+    cumsum = np.cumsum(np.concatenate(([0.0], values)))
+    sma = np.full(len(values), np.nan)
+    sma[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return sma
+
+def _sma(window):
+    if window not in _SMA_CACHE:
+        _SMA_CACHE[window] = rolling_mean(_SHARED["close"], window)
+    return _SMA_CACHE[window]
+
+def _init_worker(spec, start, base, context):
+    handles, arrays = attach_arrays(spec)
+    _SHARED.update(arrays)
+    _SHARED["handles"] = handles
+    _SHARED["start"] = start
+    _SHARED["base"] = base
+    _SHARED["context"] = context
+
+def _run_one(params):
+    """Backtest one parameter set on the shared test window and return a result row."""
+    settings = dict(_SHARED["base"], **params)
+    start = _SHARED["start"]
+    # Indicators use the full history so the test window starts with warmed-up averages
+    actions = crossover_actions(_sma(settings["fast_window"])[start:], _sma(settings["slow_window"])[start:])
+    result = simulate(
+        _SHARED["close"][start:], _SHARED["day"][start:], actions,
+        initial_balance=settings["initial_balance"],
+        spread=settings["spread"],
+        daily_loss_limit=settings["daily_loss_limit"],
+        max_drawdown=settings["max_drawdown"],
+        profit_target=settings["profit_target"],
+        min_trading_days=settings["min_trading_days"]
+    )
+    initial_balance = settings["initial_balance"]
+    final_balance = float(result["balance"][-1])
+    profit_pct = (final_balance - initial_balance) / initial_balance * 100
+    max_daily_loss_pct = float(result["daily_pnl"].min()) / initial_balance * 100
+    end = result["end_step"]
+    open_step = result["open_step"]
+    if result["open_position_step"] >= 0:
+        open_step = np.append(open_step, result["open_position_step"])
+    metrics = compute_metrics(
+        result["equity"], _SHARED["day"][start + 1:start + end + 2], initial_balance,
+        result["profit"], open_step, result["close_step"]
+    )
+    passed = (profit_pct >= settings["profit_target"] * 100
+              and max_daily_loss_pct > -settings["daily_loss_limit"] * 100
+              and result["trading_days"] >= settings["min_trading_days"])
+    row = dict(params)
+    row.update({
+        "run_id": run_id(params, _SHARED["context"]),
+        "profit_pct": profit_pct,
+        "final_balance": final_balance,
+        "trades": len(result["profit"]),
+        "trading_days": result["trading_days"],
+        "max_daily_loss_pct": max_daily_loss_pct,
+        "max_drawdown_pct": float(result["drawdown"].max()) * 100,
+        "max_drawdown_bars": metrics["max_drawdown_bars"],
+        "sharpe": metrics["sharpe"],
+        "sortino": metrics["sortino"],
+        "win_rate": metrics["win_rate"],
+        "profit_factor": metrics["profit_factor"],
+        "exposure_pct": metrics["exposure_pct"],
+        "breach": result["breach"],
+        "passed": passed,
+        "end_step": end
+    })
+    return row
+
+def _finished_runs(results_path, columns):
+    """run_ids already in results_path; refuses a file written with different columns."""
+    if not os.path.exists(results_path) or os.path.getsize(results_path) == 0:
+        return set()
+    with open(results_path, newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != columns:
+            raise ValueError(
+                f"{results_path} has columns {reader.fieldnames}, this grid writes {columns}; "
+                "pass a new results path for a different grid"
+            )
+        return {row["run_id"] for row in reader}
+
+def run_sweep(data, grid, base, results_path, test_start="2025-01-01", workers=None, chunksize=16):
+    """
+    Fan a parameter grid out over a process pool and stream rows into results_path (CSV).
+
+    Runs already in results_path are skipped, so an interrupted sweep resumes where it stopped;
+    their ids cover base, test_start and the data, so changed inputs rerun every grid point.
+    Args:
+        data (pd.DataFrame): Preprocessed history (indicators are recomputed per window from close).
+        grid (dict): Param name -> list of values; keys override base.
+        base (dict): Defaults for every simulate() setting plus fast_window/slow_window.
+        results_path (str): CSV file to append results to.
+        test_start (str): First timestamp of the backtest window.
+        workers (int): Pool size, defaults to os.cpu_count().
+        chunksize (int): Runs handed to a worker at a time.
+    Returns:
+        int: Number of runs executed in this call.
+    """
+    runs = expand_grid(grid)
+    columns = sorted(grid) + RESULT_COLUMNS
+    context = {"base": base, "test_start": test_start, "data": data_digest(data)}
+    done = _finished_runs(results_path, columns)
+    pending = [params for params in runs if run_id(params, context) not in done]
+    print(f"Sweep: {len(runs)} runs, {len(runs) - len(pending)} already in {results_path}, {len(pending)} to go")
+    if not pending:
+        return 0
+
+    start = int(np.searchsorted(data.index.values, np.datetime64(test_start)))
+    handles, spec = share_arrays({
+        "close": data["close"].to_numpy(dtype=np.float64),
+        "day": day_numbers(data.index)
+    })
+    write_header = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+    folder = os.path.dirname(results_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    try:
+        with open(results_path, "a", newline="") as f, \
+                multiprocessing.Pool(workers, initializer=_init_worker, initargs=(spec, start, base, context)) as pool:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+            for count, row in enumerate(pool.imap_unordered(_run_one, pending, chunksize=chunksize), 1):
+                writer.writerow(row)
+                f.flush()
+                if count % 100 == 0 or count == len(pending):
+                    print(f"Sweep progress: {count}/{len(pending)}")
+    finally:
+        release_arrays(handles, unlink=True)
+    return len(pending)
+
+def main(argv=None):
+    from data.preprocessor import load_forex_data
+    from utils.config import load_config
+
+    parser = argparse.ArgumentParser(description="Parallel backtest parameter sweep")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--out", default="backtest_plots/sweep_results.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--test-start", default="2025-01-01")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    base = {
+        "initial_balance": config["initial_balance"],
+        "spread": 1.0,
+        "fast_window": 20,
+        "slow_window": 50,
+        "daily_loss_limit": config["challenge"]["daily_loss_limit"],
+        "max_drawdown": config["challenge"]["max_drawdown"],
+        "profit_target": config["challenge"]["profit_target"],
+        "min_trading_days": config["challenge"]["min_trading_days"]
+    }
+    data = load_forex_data()
+    run_sweep(data, config["sweep"]["grid"], base, args.out, test_start=args.test_start, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
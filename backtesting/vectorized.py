@@ -0,0 +1,162 @@
+# Vectorized backtest engine for precomputed action arrays
+import numpy as np
+import pandas as pd
+from utils.prop_firm_rules import RuleSet, evaluate_curve
+
+PIP = 0.0001
+PIP_MULTIPLIER = 10000  # ForexEnv books price moves * 10000 as account currency
+
+def day_numbers(index):
+    """Calendar day of every bar as an int64 day number (what .date() gives per timestamp)."""
+    return np.asarray(index, dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+
+def run_parity(mask):
+    """True where mask is True at an even position (0, 2, 4, ...) within its run of Trues."""
+    mask = np.asarray(mask, dtype=bool)
+    steps = np.arange(len(mask))
+    starts = mask & ~np.concatenate(([False], mask[:-1]))
+    run_start = np.maximum.accumulate(np.where(starts, steps, 0))
+    return mask & ((steps - run_start) % 2 == 0)
+
+def simulate(close, day, actions, initial_balance=10000, spread=1.0, daily_loss_limit=0.05,
+             max_drawdown=0.10, profit_target=None, min_trading_days=0, rules=None, blocked=None):
+    """
+    Replay an action array with ForexEnv/run_backtest semantics using array operations only.
+
+    Action 1 opens a long and 2 opens a short while flat; any non-zero action closes an open
+    position. The episode stops at the first prop-firm breach, once profit_target and
+    min_trading_days are both met (if profit_target is given), or at the last bar.
+    Args:
+        close (np.ndarray): Close price per bar.
+        day (np.ndarray): Day number per bar, see day_numbers().
+        actions (np.ndarray): 0 hold, 1 buy, 2 sell per bar.
+        initial_balance (float): Starting balance.
+        spread (float): Spread in pips.
+        daily_loss_limit (float): Max realized daily loss as a fraction of initial balance.
+        max_drawdown (float): Max trailing drawdown from peak equity.
+        profit_target (float): Profit fraction that ends the challenge, None to run to the end.
+        min_trading_days (int): Trading days required before profit_target counts.
+        rules (RuleSet): Full firm ruleset; replaces the four limits above when given.
+        blocked (np.ndarray): Per-bar flags (e.g. news_blackout) on which a flat account ignores
+            buy/sell actions; closes still go through.
+    Returns:
+        dict: Per-step arrays (balance, equity, drawdown), closed trades, daily PnL and outcome.
+    """
+    if rules is None:
+        rules = RuleSet(profit_target, daily_loss_limit, max_drawdown, min_trading_days)
+    close = np.asarray(close, dtype=np.float64)
+    n_steps = len(close) - 1  # ForexEnv is done once current_step reaches the last bar
+    actions = np.asarray(actions, dtype=np.int64)[:n_steps]
+    steps = np.arange(n_steps)
+
+    # Every non-zero action toggles between flat and in-position, except that opens are skipped on
+    # blocked bars. The account is flat at the start of every run of unblocked signals (a blocked
+    # signal either closed or was skipped), so opens sit at even positions within those runs and
+    # each open is closed by the signal after it.
+    signals = np.flatnonzero(actions)
+    if blocked is None:
+        is_open = run_parity(np.ones(len(signals), dtype=bool))
+    else:
+        is_open = run_parity(~np.asarray(blocked, dtype=bool)[signals])
+    is_close = np.zeros_like(is_open)
+    is_close[1:] = is_open[:-1]
+    opens = signals[is_open]
+    closes = signals[is_close]
+    direction = np.where(actions[opens] == 1, 1, -1)
+    entry = close[opens] + (spread * PIP) * direction
+    n_closed = len(closes)
+    profits = (close[closes] - entry[:n_closed]) * PIP_MULTIPLIER * direction[:n_closed]
+
+    realized = np.zeros(n_steps)
+    realized[closes] = profits
+    balance = np.cumsum(np.concatenate(([initial_balance], realized)))
+    balance_before, balance = balance[:-1], balance[1:]
+
+    # Position and entry price held after each step
+    delta = np.zeros(n_steps, dtype=np.int64)
+    delta[opens] += direction
+    delta[closes] -= direction[:n_closed]
+    position = np.cumsum(delta)
+    last_open = np.searchsorted(opens, steps, side="right") - 1
+    entry_price = np.zeros(n_steps)
+    entry_price[last_open >= 0] = entry[last_open[last_open >= 0]]
+
+    next_close = close[1:n_steps + 1]
+    equity = balance + (next_close - entry_price) * PIP_MULTIPLIER * position
+
+    # Trades run_backtest logs: closes that changed the balance
+    logged = balance[closes] != balance_before[closes]
+    traded = np.zeros(n_steps, dtype=bool)
+    traded[closes[logged]] = True
+
+    # Rules see the day of the bar each step moves to, as run_backtest and ForexEnv do
+    step_day = np.asarray(day)[1:n_steps + 1]
+    status = evaluate_curve(rules, initial_balance, step_day, balance, equity, realized, traded)
+    new_day = status["rollover"]
+    daily_pnl = status["daily_pnl"]
+    breach = status["breach"]
+    stop = breach | status["passed"]
+    stop[-1] = True
+    end = int(np.argmax(stop))
+
+    # An unlogged (zero-profit) close leaves run_backtest holding the earlier open for the next trade
+    trip = np.arange(n_closed)
+    last_logged = np.maximum.accumulate(np.where(logged, trip, -1))
+    open_trip = np.concatenate(([-1], last_logged[:-1])) + 1
+    keep = logged & (closes <= end)
+    trade_open = open_trip[keep]
+
+    day_pnl = daily_pnl[1:end + 1][new_day[1:end + 1]]
+    final_day_pnl = 0.0 if new_day[end] else daily_pnl[end]
+
+    return {
+        "end_step": end,
+        "balance": balance[:end + 1],
+        "equity": equity[:end + 1],
+        "drawdown": status["drawdown"][:end + 1],
+        "breach": bool(breach[end]),
+        "daily_pnl": np.append(day_pnl, final_day_pnl),
+        "trading_days": int(status["trading_days"][end]),
+        "action_counts": np.bincount(actions[:end + 1], minlength=3),
+        "open_step": opens[trade_open],
+        "close_step": closes[keep],
+        "direction": direction[trade_open],
+        "open_price": entry[trade_open],
+        "close_price": close[closes[keep]],
+        "profit": (balance - balance_before)[closes[keep]],  # run_backtest logs the balance change
+        "trade_balance": balance[closes[keep]],
+        # Step of the position still open after end_step, -1 when flat
+        "open_position_step": int(opens[last_open[end]]) if position[end] != 0 else -1,
+    }
+
+def run_vectorized_backtest(data, actions, initial_balance=10000, spread=1.0, daily_loss_limit=0.05,
+                            max_drawdown=0.10, profit_target=None, min_trading_days=0, rules=None):
+    """Run simulate() on a preprocessed frame and build run_backtest's trade log and summary.
+
+    A news_blackout column, if present, blocks new positions as it does in ForexEnv.
+    """
+    day = rules.day_numbers(data.index) if rules is not None else day_numbers(data.index)
+    blocked = data["news_blackout"].to_numpy(dtype=bool) if "news_blackout" in data else None
+    result = simulate(
+        data["close"].to_numpy(), day, actions,
+        initial_balance=initial_balance, spread=spread, daily_loss_limit=daily_loss_limit,
+        max_drawdown=max_drawdown, profit_target=profit_target, min_trading_days=min_trading_days, rules=rules,
+        blocked=blocked
+    )
+    end = result["end_step"]
+    index = data.index
+    result["trade_log"] = pd.DataFrame({
+        "trade_number": np.arange(1, len(result["profit"]) + 1),
+        "trade_type": np.where(result["direction"] == 1, "long", "short"),
+        "open_time": index[result["open_step"]],
+        "open_price": result["open_price"],
+        "close_time": index[result["close_step"]],
+        "close_price": result["close_price"],
+        "spread": spread * 10,
+        "profit": result["profit"],
+        "balance": result["trade_balance"],
+    })
+    result["equity_curve"] = pd.Series(result["equity"], index=index[1:end + 2], name="equity")
+    result["final_balance"] = float(result["balance"][-1])
+    result["profit_pct"] = (result["final_balance"] - initial_balance) / initial_balance * 100
+    return result
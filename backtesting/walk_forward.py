@@ -0,0 +1,223 @@
+# Walk-forward (rolling window) PPO training with out-of-sample evaluation
+import argparse
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from utils.shared_arrays import share_arrays, attach_arrays, release_arrays
+
+WINDOW_COLUMNS = [
+    "window", "model_name", "train_start", "train_end", "test_start", "test_end", "profit_pct",
+    "max_drawdown_pct", "trades", "breach"
+]
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+# Set in each worker by init_worker; the arrays are views onto the parent's shared memory
+_SHARED = {}
+
+def make_windows(n_rows, n_windows, train_bars, test_bars):
+    """
+    Rolling (train, test) row ranges ending at the last bar, oldest first.
+    Returns:
+        list: (train_start, test_start, test_end) row numbers; train ends where test starts.
+    """
+    first_test = n_rows - n_windows * test_bars
+    if first_test - train_bars < 0:
+        raise ValueError(f"{n_windows} windows of {train_bars} + {test_bars} bars need more than {n_rows} rows")
+    windows = []
+    for i in range(n_windows):
+        test_start = first_test + i * test_bars
+        windows.append((test_start - train_bars, test_start, test_start + test_bars))
+    return windows
+
+def init_worker(spec, columns, torch_threads):
+    """Pool initializer: attach the shared frame arrays (see shared_frame) and cap torch threads."""
+    # Cap BLAS/OpenMP pools before torch spins them up so N workers don't share one core N ways
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(torch_threads)
+    import torch
+    torch.set_num_threads(torch_threads)
+    handles, arrays = attach_arrays(spec)
+    _SHARED.update(arrays)
+    _SHARED["handles"] = handles
+    _SHARED["columns"] = columns
+
+def shared_frame(start, end):
+    """Rebuild a preprocessed DataFrame slice from the shared arrays (in an init_worker process)."""
+    index = pd.DatetimeIndex(_SHARED["index"][start:end])
+    return pd.DataFrame(_SHARED["values"][start:end], index=index, columns=_SHARED["columns"])
+
+def _run_window(task):
+    """Train a PPO agent on one train slice and replay it over the following test slice."""
+    from agents.ppo_agent import PPOAgent, make_forex_vec_env, ppo_kwargs
+    from environments.forex_env import ForexEnv
+
+    number, (train_start, test_start, test_end), settings = task
+    train_data = shared_frame(train_start, test_start)
+    test_data = shared_frame(test_start, test_end)
+    env_kwargs = settings["env_kwargs"]
+
+    train_env = make_forex_vec_env(train_data, n_envs=settings["n_envs"], vec_env="dummy", **env_kwargs)
+    agent = PPOAgent(train_env, learning_rate=settings["learning_rate"], verbose=0, **ppo_kwargs(settings["ppo_params"]))
+    agent.train(train_env, timesteps=settings["timesteps"])
+    train_env.close()
+    model_dir = os.path.join(settings["save_dir"], settings["model_name"])
+    os.makedirs(model_dir, exist_ok=True)
+    agent.save(os.path.join(model_dir, f"{settings['model_name']}.zip"))
+
+    # Out-of-sample replay; equity stays flat after a breach ends the episode
+    env = ForexEnv(data=test_data, **env_kwargs)
+    state, _ = env.reset()
+    equity = np.full(len(test_data), float(env_kwargs["initial_balance"]))
+    done = False
+    trades = 0
+    while not done:
+        action = agent.predict(state, deterministic=settings["deterministic"])
+        position = env.position
+        state, reward, done, truncated, info = env.step(action)
+        trades += action != 0 and position != 0
+        equity[env.current_step:] = info["equity"]
+    initial_balance = env_kwargs["initial_balance"]
+    peak = np.maximum.accumulate(equity)
+    return {
+        "window": number,
+        "model_name": settings["model_name"],
+        "train_start": train_data.index[0],
+        "train_end": train_data.index[-1],
+        "test_start": test_data.index[0],
+        "test_end": test_data.index[-1],
+        "profit_pct": (equity[-1] - initial_balance) / initial_balance * 100,
+        "max_drawdown_pct": float(((peak - equity) / peak).max()) * 100,
+        "trades": int(trades),
+        "breach": env.current_step < len(test_data) - 1,
+        "equity": equity
+    }
+
+def chain_equity(results, index, initial_balance):
+    """
+    Stitch per-window equity curves into one out-of-sample curve.
+
+    Every window starts from initial_balance, so each curve is rescaled by the growth of the
+    windows before it (returns compound across windows).
+    """
+    pieces = []
+    scale = 1.0
+    for result in results:
+        pieces.append(result["equity"] * scale)
+        scale *= result["equity"][-1] / initial_balance
+    return pd.Series(np.concatenate(pieces), index=index, name="equity")
+
+def run_walk_forward(data, n_windows, train_bars, test_bars, env_kwargs, timesteps=100000,
+                     learning_rate=0.0001, n_envs=1, pair="EURUSD", workers=None, torch_threads=None,
+                     deterministic=False, save_dir="models/saved_models", start_method=None, config=None,
+                     ppo_params=None):
+    """
+    Train one PPOAgent per rolling window in parallel and evaluate each on its test window.
+
+    The preprocessed frame is copied into shared memory once; workers slice it without pickling
+    or re-running indicators. Each model is saved and registered as ppo_<pair>_wf<window>.
+    Args:
+        data (pd.DataFrame): Preprocessed history.
+        n_windows (int): Number of train/test windows.
+        train_bars (int): Training rows per window.
+        test_bars (int): Out-of-sample rows per window (windows step forward by this much).
+        env_kwargs (dict): ForexEnv settings (initial_balance, daily_loss_limit, max_drawdown, ...).
+        timesteps (int): PPO timesteps per window.
+        learning_rate (float): PPO learning rate.
+        n_envs (int): In-process environments per worker.
+        pair (str): Pair name for model names and metadata.
+        workers (int): Pool size, defaults to min(n_windows, os.cpu_count()).
+        torch_threads (int): torch/BLAS threads per worker, defaults to cpu_count // workers.
+        deterministic (bool): Greedy actions in the out-of-sample replay.
+        save_dir (str): ModelManager directory for the window models.
+        start_method (str): multiprocessing start method, None for the platform default.
+        config (dict): Stored as the models' config hash.
+        ppo_params (dict): Further PPOAgent hyperparameters; keys outside agents.ppo_agent.PPO_HYPERPARAMETERS
+            are ignored, so a config["agent"] section can be passed as is.
+    Returns:
+        tuple: (per-window DataFrame, chained out-of-sample equity Series).
+    """
+    from models.model_manager import ModelManager
+
+    windows = make_windows(len(data), n_windows, train_bars, test_bars)
+    cpus = os.cpu_count() or 1
+    workers = workers or min(n_windows, cpus)
+    torch_threads = torch_threads or max(1, cpus // workers)
+    base = {
+        "env_kwargs": env_kwargs, "timesteps": timesteps, "learning_rate": learning_rate, "n_envs": n_envs,
+        "deterministic": deterministic, "save_dir": save_dir, "ppo_params": ppo_params or {}
+    }
+    tasks = [(number, window, dict(base, model_name=f"ppo_{pair}_wf{number}")) for number, window in enumerate(windows)]
+    print(f"Walk-forward: {n_windows} windows ({train_bars} train / {test_bars} test bars), "
+          f"{workers} workers x {torch_threads} torch threads")
+
+    columns = list(data.columns)
+    handles, spec = share_arrays({
+        "values": data.to_numpy(dtype=np.float64),
+        "index": np.asarray(data.index, dtype="datetime64[ns]")
+    })
+    results = []
+    try:
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(workers, initializer=init_worker, initargs=(spec, columns, torch_threads)) as pool:
+            for result in pool.imap_unordered(_run_window, tasks):
+                print(f"Window {result['window']}: {result['test_start']} -> {result['test_end']}, "
+                      f"Profit {result['profit_pct']:.2f}%, Trades {result['trades']}")
+                results.append(result)
+    finally:
+        release_arrays(handles, unlink=True)
+    results.sort(key=lambda result: result["window"])
+
+    model_manager = ModelManager(save_dir)
+    for result in results:
+        model_manager.register_model(result["model_name"], metadata={
+            "pair": pair,
+            "version": f"wf{result['window']}",
+            "train_start": str(result["train_start"]),
+            "train_end": str(result["train_end"]),
+            "metrics": {"oos_profit_pct": result["profit_pct"], "oos_max_drawdown_pct": result["max_drawdown_pct"]}
+        }, config=config)
+
+    test_index = data.index[windows[0][1]:windows[-1][2]]
+    equity = chain_equity(results, test_index, env_kwargs["initial_balance"])
+    report = pd.DataFrame([{column: result[column] for column in WINDOW_COLUMNS} for result in results])
+    return report, equity
+
+def main(argv=None):
+    # No torch/stable-baselines3 import here: workers must load them after init_worker caps the threads
+    from data.economic_calendar import load_calendar
+    from data.preprocessor import load_forex_data
+    from utils.config import load_config
+    from utils.prop_firm_rules import load_ruleset
+
+    parser = argparse.ArgumentParser(description="Walk-forward PPO training and out-of-sample backtest")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--out", default="backtest_plots")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    settings = config["walk_forward"]
+    # Same firm rules and news blackout as backtest.py
+    env_kwargs = {"initial_balance": config["initial_balance"], "rules": load_ruleset(config)}
+    data = load_forex_data(calendar=load_calendar(config))
+    report, equity = run_walk_forward(
+        data, settings["n_windows"], settings["train_bars"], settings["test_bars"], env_kwargs,
+        timesteps=settings["timesteps"], learning_rate=config["agent"]["learning_rate"],
+        n_envs=settings.get("n_envs", 1), pair=config["pair"], workers=args.workers or settings.get("workers"),
+        torch_threads=settings.get("torch_threads"), config=config, ppo_params=config["agent"]
+    )
+
+    initial_balance = config["initial_balance"]
+    peak = equity.cummax()
+    print("\nWalk-Forward Results:")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    print(f"Out-of-sample profit: {(equity.iloc[-1] - initial_balance) / initial_balance * 100:.2f}%")
+    print(f"Out-of-sample max drawdown: {((peak - equity) / peak).max() * 100:.2f}%")
+    os.makedirs(args.out, exist_ok=True)
+    report.to_csv(os.path.join(args.out, "walk_forward_windows.csv"), index=False)
+    equity.to_csv(os.path.join(args.out, "walk_forward_equity.csv"))
+    print(f"Report saved to {args.out}/walk_forward_windows.csv and {args.out}/walk_forward_equity.csv")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Cold-start time of pipsentry commands, and which heavy dependencies each one imports
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# Modules that dominate interpreter start-up (each costs roughly 0.5-4 s to import)
+HEAVY_MODULES = ["torch", "stable_baselines3", "matplotlib", "talib", "pandas"]
+
+# Wall-clock targets in seconds (best of --repeats) and the heavy modules each command may load
+TARGETS = {
+    "--help": (0.15, []),
+    "fetch": (1.5, ["pandas"]),
+    "preprocess": (2.0, ["pandas", "talib"])
+}
+
+# Runs pipsentry.main() in a fresh interpreter and reports the heavy modules it imported on exit
+PROBE = """
+import atexit, json, sys
+heavy = {heavy!r}
+atexit.register(lambda: sys.stderr.write("HEAVY=" + json.dumps([m for m in heavy if m in sys.modules]) + "\\n"))
+import pipsentry
+pipsentry.main({argv!r})
+"""
+
+def cold_start(argv, repeats=5):
+    """
+    Best wall time of `pipsentry <argv>` in a new interpreter, and the heavy modules it loaded.
+    Returns:
+        tuple: (seconds, list of module names, first non-zero exit code or 0).
+    """
+    code = PROBE.format(heavy=HEAVY_MODULES, argv=argv)
+    best, loaded, returncode = float("inf"), [], 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        returncode = returncode or result.returncode
+        for line in result.stderr.splitlines():
+            if line.startswith("HEAVY="):
+                loaded = json.loads(line[len("HEAVY="):])
+    return best, loaded, returncode
+
+def main():
+    parser = argparse.ArgumentParser(description="pipsentry cold-start benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    interpreter = min(_time([sys.executable, "-c", "pass"]) for _ in range(args.repeats))
+    print(f"{'bare interpreter':<14} {interpreter:>7.3f} s")
+    failed = False
+    for command, (target, allowed) in TARGETS.items():
+        seconds, loaded, returncode = cold_start([command], args.repeats)
+        unexpected = [module for module in loaded if module not in allowed]
+        # A command that crashes straight away is fast, not a pass
+        ok = returncode == 0 and seconds <= target and not unexpected
+        failed |= not ok
+        print(f"{command:<14} {seconds:>7.3f} s  target {target:.2f} s  imports {loaded or '-'}  "
+              f"{'ok' if ok else 'MISSED'}{' (unexpected ' + ', '.join(unexpected) + ')' if unexpected else ''}"
+              f"{f' (exit {returncode})' if returncode else ''}")
+    sys.exit(1 if failed else 0)
+
+def _time(command):
+    start = time.perf_counter()
+    subprocess.run(command, check=True)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    main()
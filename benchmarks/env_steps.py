@@ -0,0 +1,63 @@
+# Steps/sec benchmark: array-backed ForexEnv vs the original DataFrame.iloc access path
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+from environments.forex_env import ForexEnv
+from data.preprocessor import load_forex_data
+
+class IlocForexEnv(ForexEnv):
+    """ForexEnv with the pre-array market data access (iloc row lookups per step)."""
+
+    def step(self, action):
+        # Touch the frame the way the original step did, then reuse the shared logic
+        self.data.iloc[self.current_step]["close"]
+        if self.current_step + 1 < len(self.data):
+            self.data.iloc[self.current_step + 1]["close"]
+        return super().step(action)
+
+    def _get_state(self):
+        row = self.data.iloc[self.current_step]
+        state = np.array([
+            row["open"], row["high"], row["low"], row["close"],
+            row["rsi"], row["macd"], row["signal"], row["atr"],
+            self.balance / self.initial_balance, self.position
+        ], dtype=np.float32)
+        state[0:4] = (state[0:4] - 1.0) / 0.2
+        state[4] /= 100.0
+        state[5:7] /= 0.01
+        state[7] /= 0.001
+        state[9] = (state[9] + 1) / 2
+        return state
+
+def measure_steps_per_sec(env_class, data, n_steps, seed=0):
+    """Run n_steps random actions (resetting on done) and return steps per second."""
+    env = env_class(data=data, max_drawdown=1.0, daily_loss_limit=1.0)
+    actions = np.random.default_rng(seed).integers(0, 3, size=n_steps)
+    env.reset()
+    # ForexEnv prints on trades; keep terminal I/O out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for action in actions:
+            _, _, done, _, _ = env.step(int(action))
+            if done:
+                env.reset()
+        elapsed = time.perf_counter() - start
+    return n_steps / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="ForexEnv steps/sec benchmark")
+    parser.add_argument("--steps", type=int, default=50000)
+    args = parser.parse_args()
+
+    data = load_forex_data()
+    print(f"Benchmarking on {len(data)} rows, {args.steps} steps per path")
+    iloc_sps = measure_steps_per_sec(IlocForexEnv, data, args.steps)
+    array_sps = measure_steps_per_sec(ForexEnv, data, args.steps)
+    print(f"iloc path:  {iloc_sps:>12,.0f} steps/sec")
+    print(f"array path: {array_sps:>12,.0f} steps/sec")
+    print(f"speedup:    {array_sps / iloc_sps:>12.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# Benchmark suite for the env, data, agent and backtest hot paths on synthetic data
+#
+#   python -m benchmarks.suite --rows 20000                # time every case, save JSON
+#   python -m benchmarks.suite --only env_step --profile   # also write a cProfile .prof
+#   python -m benchmarks.suite --compare benchmarks/results/<old>.json
+import argparse
+import contextlib
+import cProfile
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import synthetic_ohlc, write_dukascopy_csv
+from data.preprocessor import preprocess_data
+from utils.config import load_config
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+PROFILES_DIR = os.path.join("benchmarks", "profiles")
+
+# name -> (setup(ctx) returning a zero-argument callable, calls per repeat)
+CASES = {}
+
+def case(name, number=1):
+    """Register a benchmark case; the decorated setup returns the callable to time."""
+    def register(setup):
+        CASES[name] = (setup, number)
+        return setup
+    return register
+
+class Context:
+    """Synthetic data shared by the cases, built once per run in a scratch directory."""
+
+    def __init__(self, rows, seed=0):
+        self.rows = rows
+        self.seed = seed
+        # End the data about a quarter past 2025-01-01, where run_backtest() splits off its test set
+        start = pd.Timestamp("2025-01-01") - pd.Timedelta(hours=int(rows * 0.75 * 7 / 5))
+        self.ohlc = synthetic_ohlc(rows, seed, start=start.floor("D"))
+        self.data = preprocess_data(self.ohlc.copy())
+        self.config = load_config()
+        self.workdir = tempfile.mkdtemp(prefix="pipsentry_bench_")
+        self.data_dir = os.path.join(self.workdir, "data")
+        write_dukascopy_csv(self.ohlc, self.data_dir)
+
+    def env(self):
+        from environments.forex_env import ForexEnv
+        # Loose limits so random actions do not end episodes early
+        return ForexEnv(data=self.data, max_drawdown=1.0, daily_loss_limit=1.0)
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+@case("env_reset", number=100)
+def bench_env_reset(ctx):
+    env = ctx.env()
+    return env.reset
+
+@case("env_get_state", number=10000)
+def bench_get_state(ctx):
+    env = ctx.env()
+    env.reset()
+    return env._get_state
+
+@case("env_step", number=1)
+def bench_env_step(ctx):
+    """One full pass of random actions over the frame; ops/sec is per pass, not per step."""
+    env = ctx.env()
+    actions = np.random.default_rng(ctx.seed).integers(0, 3, size=len(ctx.data)).tolist()
+
+    def run():
+        env.reset()
+        for action in actions:
+            _, _, done, _, _ = env.step(action)
+            if done:
+                env.reset()
+    return run
+
+def _portfolio_pass(ctx, n_pairs):
+    """One pass over the frame with n_pairs copies of the synthetic data (different seeds) in a PortfolioEnv."""
+    from environments.pair_specific_env import PortfolioEnv
+    data = {"EURUSD": ctx.data}
+    for k in range(1, n_pairs):
+        data[f"X{k:02d}USD"] = preprocess_data(synthetic_ohlc(ctx.rows, ctx.seed + k, start=ctx.ohlc.index[0]))
+    env = PortfolioEnv(data, max_drawdown=1.0, daily_loss_limit=1.0)
+    actions = np.random.default_rng(ctx.seed).integers(0, 3, size=(len(ctx.data), n_pairs))
+
+    def run():
+        env.reset()
+        for action in actions:
+            _, _, done, _, _ = env.step(action)
+            if done:
+                env.reset()
+    return run
+
+@case("portfolio_step_1")
+def bench_portfolio_step_1(ctx):
+    return _portfolio_pass(ctx, 1)
+
+@case("portfolio_step_20")
+def bench_portfolio_step_20(ctx):
+    return _portfolio_pass(ctx, 20)
+
+@case("preprocess_data")
+def bench_preprocess(ctx):
+    return lambda: preprocess_data(ctx.ohlc.copy())
+
+@case("fetch_forex_data")
+def bench_fetch(ctx):
+    from data.data_fetcher import fetch_forex_data
+    return lambda: fetch_forex_data(start_date="2000-01-01", end_date="2100-01-01", data_dir=ctx.data_dir)
+
+@case("ppo_predict", number=1000)
+def bench_ppo_predict(ctx):
+    from agents.ppo_agent import PPOAgent
+    env = ctx.env()
+    agent = PPOAgent(env, verbose=0)  # Untrained policy: same forward pass as a trained one
+    state, _ = env.reset()
+    return lambda: agent.predict(state, deterministic=True)
+
+def _backtest(ctx, vectorized):
+    from backtest import run_backtest
+
+    def run():
+        # run_backtest writes its reports and event log relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(ctx.workdir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_backtest(use_rule_based=True, vectorized=vectorized, data=ctx.data, config=ctx.config, plot=False)
+        finally:
+            os.chdir(cwd)
+    return run
+
+@case("run_backtest")
+def bench_run_backtest(ctx):
+    return _backtest(ctx, vectorized=False)
+
+@case("run_backtest_vectorized")
+def bench_run_backtest_vectorized(ctx):
+    return _backtest(ctx, vectorized=True)
+
+def time_case(fn, number, repeats):
+    """
+    Time fn over repeats x number calls, after one warm-up call.
+    Returns:
+        dict: Per-call seconds (mean, min, max, stdev) and ops_per_sec from the best repeat.
+    """
+    fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "mean": statistics.fmean(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeats": repeats,
+        "ops_per_sec": 1.0 / min(samples)
+    }
+
+def profile_case(name, fn, number):
+    """Write a cProfile dump of number calls (view with snakeviz, or flameprof/gprof2dot for a flamegraph)."""
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    path = os.path.join(PROFILES_DIR, f"{name}.prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(number):
+        fn()
+    profiler.disable()
+    profiler.dump_stats(path)
+    return path
+
+def py_spy_case(name, rows, repeats):
+    """Sample this suite's run of one case with py-spy into an SVG flamegraph, if py-spy is installed."""
+    if shutil.which("py-spy") is None:
+        print("py-spy not found on PATH; skipping the flamegraph")
+        return None
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    path = os.path.join(PROFILES_DIR, f"{name}.svg")
+    subprocess.run([
+        "py-spy", "record", "--format", "flamegraph", "-o", path, "--",
+        sys.executable, "-m", "benchmarks.suite", "--only", name, "--rows", str(rows),
+        "--repeats", str(repeats), "--no-save"
+    ], check=True)
+    return path
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def metadata(rows, seed):
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "rows": rows,
+        "seed": seed,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def compare(results, baseline_path):
+    """Print per-case best-time ratios against an earlier results file (>1 means faster now)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {baseline_path} (commit {baseline['meta'].get('commit')}, {baseline['meta'].get('rows')} rows)")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<26} new case")
+            continue
+        print(f"{name:<26} {old['min'] * 1000:>12.3f} ms -> {result['min'] * 1000:>12.3f} ms  "
+              f"{old['min'] / result['min']:>6.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="PipSentry benchmark suite")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic bars per dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="Cases to run (default: all)")
+    parser.add_argument("--profile", action="store_true", help="Write cProfile dumps to benchmarks/profiles")
+    parser.add_argument("--py-spy", action="store_true", help="Write py-spy SVG flamegraphs to benchmarks/profiles")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/<timestamp>_<commit>.json)")
+    parser.add_argument("--no-save", action="store_true", help="Do not write a results JSON")
+    args = parser.parse_args()
+
+    names = args.only or list(CASES)
+    ctx = Context(args.rows, args.seed)
+    print(f"Benchmarking {len(names)} cases on {len(ctx.data)} synthetic bars, {args.repeats} repeats")
+    results = {}
+    try:
+        for name in names:
+            setup, number = CASES[name]
+            fn = setup(ctx)
+            results[name] = time_case(fn, number, args.repeats)
+            print(f"{name:<26} {results[name]['min'] * 1000:>12.3f} ms/call  "
+                  f"(mean {results[name]['mean'] * 1000:.3f}, {results[name]['ops_per_sec']:,.1f} ops/sec)")
+            if args.profile:
+                print(f"  profile: {profile_case(name, fn, number)}")
+            if args.py_spy:
+                py_spy_case(name, args.rows, args.repeats)
+    finally:
+        ctx.cleanup()
+
+    meta = metadata(args.rows, args.seed)
+    if not args.no_save:
+        path = args.output or os.path.join(
+            RESULTS_DIR, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{meta['commit']}.json"
+        )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Saved results to {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Synthetic EURUSD-like bars for benchmarks, in any size and without the Dukascopy export
+import os
+import numpy as np
+import pandas as pd
+from data.preprocessor import preprocess_data
+
+def synthetic_ohlc(n_rows=20000, seed=0, start="2023-01-02", freq="1h"):
+    """
+    Random-walk OHLC bars around 1.10, on weekdays only like the real feed.
+    Args:
+        n_rows (int): Number of bars.
+        seed (int): RNG seed; the same seed gives the same frame.
+        start (str): First bar time.
+        freq (str): Bar length.
+    Returns:
+        pd.DataFrame: open, high, low, close indexed by naive timestamps.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_rows * 7 // 5 + 48, freq=freq)
+    index = index[index.dayofweek < 5][:n_rows]
+    close = 1.10 * np.exp(np.cumsum(rng.normal(0.0, 0.0012, n_rows)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wick = np.abs(rng.normal(0.0, 0.0006, (2, n_rows))) * close
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + wick[0],
+        "low": np.minimum(open_, close) - wick[1],
+        "close": close
+    }, index=pd.DatetimeIndex(index, name="timestamp"))
+
+def synthetic_frame(n_rows=20000, seed=0, start="2023-01-02", freq="1h"):
+    """Preprocessed synthetic bars (indicators added, warm-up rows dropped)."""
+    return preprocess_data(synthetic_ohlc(n_rows, seed, start, freq))
+
+def write_dukascopy_csv(df, data_dir, pair="EURUSD", timeframe="1H"):
+    """
+    Write bars in the Dukascopy export layout fetch_forex_data() reads.
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{pair}_{timeframe}_2023_2025.csv")
+    export = pd.DataFrame({
+        "Local time": df.index.strftime("%d.%m.%Y %H:%M:%S.000") + " GMT+0530",
+        "Open": df["open"].to_numpy(),
+        "High": df["high"].to_numpy(),
+        "Low": df["low"].to_numpy(),
+        "Close": df["close"].to_numpy(),
+        "Volume": np.full(len(df), 1000.0)
+    })
+    export.to_csv(path, index=False, float_format="%.5f")
+    return path
@@ -0,0 +1,103 @@
+# On-disk columnar cache for preprocessed data (memory-mapped .npy per column)
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache")
+
+def file_digest(path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    SHA-256 of a source file's contents.
+
+    Digests are remembered per (path, size, mtime) in cache_dir/digests.json so an
+    unchanged multi-GB export is not rehashed on every load. The index is replaced atomically,
+    and one that cannot be read is treated as empty.
+    """
+    stat = os.stat(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    index_path = os.path.join(cache_dir, "digests.json")
+    key = os.path.abspath(path)
+    index = _read_digests(index_path)
+    entry = index.get(key)
+    if entry and entry.get("stamp") == stamp:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    index[key] = {"stamp": stamp, "sha256": digest.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    # Concurrent loaders each write their own temp file; the last replace wins and readers never see a partial file
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+    return index[key]["sha256"]
+
+def _read_digests(index_path):
+    """The digest index, or {} when it is missing or unreadable (it is only a cache)."""
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+def cache_key(source_digest, start_date, end_date, indicators):
+    """Key for one cached frame: source contents, date range and indicator set."""
+    payload = json.dumps([source_digest, str(start_date), str(end_date), list(indicators)])
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+def save_frame(df, path):
+    """Write a DatetimeIndex-ed numeric frame as one .npy per column plus meta.json."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, "index.npy"), df.index.values.astype("datetime64[ns]"))
+    for i, column in enumerate(df.columns):
+        np.save(os.path.join(tmp_path, f"col{i}.npy"), np.ascontiguousarray(df[column].to_numpy()))
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump({"columns": list(df.columns), "index_name": df.index.name}, f)
+    # Swap in complete entries only, so a crash mid-write never leaves a half-written cache.
+    # Keys are content hashes, so an entry another process swapped in first is kept as is.
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def load_frame(path):
+    """Open a cached frame with every column memory-mapped (copy-on-write) instead of read into RAM."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    index = pd.DatetimeIndex(np.load(os.path.join(path, "index.npy"), mmap_mode="r"), name=meta["index_name"])
+    columns = {
+        column: np.load(os.path.join(path, f"col{i}.npy"), mmap_mode="c")
+        for i, column in enumerate(meta["columns"])
+    }
+    return pd.DataFrame(columns, index=index, copy=False)
+
+def cached_frame(source_path, start_date, end_date, indicators, build, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Return build() from the cache, computing and storing it on a miss.
+    Args:
+        source_path (str): File the frame is derived from; editing it invalidates the entry.
+        start_date (str): Start of the date range.
+        end_date (str): End of the date range.
+        indicators (list): Names/params of the indicators build() adds.
+        build (callable): Produces the frame on a cache miss.
+        cache_dir (str): Cache root.
+    Returns:
+        pd.DataFrame: Memory-mapped cached frame.
+    """
+    key = cache_key(file_digest(source_path, cache_dir), start_date, end_date, indicators)
+    path = os.path.join(cache_dir, key)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        save_frame(build(), path)
+    return load_frame(path)
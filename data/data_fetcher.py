@@ -1,7 +1,30 @@
 # Fetch forex data (e.g., MetaTrader, Dukascopy)
+import glob
 import pandas as pd
+import numpy as np
 import os
 
+# Dukascopy exports are stamped in local time; timestamps are kept as naive wall-clock time in this zone
+DATA_TIMEZONE = "Asia/Kolkata"
+
+# Timeframe names used in file names and config -> pandas resample rule
+TIMEFRAMES = {
+    "M1": "1min", "M5": "5min", "M15": "15min", "M30": "30min",
+    "1H": "1h", "H1": "1h", "4H": "4h", "H4": "4h", "1D": "1D", "D1": "1D"
+}
+
+def find_data_files(pair, timeframe, data_dir="data"):
+    """All exports named {pair}_{timeframe}_*.csv in data_dir, in chronological (name) order."""
+    return sorted(glob.glob(os.path.join(data_dir, f"{pair}_{timeframe}_*.csv")))
+
+def forex_data_path(pair="EURUSD", timeframe="1H", data_dir="data"):
+    """Path of the CSV export for a pair and timeframe."""
+    legacy_path = os.path.join(data_dir, f"{pair}_{timeframe}_2023_2025.csv")
+    files = find_data_files(pair, timeframe, data_dir)
+    if os.path.exists(legacy_path) or not files:
+        return legacy_path
+    return files[-1]
+
 def fetch_forex_data(pair="EURUSD", timeframe="1H", start_date="2023-01-01", end_date="2025-04-12", data_dir="data"):
     """
     Fetch EUR/USD 1H data from CSV file.
@@ -14,8 +37,7 @@ def fetch_forex_data(pair="EURUSD", timeframe="1H", start_date="2023-01-01", end
     Returns:
         pd.DataFrame: OHLC data.
     """
-    file_name = f"{pair}_{timeframe}_2023_2025.csv"
-    file_path = os.path.join(data_dir, file_name)
+    file_path = forex_data_path(pair, timeframe, data_dir)
     
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Data file {file_path} not found. Download from Dukascopy or update path.")
@@ -26,8 +48,8 @@ def fetch_forex_data(pair="EURUSD", timeframe="1H", start_date="2023-01-01", end
     # Rename columns to match expected format
     df.columns = ["timestamp", "open", "high", "low", "close", "volume"]
     
-    # Convert timestamp to datetime (already IST, just parse)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%d.%m.%Y %H:%M:%S.000 GMT+0530")
+    # Convert timestamp to datetime (naive IST wall-clock time)
+    df["timestamp"] = parse_timestamps(df["timestamp"])
     
     # Filter date range
     df = df[(df["timestamp"] >= start_date) & (df["timestamp"] <= end_date)]
@@ -38,6 +60,169 @@ def fetch_forex_data(pair="EURUSD", timeframe="1H", start_date="2023-01-01", end
     
     return df
 
+def _digits(raw, start, stop):
+    """Integer value of the ASCII digit columns raw[:, start:stop]."""
+    value = np.zeros(len(raw), dtype=np.int64)
+    for i in range(start, stop):
+        value = value * 10 + (raw[:, i].astype(np.int64) - 48)
+    return value
+
+def parse_timestamps(values, tz=DATA_TIMEZONE):
+    """Parse Dukascopy "dd.mm.YYYY HH:MM:SS.fff GMT+hhmm" stamps into naive wall-clock time in tz."""
+    values = pd.Series(values)
+    width = len(values.iloc[0])
+    raw = np.asarray(values.to_numpy(), dtype=f"S{width}").view(np.uint8).reshape(-1, width)
+    if width == 32 and (values.str.len() == width).all() and (raw[:, 23:] == raw[0, 23:]).all():
+        # Fixed-width stamps with one UTC offset: read the digits straight out of the bytes,
+        # which is an order of magnitude faster than strptime on multi-million-row M1 exports
+        months = (_digits(raw, 6, 10) - 1970) * 12 + _digits(raw, 3, 5) - 1
+        days = months.astype("datetime64[M]").astype("datetime64[D]") + (_digits(raw, 0, 2) - 1)
+        seconds = _digits(raw, 11, 13) * 3600 + _digits(raw, 14, 16) * 60 + _digits(raw, 17, 19)
+        local = days.astype("datetime64[ns]") + seconds * np.timedelta64(1, "s") + _digits(raw, 20, 23) * np.timedelta64(1, "ms")
+        sign = -1 if raw[0, 27] == ord("-") else 1
+        offset = sign * (_digits(raw[:1], 28, 30)[0] * 60 + _digits(raw[:1], 30, 32)[0])
+        utc = pd.Series(local - offset * np.timedelta64(1, "m"))
+    else:
+        utc = pd.to_datetime(values, format="%d.%m.%Y %H:%M:%S.%f GMT%z", utc=True).dt.tz_localize(None)
+    return utc.dt.tz_localize("UTC").dt.tz_convert(tz).dt.tz_localize(None)
+
+def iter_price_chunks(file_path, start_date=None, end_date=None, chunksize=500000, tz=DATA_TIMEZONE):
+    """
+    Stream a Dukascopy bar or tick export as OHLC chunks with bounded memory.
+
+    Bar exports (Open/High/Low/Close columns) are passed through; tick exports (Ask/Bid)
+    become one-tick bars at the mid price so they resample like bars.
+    Yields:
+        pd.DataFrame: Timestamp-indexed open/high/low/close chunk.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    is_tick = "Ask" in header and "Bid" in header
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        stamps = parse_timestamps(chunk.iloc[:, 0], tz)
+        if is_tick:
+            mid = ((chunk["Ask"] + chunk["Bid"]) / 2).to_numpy()
+            prices = {"open": mid, "high": mid, "low": mid, "close": mid}
+        else:
+            prices = {name.lower(): chunk[name].to_numpy() for name in ["Open", "High", "Low", "Close"]}
+        frame = pd.DataFrame(prices, index=pd.DatetimeIndex(stamps, name="timestamp"))
+        if start_date is not None:
+            frame = frame[frame.index >= start_date]
+        if end_date is not None:
+            frame = frame[frame.index <= end_date]
+        if len(frame):
+            yield frame
+
+def bar_start(times, rule, tz=DATA_TIMEZONE):
+    """
+    Start of the bar each naive wall-clock time in tz falls in, as naive time in tz.
+
+    Bars are floored in UTC, so a 1H bar starts on the UTC hour (HH:30 in Asia/Kolkata, like
+    the Dukascopy 1H export) and 4H/1D bars on UTC boundaries rather than local midnight.
+    Works on a DatetimeIndex or a single Timestamp.
+    """
+    utc = times.tz_localize(tz, ambiguous=False, nonexistent="shift_forward").tz_convert("UTC")
+    return utc.floor(rule).tz_convert(tz).tz_localize(None)
+
+class BarResampler:
+    """Incrementally resample time-ordered OHLC chunks, carrying the open bar across chunk edges."""
+
+    def __init__(self, timeframe, tz=DATA_TIMEZONE):
+        self.rule = TIMEFRAMES.get(timeframe, timeframe)
+        self.tz = tz
+        self._bars = []
+        self._pending = None
+
+    def add(self, chunk):
+        bars = chunk.groupby(bar_start(chunk.index, self.rule, self.tz)).agg(
+            {"open": "first", "high": "max", "low": "min", "close": "last"}
+        )
+        if self._pending is not None:
+            if bars.index[0] == self._pending.index[0]:
+                # The bar spanning the chunk boundary: merge the two halves
+                bars.iloc[0, 0] = self._pending.iloc[0, 0]
+                bars.iloc[0, 1] = max(bars.iloc[0, 1], self._pending.iloc[0, 1])
+                bars.iloc[0, 2] = min(bars.iloc[0, 2], self._pending.iloc[0, 2])
+            else:
+                self._bars.append(self._pending)
+        self._bars.append(bars.iloc[:-1])
+        self._pending = bars.iloc[-1:]
+
+    def finish(self):
+        """All completed bars plus the last (possibly partial) one."""
+        parts = self._bars + ([self._pending] if self._pending is not None else [])
+        if not parts:
+            return pd.DataFrame(columns=["open", "high", "low", "close"], dtype=float)
+        bars = pd.concat(parts)
+        # Overlapping export files repeat bars; the later file wins
+        if not bars.index.is_monotonic_increasing or bars.index.has_duplicates:
+            bars = bars[~bars.index.duplicated(keep="last")].sort_index(kind="stable")
+        return bars
+
+def load_pairs(pairs, timeframes, source_timeframe="M1", start_date=None, end_date=None,
+               data_dir="data", chunksize=500000, tz=DATA_TIMEZONE):
+    """
+    Load several pairs from raw exports and resample them to several timeframes in one pass.
+
+    Each pair's {pair}_{source_timeframe}_*.csv files are streamed chunk by chunk, so memory
+    is bounded by chunksize plus the resampled output rather than the raw history.
+    Args:
+        pairs (list): Currency pairs, e.g. ["EURUSD", "GBPUSD"].
+        timeframes (list): Target timeframes, e.g. ["1H", "4H"].
+        source_timeframe (str): Timeframe tag of the raw files (e.g. "M1" or "TICK").
+        start_date (str): Start date in YYYY-MM-DD.
+        end_date (str): End date in YYYY-MM-DD.
+        data_dir (str): Directory where the exports are stored.
+        chunksize (int): CSV rows parsed at a time.
+        tz (str): Timezone of the returned naive timestamps.
+    Returns:
+        dict: timeframe -> {"index": DatetimeIndex, "pairs": list,
+              "open"/"high"/"low"/"close": (len(index), len(pairs)) float64 arrays}.
+    """
+    per_pair = {timeframe: {} for timeframe in timeframes}
+    for pair in pairs:
+        files = find_data_files(pair, source_timeframe, data_dir)
+        if not files:
+            raise FileNotFoundError(f"No {pair}_{source_timeframe}_*.csv files in {data_dir}. Download from Dukascopy or update path.")
+        resamplers = {timeframe: BarResampler(timeframe, tz) for timeframe in timeframes}
+        for file_path in files:
+            for chunk in iter_price_chunks(file_path, start_date, end_date, chunksize, tz):
+                for resampler in resamplers.values():
+                    resampler.add(chunk)
+        for timeframe, resampler in resamplers.items():
+            per_pair[timeframe][pair] = resampler.finish()
+
+    aligned = {}
+    for timeframe, frames in per_pair.items():
+        aligned[timeframe] = align_pairs(frames, pairs)
+    return aligned
+
+def align_pairs(frames, pairs):
+    """
+    Put per-pair OHLC frames on one timestamp index.
+
+    Bars missing for a pair are flat bars at its previous close; the index starts where
+    every pair has data so the arrays contain no NaNs.
+    """
+    index = frames[pairs[0]].index
+    for pair in pairs[1:]:
+        index = index.union(frames[pair].index)
+    keep = index >= max(frames[pair].index[0] for pair in pairs)
+    result = {"index": index[keep], "pairs": list(pairs)}
+    closes = np.column_stack([frames[pair]["close"].reindex(index).ffill().to_numpy()[keep] for pair in pairs])
+    for column in ["open", "high", "low"]:
+        values = np.column_stack([frames[pair][column].reindex(index).to_numpy()[keep] for pair in pairs])
+        result[column] = np.where(np.isnan(values), closes, values)
+    result["close"] = closes
+    return result
+
+def pair_frame(bars, pair):
+    """One pair's OHLC DataFrame out of load_pairs() output, ready for preprocess_data."""
+    k = bars["pairs"].index(pair)
+    return pd.DataFrame(
+        {column: bars[column][:, k] for column in ["open", "high", "low", "close"]},
+        index=bars["index"]
+    )
+
 if __name__ == "__main__":
     try:
         data = fetch_forex_data()
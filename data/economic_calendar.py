@@ -1 +1,156 @@
 # News event filtering
+import glob
+import json
+import os
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from data.data_fetcher import DATA_TIMEZONE, TIMEFRAMES
+
+# Accepted spellings of the event file columns (Forex Factory exports use date/country)
+COLUMN_ALIASES = {
+    "time": ["time", "datetime", "date", "timestamp"],
+    "currency": ["currency", "country", "ccy"],
+    "impact": ["impact", "importance"],
+    "title": ["title", "event", "name"]
+}
+
+def _read_event_file(path):
+    if path.endswith(".json"):
+        with open(path) as f:
+            records = json.load(f)
+        frame = pd.DataFrame(records.get("events", records) if isinstance(records, dict) else records)
+    else:
+        frame = pd.read_csv(path)
+    columns = {}
+    lower = {column.lower(): column for column in frame.columns}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lower:
+                columns[lower[alias]] = name
+                break
+    if "time" not in columns.values() or "currency" not in columns.values():
+        raise ValueError(f"{path} needs a time and a currency column")
+    return frame.rename(columns=columns)[list(columns.values())]
+
+def _to_data_time(values, timezone):
+    """Parse event times and convert them to naive wall-clock time in DATA_TIMEZONE, like the bars."""
+    parsed = [pd.Timestamp(value) for value in values]
+    converted = [
+        (stamp if stamp.tzinfo is not None else stamp.tz_localize(timezone)).tz_convert(DATA_TIMEZONE).tz_localize(None)
+        for stamp in parsed
+    ]
+    return pd.DatetimeIndex(converted)
+
+def load_events(paths, timezone="UTC", impacts=("high",)):
+    """
+    Load events from CSV/JSON files (paths or glob patterns).
+    Args:
+        paths (list): Files or glob patterns.
+        timezone (str): Timezone of timestamps that carry no UTC offset.
+        impacts (tuple): Impact levels to keep (case-insensitive), None for all.
+    Returns:
+        pd.DataFrame: time (naive, DATA_TIMEZONE), currency, impact, title; sorted by time.
+    """
+    files = sorted({match for pattern in paths for match in (glob.glob(pattern) or [pattern])})
+    frames = [_read_event_file(path) for path in files if os.path.exists(path)]
+    if not frames:
+        return pd.DataFrame({"time": pd.DatetimeIndex([]), "currency": [], "impact": [], "title": []})
+    events = pd.concat(frames, ignore_index=True)
+    for column in ["impact", "title"]:
+        if column not in events:
+            events[column] = ""
+    events["currency"] = events["currency"].astype(str).str.upper().str.strip()
+    events["impact"] = events["impact"].astype(str).str.lower().str.strip()
+    if impacts is not None:
+        events = events[events["impact"].isin([impact.lower() for impact in impacts])]
+    events["time"] = _to_data_time(events["time"], timezone)
+    return events.sort_values("time", kind="stable").reset_index(drop=True)
+
+def merge_intervals(starts, ends):
+    """Sort and merge overlapping [start, end) intervals (int64 arrays)."""
+    if len(starts) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    # A new interval begins where a start lies past everything reached so far
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = starts[1:] > reach[:-1]
+    last = np.concatenate((np.flatnonzero(new)[1:] - 1, [len(starts) - 1]))
+    return starts[new], reach[last]
+
+class EconomicCalendar:
+    """
+    Blackout windows around news events, indexed per currency.
+
+    Each event blocks [time - before, time + after). Windows are merged per currency into sorted,
+    disjoint intervals, so a timestamp lookup is one bisect and a whole bar index is one
+    searchsorted.
+    Args:
+        events (pd.DataFrame): Output of load_events().
+        before (pd.Timedelta): Blackout before each event.
+        after (pd.Timedelta): Blackout after each event.
+    """
+
+    def __init__(self, events, before=pd.Timedelta(minutes=30), after=pd.Timedelta(minutes=30)):
+        self.events = events
+        self.before = pd.Timedelta(before)
+        self.after = pd.Timedelta(after)
+        times = np.asarray(events["time"], dtype="datetime64[ns]").astype(np.int64)
+        currencies = events["currency"].to_numpy()
+        self._intervals = {}
+        for currency in np.unique(currencies):
+            at = times[currencies == currency]
+            self._intervals[currency] = merge_intervals(at - self.before.value, at + self.after.value)
+        self._pairs = {}
+
+    def intervals(self, pair):
+        """Merged (starts, ends) ns arrays for both currencies of a pair such as "EURUSD"."""
+        if pair not in self._pairs:
+            empty = np.array([], dtype=np.int64)
+            parts = [self._intervals.get(currency, (empty, empty)) for currency in (pair[:3], pair[3:6])]
+            self._pairs[pair] = merge_intervals(
+                np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts])
+            )
+        return self._pairs[pair]
+
+    def is_blackout(self, pair, timestamp):
+        """True if timestamp (naive, DATA_TIMEZONE) falls inside a news window for pair."""
+        starts, ends = self.intervals(pair)
+        value = pd.Timestamp(timestamp).value
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and value < ends[i]
+
+    def mask(self, index, pair, bar_length=pd.Timedelta(0)):
+        """
+        Blackout flag per bar: True where [bar time, bar time + bar_length) overlaps a window.
+        Returns:
+            np.ndarray: bool array aligned with index.
+        """
+        starts, ends = self.intervals(pair)
+        times = np.asarray(index, dtype="datetime64[ns]").astype(np.int64)
+        # Last window starting before the bar ends; the bar overlaps it if it ends after the bar starts
+        i = np.searchsorted(starts, times + max(pd.Timedelta(bar_length).value, 1), side="left") - 1
+        blocked = np.zeros(len(times), dtype=bool)
+        hit = i >= 0
+        blocked[hit] = ends[i[hit]] > times[hit]
+        return blocked
+
+def load_calendar(config):
+    """EconomicCalendar from the news section of config, None when the filter is disabled."""
+    news = config.get("news", {})
+    if not news.get("enabled", False):
+        return None
+    events = load_events(news["files"], timezone=news.get("timezone", "UTC"), impacts=news.get("impacts", ["high"]))
+    return EconomicCalendar(
+        events, before=pd.Timedelta(minutes=news.get("before_minutes", 30)),
+        after=pd.Timedelta(minutes=news.get("after_minutes", 30))
+    )
+
+def add_news_mask(df, calendar, pair, timeframe="1H"):
+    """Add the news_blackout column ForexEnv and the vectorized engine read to block new positions."""
+    bar_length = pd.Timedelta(to_offset(TIMEFRAMES.get(timeframe, timeframe)))
+    df["news_blackout"] = calendar.mask(df.index, pair, bar_length)
+    return df
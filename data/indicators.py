@@ -0,0 +1,187 @@
+# Incremental (O(1) per bar) indicators matching the TA-Lib calls in preprocess_data
+from collections import deque
+import math
+import numpy as np
+import pandas as pd
+
+NAN = float("nan")
+
+class SMA:
+    """Simple moving average with TA-Lib's running-sum arithmetic."""
+
+    def __init__(self, period):
+        self.period = period
+        self.value = NAN
+        self._window = deque()
+        self._total = 0.0
+
+    def update(self, x):
+        self._total += x
+        self._window.append(x)
+        if len(self._window) == self.period:
+            self.value = self._total / self.period
+            self._total -= self._window.popleft()
+        return self.value
+
+class EMA:
+    """Exponential moving average seeded with the SMA of its first period values, as TA-Lib does."""
+
+    def __init__(self, period):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.value = NAN
+        self._count = 0
+        self._total = 0.0
+
+    def seed(self, value):
+        """Start from an externally computed seed (used to align MACD's fast EMA)."""
+        self.value = value
+        self._count = self.period
+
+    def update(self, x):
+        if self._count < self.period:
+            self._total += x
+            self._count += 1
+            if self._count == self.period:
+                self.value = self._total / self.period
+            return self.value
+        self.value = ((x - self.value) * self.k) + self.value
+        return self.value
+
+class RSI:
+    """Wilder RSI: average gain/loss seeded over the first period changes, then smoothed."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = NAN
+        self._prev = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def update(self, x):
+        if self._prev is None:
+            self._prev = x
+            return self.value
+        change = x - self._prev
+        self._prev = x
+        if self._count < self.period:
+            if change < 0:
+                self._loss -= change
+            else:
+                self._gain += change
+            self._count += 1
+            if self._count < self.period:
+                return self.value
+            self._loss /= self.period
+            self._gain /= self.period
+        else:
+            self._loss *= self.period - 1
+            self._gain *= self.period - 1
+            if change < 0:
+                self._loss -= change
+            else:
+                self._gain += change
+            self._loss /= self.period
+            self._gain /= self.period
+        total = self._gain + self._loss
+        self.value = 100.0 * (self._gain / total) if abs(total) >= 1e-8 else 0.0
+        return self.value
+
+class MACD:
+    """
+    MACD line and signal with TA-Lib's alignment.
+
+    TA-Lib seeds the fast EMA on the fast-period window ending where the slow EMA starts,
+    not at bar fast - 1, so the last fast-period closes are kept until then.
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.macd_value = NAN
+        self.signal_value = NAN
+        self._recent = deque(maxlen=fast)
+
+    def update(self, x):
+        if math.isnan(self.slow.value):
+            self._recent.append(x)
+            self.slow.update(x)
+            if math.isnan(self.slow.value):
+                return self.macd_value, self.signal_value
+            total = 0.0
+            for value in self._recent:
+                total += value
+            self.fast.seed(total / self.fast.period)
+            self._recent.clear()
+        else:
+            self.fast.update(x)
+            self.slow.update(x)
+        macd = self.fast.value - self.slow.value
+        self.signal.update(macd)
+        # Like TA-Lib, nothing is reported until the signal line exists
+        if not math.isnan(self.signal.value):
+            self.macd_value = macd
+            self.signal_value = self.signal.value
+        return self.macd_value, self.signal_value
+
+class ATR:
+    """Wilder ATR: mean of the first period true ranges, then smoothed."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = NAN
+        self._prev_close = None
+        self._tr = SMA(period)
+
+    def update(self, high, low, close):
+        prev_close = self._prev_close
+        self._prev_close = close
+        if prev_close is None:
+            return self.value
+        tr = max(high - low, abs(prev_close - high), abs(prev_close - low))
+        if math.isnan(self.value):
+            self.value = self._tr.update(tr)
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+class IndicatorEngine:
+    """The preprocess_data indicator set, updated one bar at a time."""
+
+    COLUMNS = ["sma20", "sma50", "rsi", "macd", "signal", "atr"]
+
+    def __init__(self):
+        self.sma20 = SMA(20)
+        self.sma50 = SMA(50)
+        self.rsi = RSI(14)
+        self.macd = MACD(12, 26, 9)
+        self.atr = ATR(14)
+
+    def update(self, open_, high, low, close):
+        """Feed one bar and return the indicator values after it (NaN while warming up)."""
+        macd, signal = self.macd.update(close)
+        return {
+            "sma20": self.sma20.update(close),
+            "sma50": self.sma50.update(close),
+            "rsi": self.rsi.update(close),
+            "macd": macd,
+            "signal": signal,
+            "atr": self.atr.update(high, low, close)
+        }
+
+    def ready(self):
+        """True once every indicator has a value (the rows preprocess_data keeps)."""
+        return not any(math.isnan(value) for value in (
+            self.sma20.value, self.sma50.value, self.rsi.value, self.macd.signal_value, self.atr.value
+        ))
+
+    def run(self, df):
+        """Batch mode: feed every row of an OHLC frame and return the indicator columns."""
+        out = np.full((len(df), len(self.COLUMNS)), np.nan)
+        rows = zip(df["open"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy())
+        for i, (o, h, l, c) in enumerate(rows):
+            values = self.update(float(o), float(h), float(l), float(c))
+            out[i] = [values[column] for column in self.COLUMNS]
+        return pd.DataFrame(out, index=df.index, columns=self.COLUMNS)
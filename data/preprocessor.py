@@ -1,14 +1,31 @@
 # Clean and add indicators (RSI, MACD, ATR)
 import pandas as pd
 import talib
-from data.data_fetcher import fetch_forex_data
+from data.cache import cached_frame
+from data.data_fetcher import fetch_forex_data, forex_data_path
+from data.economic_calendar import add_news_mask
+from data.indicators import IndicatorEngine
 
-def preprocess_data(df):
-    """Clean and enrich forex data with indicators."""
+# Indicators preprocess_data adds; part of the cache key, so update it with any change below
+INDICATORS = ["sma20=SMA(20)", "sma50=SMA(50)", "rsi=RSI(14)", "macd,signal=MACD(12,26,9)", "atr=ATR(14)"]
+
+def preprocess_data(df, incremental=False):
+    """Clean and enrich forex data with indicators.
+
+    With incremental=True the columns come from IndicatorEngine, the bar-by-bar code path
+    live trading uses; the values match TA-Lib to floating-point tolerance.
+    """
     required = ["open", "high", "low", "close"]
     if not all(col in df.columns for col in required):
         raise ValueError("Data must include OHLC columns")
     
+    if incremental:
+        indicators = IndicatorEngine().run(df)
+        for column in IndicatorEngine.COLUMNS:
+            df[column] = indicators[column]
+        df.dropna(inplace=True)
+        return df
+    
     df["sma20"] = talib.SMA(df["close"], timeperiod=20)
     df["sma50"] = talib.SMA(df["close"], timeperiod=50)
     df["rsi"] = talib.RSI(df["close"], timeperiod=14)
@@ -18,10 +35,24 @@ def preprocess_data(df):
     df.dropna(inplace=True)
     return df
 
-def load_forex_data():
-    """Load and preprocess real EUR/USD 1H data."""
-    df = fetch_forex_data()
-    return preprocess_data(df)
+def load_forex_data(pair="EURUSD", timeframe="1H", start_date="2023-01-01", end_date="2025-04-12",
+                    data_dir="data", use_cache=True, cache_dir="data/cache", calendar=None):
+    """Load and preprocess real forex data, from the on-disk cache when the CSV is unchanged.
+
+    With an EconomicCalendar, a news_blackout column is added (after the cache, since event
+    files change independently of the price data).
+    """
+    build = lambda: preprocess_data(fetch_forex_data(pair, timeframe, start_date, end_date, data_dir))
+    if not use_cache:
+        data = build()
+    else:
+        data = cached_frame(
+            forex_data_path(pair, timeframe, data_dir), start_date, end_date, INDICATORS,
+            build=build, cache_dir=cache_dir
+        )
+    if calendar is not None:
+        data = add_news_mask(data, calendar, pair, timeframe)
+    return data
 
 if __name__ == "__main__":
     data = load_forex_data()
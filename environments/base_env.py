@@ -1 +1,65 @@
 # Base forex trading environment
+import gymnasium as gym
+import numpy as np
+import pandas as pd
+from utils.logger import STEPS, TRADES
+from utils.prop_firm_rules import RuleSet, RuleTracker
+
+class BaseForexEnv(gym.Env):
+    """
+    Account state shared by the single-pair and portfolio environments.
+
+    Holds the balance/equity, the prop-firm RuleTracker the account is checked against, the
+    episode start offset and the event recorder flags. Subclasses own the market arrays,
+    positions and step().
+    Args:
+        index (pd.Index): Bar times; a DatetimeIndex gives the rules their trading days.
+        initial_balance (float): Starting balance.
+        daily_loss_limit (float): Used to build the default RuleSet when rules is None.
+        max_drawdown (float): Used to build the default RuleSet when rules is None.
+        start_offset (int): First step of every episode.
+        recorder (EventRecorder): Optional fill/breach/step event log.
+        rules (RuleSet): Prop-firm rules; replaces daily_loss_limit/max_drawdown when given.
+    """
+
+    def __init__(self, index, initial_balance=10000, daily_loss_limit=0.05, max_drawdown=0.10, start_offset=0,
+                 recorder=None, rules=None):
+        super().__init__()
+        # First step of every episode; vectorized training gives each worker a different offset
+        self.start_offset = start_offset
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.equity = initial_balance
+        self.current_step = 0
+        self.rules = rules if rules is not None else RuleSet(daily_loss_limit=daily_loss_limit, max_drawdown=max_drawdown)
+        self.tracker = RuleTracker(self.rules, initial_balance)
+        self.daily_loss_limit = self.rules.daily_loss_limit
+        self.max_drawdown = self.rules.max_drawdown
+        # Optional utils.logger.EventRecorder; levels are resolved once so quiet runs only test a bool per step
+        self.recorder = recorder
+        self._log_trades = recorder is not None and recorder.level >= TRADES
+        self._log_steps = recorder is not None and recorder.level >= STEPS
+        if isinstance(index, pd.DatetimeIndex):
+            self._day = self.rules.day_numbers(index)
+        else:
+            self._day = np.zeros(len(index), dtype=np.int64)
+
+    @property
+    def daily_pnl(self):
+        return self.tracker.daily_pnl
+
+    @property
+    def max_equity(self):
+        return self.tracker.max_equity
+
+    def _reset_account(self):
+        self.balance = self.initial_balance
+        self.equity = self.initial_balance
+        self.current_step = self.start_offset
+        self.tracker.reset()
+
+    def _info(self):
+        return {
+            "balance": self.balance, "equity": self.equity, "drawdown": self.tracker.drawdown,
+            "passed": self.tracker.passed, "trading_days": self.tracker.trading_days
+        }
@@ -1,39 +1,59 @@
 import gymnasium as gym
 import numpy as np
-import pandas as pd
+from environments.base_env import BaseForexEnv
+from utils.logger import BREACH, CLOSE, OPEN, STEP
 
-class ForexEnv(gym.Env):
-    def __init__(self, data, initial_balance=10000, daily_loss_limit=0.05, max_drawdown=0.10, spread=1.0):
-        super().__init__()
+# Market columns that make up the first eight observation entries, in order
+FEATURE_COLUMNS = ["open", "high", "low", "close", "rsi", "macd", "signal", "atr"]
+
+def normalize_features(values):
+    """Scale a (rows, 8) float32 array of FEATURE_COLUMNS in place and return it."""
+    values[..., 0:4] = (values[..., 0:4] - 1.0) / 0.2
+    values[..., 4] /= 100.0
+    values[..., 5:7] /= 0.01
+    values[..., 7] /= 0.001
+    return values
+
+class ForexEnv(BaseForexEnv):
+    def __init__(self, data, initial_balance=10000, daily_loss_limit=0.05, max_drawdown=0.10, spread=1.0, start_offset=0, recorder=None, rules=None):
+        super().__init__(data.index, initial_balance, daily_loss_limit, max_drawdown, start_offset, recorder, rules)
         self.data = data
-        self.initial_balance = initial_balance
-        self.balance = initial_balance
-        self.daily_loss_limit = daily_loss_limit
-        self.max_drawdown = max_drawdown
         self.spread = spread
-        self.current_step = 0
         self.position = 0
         self.entry_price = 0
-        self.equity = initial_balance
-        self.max_equity = initial_balance
-        self.daily_pnl = 0
-        
+
+        # Convert the frame to contiguous arrays once; step() and _get_state() only index into these
+        self._close = np.ascontiguousarray(data["close"].to_numpy(dtype=np.float64))
+        self._features = np.ascontiguousarray(normalize_features(data[FEATURE_COLUMNS].to_numpy(dtype=np.float32, copy=True)))
+        self._n_rows = len(self._close)
+        # News windows (data.economic_calendar.add_news_mask) block new positions; closes still go through
+        self._blackout = data["news_blackout"].to_numpy(dtype=bool) if "news_blackout" in data else None
+        self._obs = np.zeros(len(FEATURE_COLUMNS) + 2, dtype=np.float32)
+
         self.action_space = gym.spaces.Discrete(3)
         self.observation_space = gym.spaces.Box(low=0, high=1, shape=(10,), dtype=np.float32)
-    
+
     def step(self, action):
         done = False
         reward = 0
-        
-        current_price = self.data.iloc[self.current_step]["close"]
-        next_price = self.data.iloc[self.current_step + 1]["close"] if self.current_step + 1 < len(self.data) else current_price
-        
+        realized = 0.0
+        balance_before = self.balance
+
+        current_price = self._close[self.current_step]
+        next_price = self._close[self.current_step + 1] if self.current_step + 1 < self._n_rows else current_price
+        if self.position == 0 and self._blackout is not None and self._blackout[self.current_step]:
+            action = 0
+
         if action == 1 and self.position == 0:
             self.position = 1
             self.entry_price = current_price + (self.spread * 0.0001)
+            if self._log_trades:
+                self.recorder.record(OPEN, self.current_step, action, self.entry_price, balance=self.balance, equity=self.equity)
         elif action == 2 and self.position == 0:
             self.position = -1
             self.entry_price = current_price - (self.spread * 0.0001)
+            if self._log_trades:
+                self.recorder.record(OPEN, self.current_step, action, self.entry_price, balance=self.balance, equity=self.equity)
         elif action in [1, 2] and self.position != 0:
             if self.position == 1:
                 profit = (current_price - self.entry_price) * 10000
@@ -41,7 +61,7 @@ class ForexEnv(gym.Env):
                 profit = (self.entry_price - current_price) * 10000
             self.balance += profit
             self.equity = self.balance
-            self.daily_pnl += profit
+            realized = profit
             if profit > 30:
                 reward = (profit / self.initial_balance) * 100
             elif profit > 0:
@@ -50,53 +70,49 @@ class ForexEnv(gym.Env):
                 reward = (profit / self.initial_balance) * 80
             if action == 2 and profit > 0:
                 reward *= 1.2  # Boost sell wins
-            print(f"Step {self.current_step}, Action: {action}, Profit: {profit}, Reward: {reward}")
+            if self._log_trades:
+                self.recorder.record(CLOSE, self.current_step, action, current_price, profit, reward, self.balance, self.equity)
             self.position = 0
-        
+
         self.current_step += 1
         self.equity = self.balance + (next_price - self.entry_price) * 10000 * self.position
-        self.max_equity = max(self.max_equity, self.equity)
-        
-        daily_loss = -self.daily_pnl / self.initial_balance
-        drawdown = (self.max_equity - self.equity) / self.max_equity
-        if daily_loss > self.daily_loss_limit or drawdown > self.max_drawdown:
+
+        # Daily loss, drawdown and the profit target live in the tracker, which also rolls the day over
+        if self.tracker.update(self._day[self.current_step], self.balance, self.equity, realized, self.balance != balance_before):
             done = True
             reward = -20.0
-        
-        if self.current_step >= len(self.data) - 1:
+            if self._log_trades:
+                self.recorder.record(BREACH, self.current_step, action, next_price, reward=reward, balance=self.balance, equity=self.equity)
+
+        if self.current_step >= self._n_rows - 1:
             done = True
-        
+
         if self.position != 0:
             unrealized = (next_price - self.entry_price) * 10000 * self.position
             reward += unrealized / self.initial_balance * 5 if unrealized > 15 else 0
-            print(f"Step {self.current_step}, Action: {action}, Unrealized: {unrealized}, Reward: {reward}")
-        
+
+        if self._log_steps:
+            self.recorder.record(STEP, self.current_step, action, next_price, reward=reward, balance=self.balance, equity=self.equity)
+
+        # A terminal observation outlives the reset that refills the buffer (DummyVecEnv keeps it in infos)
         state = self._get_state()
-        info = {"balance": self.balance, "equity": self.equity, "drawdown": drawdown}
-        return state, reward, done, False, info
-    
-    def reset(self, seed=None):
+        return (state.copy() if done else state), reward, done, False, self._info()
+
+    def reset(self, seed=None, options=None):
         super().reset(seed=seed)
-        self.balance = self.initial_balance
-        self.equity = self.initial_balance
-        self.max_equity = self.initial_balance
-        self.current_step = 0
+        self._reset_account()
         self.position = 0
         self.entry_price = 0
-        self.daily_pnl = 0
         return self._get_state(), {}
-    
+
     def _get_state(self):
-        row = self.data.iloc[self.current_step]
-        state = np.array([
-            row["open"], row["high"], row["low"], row["close"],
-            row["rsi"], row["macd"], row["signal"], row["atr"],
-            self.balance / self.initial_balance, self.position
-        ], dtype=np.float32)
-        state[0:4] = (state[0:4] - 1.0) / 0.2
-        state[4] /= 100.0
-        state[5:7] /= 0.01
-        state[7] /= 0.001
-        state[8] = state[8]
-        state[9] = (state[9] + 1) / 2
-        return state
\ No newline at end of file
+        """Fill the preallocated observation buffer for the current step.
+
+        The same array is returned on every call; copy it if it must outlive the next step.
+        step() returns a copy on the final step of an episode.
+        """
+        obs = self._obs
+        obs[0:8] = self._features[self.current_step]
+        obs[8] = self.balance / self.initial_balance
+        obs[9] = (self.position + 1) / 2
+        return obs
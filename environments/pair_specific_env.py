@@ -1 +1,219 @@
 # Pair-specific envs (e.g., EURUSD, GBPUSD)
+import gymnasium as gym
+import numpy as np
+from environments.base_env import BaseForexEnv
+from environments.forex_env import FEATURE_COLUMNS, normalize_features
+from utils.logger import BREACH, CLOSE, OPEN, STEP
+
+# Units traded per position; 10,000 units of a USD-quoted pair is $1 per pip, as in ForexEnv
+LOT_UNITS = 10000
+
+# Per-pair contract details. The account currency is USD: PnL in the quote currency is converted at
+# 1 for XXXUSD, at 1 / price for USDXXX, and at the fixed quote_usd rate for crosses.
+#   pip: price increment of one pip, spread: entry spread in pips, margin: margin per unit of notional
+PAIR_SPECS = {
+    "EURUSD": {"pip": 0.0001, "spread": 1.0, "margin": 1 / 30},
+    "GBPUSD": {"pip": 0.0001, "spread": 1.2, "margin": 1 / 30},
+    "AUDUSD": {"pip": 0.0001, "spread": 1.2, "margin": 1 / 30},
+    "NZDUSD": {"pip": 0.0001, "spread": 1.5, "margin": 1 / 30},
+    "USDJPY": {"pip": 0.01, "spread": 1.2, "margin": 1 / 30},
+    "USDCHF": {"pip": 0.0001, "spread": 1.5, "margin": 1 / 30},
+    "USDCAD": {"pip": 0.0001, "spread": 1.5, "margin": 1 / 30},
+    "EURGBP": {"pip": 0.0001, "spread": 1.5, "margin": 1 / 30, "quote_usd": 1.27},
+    "EURJPY": {"pip": 0.01, "spread": 1.8, "margin": 1 / 30, "quote_usd": 1 / 150},
+    "GBPJPY": {"pip": 0.01, "spread": 2.5, "margin": 1 / 30, "quote_usd": 1 / 150},
+    "XAUUSD": {"pip": 0.1, "spread": 3.0, "margin": 1 / 20}
+}
+
+def pair_spec(pair, specs=None):
+    """Spec of a pair from specs/PAIR_SPECS, or a default by quote currency for unlisted pairs."""
+    spec = (specs or {}).get(pair) or PAIR_SPECS.get(pair)
+    if spec is None:
+        spec = {"pip": 0.01 if pair[3:6] == "JPY" else 0.0001, "spread": 1.0, "margin": 1 / 30}
+    return spec
+
+def align_frames(data):
+    """Restrict preprocessed frames {pair: DataFrame} to the bar times they all share."""
+    frames = list(data.values())
+    index = frames[0].index
+    for frame in frames[1:]:
+        if not frame.index.equals(index):
+            index = index.intersection(frame.index)
+    return index, [frame if frame.index.equals(index) else frame.loc[index] for frame in frames]
+
+class PortfolioEnv(BaseForexEnv):
+    """
+    One account trading K pairs at once, with all per-pair state held in arrays.
+
+    The action is one ForexEnv action per pair (MultiDiscrete([3] * K)) with the same toggle
+    semantics: buy/sell opens a long/short when the pair is flat and closes it otherwise. Every
+    step updates all pairs with array operations, so its cost barely grows with K. Balance,
+    margin, daily loss and drawdown are account-level: the pairs share one balance and one
+    RuleTracker, and opens that do not fit in the free margin are skipped (in pair order).
+    The observation is the K x 8 normalized market features, the balance ratio and the K
+    positions; for a single EURUSD frame it equals ForexEnv's, and so do rewards and balances.
+    Args:
+        data (dict): {pair: preprocessed DataFrame}; frames are aligned on their common bars.
+        initial_balance (float): Starting balance (USD).
+        daily_loss_limit (float): Default RuleSet daily loss limit.
+        max_drawdown (float): Default RuleSet max drawdown.
+        specs (dict): Overrides of PAIR_SPECS entries.
+        units (int): Units per position.
+        start_offset (int): First step of every episode.
+        recorder (EventRecorder): Optional event log; events carry the pair's column, and every
+            step writes one STEP row per pair.
+        rules (RuleSet): Prop-firm rules for the account.
+    """
+
+    def __init__(self, data, initial_balance=10000, daily_loss_limit=0.05, max_drawdown=0.10, specs=None,
+                 units=LOT_UNITS, start_offset=0, recorder=None, rules=None):
+        index, frames = align_frames(data)
+        super().__init__(index, initial_balance, daily_loss_limit, max_drawdown, start_offset, recorder, rules)
+        self.data = data
+        self.pairs = list(data)
+        self.units = units
+        n_pairs = len(self.pairs)
+        specs = [pair_spec(pair, specs) for pair in self.pairs]
+        pips = np.array([spec["pip"] for spec in specs])
+
+        # (rows, K) prices and (rows, K, 8) features; price-unit features are rescaled to EURUSD pips
+        # first so normalize_features() puts every pair on the same scale
+        self._close = np.ascontiguousarray(np.column_stack([frame["close"].to_numpy(dtype=np.float64) for frame in frames]))
+        features = np.stack([frame[FEATURE_COLUMNS].to_numpy(dtype=np.float32, copy=True) for frame in frames], axis=1)
+        price_columns = [FEATURE_COLUMNS.index(column) for column in ["open", "high", "low", "close", "macd", "signal", "atr"]]
+        features[..., price_columns] *= (0.0001 / pips).astype(np.float32)[:, None]
+        self._features = np.ascontiguousarray(normalize_features(features)).reshape(len(index), -1)
+        self._n_features = self._features.shape[1]
+        self._n_rows = len(index)
+
+        # Quote currency -> USD per bar and pair
+        self._conversion = np.ones((self._n_rows, n_pairs))
+        for k, (pair, spec) in enumerate(zip(self.pairs, specs)):
+            if pair[:3] == "USD":
+                self._conversion[:, k] = 1.0 / self._close[:, k]
+            elif pair[3:6] != "USD":
+                self._conversion[:, k] = spec.get("quote_usd", 1.0)
+        # Account-currency PnL per unit of price move, and margin held per open position
+        self._pnl_scale = units * self._conversion
+        self._margin = self._pnl_scale * self._close * np.array([spec["margin"] for spec in specs])
+        self._spread_price = np.array([spec["spread"] for spec in specs]) * pips
+
+        # News windows block new positions per pair; closes still go through
+        blackout = [frame["news_blackout"].to_numpy(dtype=bool) if "news_blackout" in frame else np.zeros(len(index), dtype=bool) for frame in frames]
+        self._blackout = np.column_stack(blackout) if any("news_blackout" in frame for frame in frames) else None
+
+        self.position = np.zeros(n_pairs, dtype=np.int64)
+        self.entry_price = np.zeros(n_pairs)
+        self.margin_used = 0.0
+        self._obs = np.zeros(self._n_features + 1 + n_pairs, dtype=np.float32)
+        self._obs_positions = self._obs[self._n_features + 1:]
+
+        self.action_space = gym.spaces.MultiDiscrete([3] * n_pairs)
+        self.observation_space = gym.spaces.Box(low=0, high=1, shape=self._obs.shape, dtype=np.float32)
+
+    def step(self, action):
+        done = False
+        action = np.asarray(action, dtype=np.int64).reshape(len(self.pairs))
+        step = self.current_step
+        balance_before = self.balance
+        initial_balance = self.initial_balance
+
+        price = self._close[step]
+        following = step + 1 if step + 1 < self._n_rows else step
+        next_price = self._close[following]
+        reward = 0.0
+        realized = 0.0
+        active = action != 0
+        if active.any():
+            flat = self.position == 0
+            if self._blackout is not None:
+                active &= ~(flat & self._blackout[step])
+            closing = active & ~flat
+            opening = active & flat
+
+            # Closes: realize PnL and score each closed trade with ForexEnv's reward shaping
+            if closing.any():
+                profit = np.where(closing, (price - self.entry_price) * self._pnl_scale[step] * self.position, 0.0)
+                realized = profit.sum()
+                self.balance += realized
+                scaled = profit / initial_balance
+                trade_reward = np.where(profit > 30, scaled * 100, np.where(profit > 0, scaled * 60, scaled * 80))
+                trade_reward = np.where((action == 2) & (profit > 0), trade_reward * 1.2, trade_reward)  # Boost sell wins
+                reward = float(trade_reward[closing].sum())
+                if self._log_trades:
+                    for k in np.flatnonzero(closing):
+                        self.recorder.record(CLOSE, step, action[k], price[k], profit[k], trade_reward[k], self.balance, self.balance, k)
+                self.position[closing] = 0
+
+            # Opens: skip those that do not fit in the free margin, in pair order
+            if opening.any():
+                held = self.position != 0
+                open_equity = self.balance + ((price - self.entry_price) * self._pnl_scale[step] * self.position)[held].sum()
+                margin = self._margin[step]
+                free = open_equity - margin[held].sum()
+                opening &= np.cumsum(np.where(opening, margin, 0.0)) <= free
+                side = np.where(action == 1, 1, -1)
+                self.entry_price = np.where(opening, price + self._spread_price * side, self.entry_price)
+                self.position[opening] = side[opening]
+                if self._log_trades:
+                    for k in np.flatnonzero(opening):
+                        self.recorder.record(OPEN, step, action[k], self.entry_price[k], balance=self.balance, equity=self.equity, pair=k)
+            self._obs_positions[:] = (self.position + 1) / 2
+
+        self.current_step += 1
+        held = self.position != 0
+        unrealized = None
+        if held.any():
+            unrealized = (next_price - self.entry_price) * self._pnl_scale[following] * self.position
+            self.equity = self.balance + unrealized.sum()
+            self.margin_used = float(self._margin[following] @ held)
+        else:
+            self.equity = self.balance
+            self.margin_used = 0.0
+
+        # Daily loss, drawdown and the profit target are checked on the account
+        if self.tracker.update(self._day[self.current_step], self.balance, self.equity, realized, self.balance != balance_before):
+            done = True
+            reward = -20.0
+            if self._log_trades:
+                self.recorder.record(BREACH, self.current_step, 0, 0.0, reward=reward, balance=self.balance, equity=self.equity)
+
+        if self.current_step >= self._n_rows - 1:
+            done = True
+
+        if unrealized is not None:
+            bonus = held & (unrealized > 15)
+            if bonus.any():
+                reward += float((unrealized[bonus] / initial_balance * 5).sum())
+
+        if self._log_steps:
+            # One row per pair, like ForexEnv's; reward, balance and equity are the account's
+            for k in range(len(self.pairs)):
+                self.recorder.record(STEP, self.current_step, action[k], next_price[k], reward=reward, balance=self.balance, equity=self.equity, pair=k)
+
+        info = self._info()
+        info["margin_used"] = self.margin_used
+        # A terminal observation outlives the reset that refills the buffer (DummyVecEnv keeps it in infos)
+        state = self._get_state()
+        return (state.copy() if done else state), reward, done, False, info
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self._reset_account()
+        self.position[:] = 0
+        self.entry_price[:] = 0.0
+        self.margin_used = 0.0
+        self._obs_positions[:] = 0.5
+        return self._get_state(), {}
+
+    def _get_state(self):
+        """Fill the preallocated observation buffer for the current step.
+
+        Layout: K x 8 market features, the balance ratio, then the K positions; the position
+        slots are only rewritten when a position changes. The same array is returned on every
+        call; step() returns a copy on the final step of an episode.
+        """
+        obs = self._obs
+        obs[:self._n_features] = self._features[self.current_step]
+        obs[self._n_features] = self.balance / self.initial_balance
+        return obs
@@ -1 +1,212 @@
-# Execute live trades via MT5
+# Execute live trades via MT5; ships with a replay broker for offline runs
+import argparse
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from data.data_fetcher import TIMEFRAMES, bar_start, forex_data_path, iter_price_chunks
+from data.indicators import IndicatorEngine
+from environments.forex_env import FEATURE_COLUMNS, ForexEnv, normalize_features
+
+Bar = namedtuple("Bar", ["timestamp", "open", "high", "low", "close"])
+
+class BaseBroker(ABC):
+    @abstractmethod
+    def stream(self):
+        """Async iterator of Bar objects (ticks arrive as one-tick bars)."""
+        pass
+
+    @abstractmethod
+    async def submit_order(self, action, price):
+        """Send a 1 (buy) / 2 (sell) order and return the fill as a dict."""
+        pass
+
+    @abstractmethod
+    def account(self):
+        """Current {"balance", "equity", "position"}."""
+        pass
+
+class ReplayBroker(BaseBroker):
+    """
+    Local broker that replays a historical CSV and fills orders like ForexEnv.
+
+    Args:
+        file_path (str): Dukascopy bar or tick export.
+        speed (float): Rows per second to emit; 0 replays as fast as possible.
+        start_date (str): First timestamp to replay.
+        end_date (str): Last timestamp to replay.
+        initial_balance (float): Starting balance.
+        spread (float): Spread in pips added to entries.
+    """
+
+    def __init__(self, file_path, speed=0, start_date=None, end_date=None, initial_balance=10000, spread=1.0):
+        self.file_path = file_path
+        self.speed = speed
+        self.start_date = start_date
+        self.end_date = end_date
+        self.spread = spread
+        self.balance = initial_balance
+        self.position = 0
+        self.entry_price = 0.0
+        self.last_price = None
+        self.fills = []
+
+    async def stream(self):
+        interval = 1.0 / self.speed if self.speed else 0
+        for chunk in iter_price_chunks(self.file_path, self.start_date, self.end_date):
+            rows = zip(chunk.index, *(chunk[column].to_numpy() for column in ["open", "high", "low", "close"]))
+            for row in rows:
+                bar = Bar(*row)
+                self.last_price = bar.close
+                yield bar
+                # Always yield to the event loop so order/inference tasks interleave with the feed
+                await asyncio.sleep(interval)
+
+    async def submit_order(self, action, price):
+        if self.position == 0:
+            self.position = 1 if action == 1 else -1
+            self.entry_price = price + self.position * self.spread * 0.0001
+            fill = {"side": "buy" if action == 1 else "sell", "price": self.entry_price, "profit": 0.0}
+        else:
+            # Any order closes; label the fill by the position it closes, not the order's side
+            profit = (price - self.entry_price) * 10000 * self.position
+            self.balance += profit
+            fill = {"side": "close long" if self.position == 1 else "close short", "price": price, "profit": profit}
+            self.position = 0
+        self.fills.append(fill)
+        return fill
+
+    def account(self):
+        equity = self.balance
+        if self.position != 0 and self.last_price is not None:
+            equity += (self.last_price - self.entry_price) * 10000 * self.position
+        return {"balance": self.balance, "equity": equity, "position": self.position}
+
+class LiveEngine:
+    """
+    Event-driven loop: bar -> indicators -> policy -> order.
+
+    Model inference runs in a worker thread so the event loop keeps consuming the feed.
+    Args:
+        agent: Anything with predict(state, deterministic=...) -> 0/1/2 (e.g. PPOAgent).
+        broker (BaseBroker): Bar source and order sink.
+        initial_balance (float): Balance the observation's balance ratio is relative to.
+        timeframe (str): Build bars of this timeframe from the stream (e.g. "1H" from ticks);
+            None treats every streamed item as a finished bar.
+        deterministic (bool): Passed to agent.predict.
+    """
+
+    def __init__(self, agent, broker, initial_balance=10000, timeframe=None, deterministic=False):
+        self.agent = agent
+        self.broker = broker
+        self.initial_balance = initial_balance
+        self.timeframe = timeframe
+        self.deterministic = deterministic
+        self.indicators = IndicatorEngine()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.decision_latency = []
+        self.order_latency = []
+        self.bars = 0
+        self._obs = np.zeros(len(FEATURE_COLUMNS) + 2, dtype=np.float32)
+        self._features = np.zeros((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+
+    def warmup(self, history):
+        """Prime the indicators with bars before the session so trading can start on the first bar."""
+        rows = zip(*(history[column].to_numpy() for column in ["open", "high", "low", "close"]))
+        for o, h, l, c in rows:
+            self.indicators.update(float(o), float(h), float(l), float(c))
+
+    def observation(self, bar, values):
+        """Build the same 10-value observation ForexEnv._get_state produces."""
+        features = self._features
+        features[0] = [bar.open, bar.high, bar.low, bar.close,
+                       values["rsi"], values["macd"], values["signal"], values["atr"]]
+        normalize_features(features)
+        account = self.broker.account()
+        self._obs[0:8] = features[0]
+        self._obs[8] = account["balance"] / self.initial_balance
+        self._obs[9] = (account["position"] + 1) / 2
+        return self._obs
+
+    async def on_bar(self, bar, received):
+        self.bars += 1
+        values = self.indicators.update(bar.open, bar.high, bar.low, bar.close)
+        if not self.indicators.ready():
+            return
+        state = self.observation(bar, values)
+        loop = asyncio.get_running_loop()
+        action = await loop.run_in_executor(self.executor, self.agent.predict, state.copy(), self.deterministic)
+        self.decision_latency.append(time.perf_counter() - received)
+        if action in (1, 2):
+            fill = await self.broker.submit_order(action, bar.close)
+            self.order_latency.append(time.perf_counter() - received)
+            logging.info(f"{bar.timestamp} {fill['side']} @ {fill['price']:.5f}, profit {fill['profit']:.2f}, account {self.broker.account()}")
+
+    async def run(self):
+        rule = TIMEFRAMES.get(self.timeframe, self.timeframe) if self.timeframe else None
+        current = None
+        async for item in self.broker.stream():
+            received = time.perf_counter()
+            if rule is None:
+                await self.on_bar(item, received)
+                continue
+            # Aggregate the stream into timeframe bars; a bar is final once the next one starts
+            bucket = bar_start(item.timestamp, rule)
+            if current is not None and bucket != current.timestamp:
+                await self.on_bar(current, received)
+                current = None
+            if current is None:
+                current = Bar(bucket, item.open, item.high, item.low, item.close)
+            else:
+                current = Bar(bucket, current.open, max(current.high, item.high), min(current.low, item.low), item.close)
+        if current is not None:
+            # The feed ended: the last aggregated bar is as final as it will get
+            await self.on_bar(current, time.perf_counter())
+        self.executor.shutdown()
+        return self.report()
+
+    def report(self):
+        """Account summary and latency percentiles in milliseconds."""
+        result = {"bars": self.bars, "orders": len(self.order_latency)}
+        result.update({key: float(value) for key, value in self.broker.account().items()})
+        for name, samples in [("decision", self.decision_latency), ("tick_to_order", self.order_latency)]:
+            if samples:
+                p50, p90, p99 = np.percentile(np.array(samples) * 1000, [50, 90, 99])
+                result[f"{name}_ms"] = {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": max(samples) * 1000}
+        return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PipSentry live trading (replay broker)")
+    parser.add_argument("--model", default="ppo_EURUSD_2025")
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--speed", type=float, default=0, help="Bars per second, 0 = as fast as possible")
+    parser.add_argument("--timeframe", default=None, help="Build bars of this timeframe from a tick/M1 feed")
+    args = parser.parse_args(argv)
+    # After argument parsing, so --help does not pay for torch
+    from agents.ppo_agent import PPOAgent
+    from data.preprocessor import load_forex_data
+    from models.model_manager import ModelManager
+    from utils.config import load_config
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    config = load_config()
+    history = load_forex_data()
+    history = history[history.index < args.start]
+    # The policy only needs an env for its spaces; the history before the replay window serves
+    agent = ModelManager().load_agent(PPOAgent(ForexEnv(data=history)), args.model)
+
+    broker = ReplayBroker(
+        forex_data_path(config["pair"], config["timeframe"]), speed=args.speed,
+        start_date=args.start, end_date=args.end, initial_balance=config["initial_balance"]
+    )
+    engine = LiveEngine(agent, broker, initial_balance=config["initial_balance"], timeframe=args.timeframe)
+    engine.warmup(history)
+    report = asyncio.run(engine.run())
+    logging.info(f"Live session finished: {report}")
+
+if __name__ == "__main__":
+    main()
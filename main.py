@@ -1,22 +1,23 @@
 import argparse
-from agents.ppo_agent import PPOAgent
-from environments.forex_env import ForexEnv
-from data.preprocessor import load_forex_data
-from utils.config import load_config
-from models.model_manager import ModelManager
-import pandas as pd
 import os
 import logging
 from datetime import datetime
 
-def main():
-    parser = argparse.ArgumentParser(description="PipSentry Forex Trading Bot")
-    parser.add_argument("--mode", choices=["train", "test"], default="train")
-    args = parser.parse_args()
+def run(mode="train", config_path="config.yaml"):
+    """Train the PPO agent on 2023-2024 data, or replay the saved model over it (mode="test")."""
+    # Heavy dependencies (torch via stable-baselines3, pandas, talib) load only once a mode runs
+    import pandas as pd
+    from agents.ppo_agent import PPOAgent, make_forex_vec_env, ppo_kwargs
+    from environments.forex_env import ForexEnv
+    from data.economic_calendar import load_calendar
+    from data.preprocessor import load_forex_data
+    from utils.config import load_config
+    from models.model_manager import ModelManager
+    from utils.logger import EventRecorder
     
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, f"ppo_{args.mode}_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.log")
+    log_file = os.path.join(log_dir, f"ppo_{mode}_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.log")
     logging.basicConfig(
         filename=log_file,
         level=logging.INFO,
@@ -26,38 +27,60 @@ def main():
     console.setLevel(logging.INFO)
     logging.getLogger().addHandler(console)
     
-    config = load_config()
-    data = load_forex_data()
+    config = load_config(config_path)
+    data = load_forex_data(calendar=load_calendar(config))
     
     # Split data: Train on 2023–2024, reserve 2025 for testing
     train_data = data[data.index < '2025-01-01']
     logging.info(f"Training data: {len(train_data)} rows")
     
-    env = ForexEnv(
-        data=train_data,
-        initial_balance=config["initial_balance"],
-        daily_loss_limit=config["challenge"]["daily_loss_limit"],
-        max_drawdown=config["challenge"]["max_drawdown"]
-    )
+    env_kwargs = {
+        "initial_balance": config["initial_balance"],
+        "daily_loss_limit": config["challenge"]["daily_loss_limit"],
+        "max_drawdown": config["challenge"]["max_drawdown"]
+    }
+    if mode == "train":
+        n_envs = config["agent"].get("n_envs", 1)
+        vec_env = config["agent"].get("vec_env", "dummy")
+        logging.info(f"Collecting rollouts from {n_envs} {vec_env} environments")
+        env = make_forex_vec_env(train_data, n_envs=n_envs, vec_env=vec_env, **env_kwargs)
+    else:
+        events = config.get("events", {})
+        recorder = EventRecorder(level=events.get("level", "trades"), path=f"{log_file[:-len('.log')]}_events.{events.get('format', 'jsonl')}")
+        env = ForexEnv(data=train_data, recorder=recorder, **env_kwargs)
     
-    agent = PPOAgent(env, learning_rate=config["agent"]["learning_rate"])
+    agent = PPOAgent(env, learning_rate=config["agent"]["learning_rate"], **ppo_kwargs(config["agent"]))
     model_manager = ModelManager()
     model_name = f"ppo_{config['pair']}_2025"
     
-    if args.mode == "train":
+    if mode == "train":
         logging.info(f"Training PPO on {config['pair']} at {pd.Timestamp.now(tz='Asia/Kolkata')}")
         agent.train(env, timesteps=config["agent"]["timesteps"])
-        model_manager.save_model(agent, model_name, metadata={"pair": config["pair"], "date": "2025-04-14"})
+        model_manager.save_model(agent, model_name, metadata={
+            "pair": config["pair"],
+            "version": "2025",
+            "train_start": str(train_data.index[0]),
+            "train_end": str(train_data.index[-1])
+        }, config=config)
         logging.info(f"Training complete. Model saved to models/saved_models/{model_name}/{model_name}.zip")
-    elif args.mode == "test":
+        env.close()
+    elif mode == "test":
         logging.info(f"Testing PPO on {config['pair']} at {pd.Timestamp.now(tz='Asia/Kolkata')}")
-        agent.load(f"models/saved_models/{model_name}/{model_name}.zip")
+        model_manager.load_agent(agent, model_name)
         state, _ = env.reset()
         done = False
         while not done:
             action = agent.predict(state)
             state, reward, done, truncated, info = env.step(action)
-            logging.info(f"Step: {env.current_step}, Balance: {info['balance']:.2f}, Equity: {info['equity']:.2f}, Reward: {reward}")
+        recorder.close()
+        logging.info(f"Test finished at step {env.current_step}, Balance: {info['balance']:.2f}, Equity: {info['equity']:.2f}")
+        logging.info(f"Events written to {recorder.path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="PipSentry Forex Trading Bot")
+    parser.add_argument("--mode", choices=["train", "test"], default="train")
+    args = parser.parse_args()
+    run(args.mode)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,157 @@
+# Batched, low-latency policy inference for saved PPO models
+import asyncio
+import copy
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+
+class PolicyNetwork(torch.nn.Module):
+    """Actor path of an SB3 ActorCriticPolicy: observations -> action logits (no value head)."""
+
+    def __init__(self, policy):
+        super().__init__()
+        self.features = policy.pi_features_extractor
+        self.actor = policy.mlp_extractor.policy_net
+        self.action_net = policy.action_net
+
+    def forward(self, obs):
+        return self.action_net(self.actor(self.features(obs)))
+
+class InferenceServer:
+    """
+    Evaluate one loaded policy on micro-batches of observations from many pairs/accounts.
+
+    The actor network is traced with TorchScript once, so a batch costs one forward pass
+    with no SB3 preprocessing per call. Use predict_batch() directly when a batch is already
+    at hand, or await predict() from many coroutines and let the server group requests.
+    Args:
+        model (PPO): Loaded SB3 model.
+        max_batch (int): Largest batch one forward pass evaluates.
+        max_wait_ms (float): How long the batcher waits to fill a batch after the first request.
+        num_threads (int): torch intra-op threads, None to keep torch's default.
+        seed (int): Seed for stochastic (deterministic=False) sampling.
+    """
+
+    def __init__(self, model, max_batch=256, max_wait_ms=1.0, num_threads=None, seed=None):
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.obs_shape = model.observation_space.shape
+        # Trace a CPU copy: the model may be shared (e.g. a cached ModelManager load) and stay on its device
+        network = PolicyNetwork(copy.deepcopy(model.policy).cpu()).eval()
+        example = torch.zeros((max_batch,) + self.obs_shape, dtype=torch.float32)
+        with torch.inference_mode(), warnings.catch_warnings():
+            # Recent torch releases flag TorchScript as deprecated; it still works and needs no compiler
+            warnings.simplefilter("ignore", FutureWarning)
+            self.network = torch.jit.optimize_for_inference(torch.jit.trace(network, example))
+            self.network(example)  # Warm the TorchScript profiling executor
+        self.rng = np.random.default_rng(seed)
+        self.latencies = deque(maxlen=100000)
+        self.batch_sizes = deque(maxlen=100000)
+        self.observations = 0
+        self.busy_time = 0.0
+        self._queue = None
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    @classmethod
+    def from_registry(cls, name, model_manager=None, **kwargs):
+        """Load a model saved through ModelManager once and serve it."""
+        from models.model_manager import ModelManager
+        model_manager = model_manager or ModelManager()
+        return cls(model_manager.load_model(PPO, name), **kwargs)
+
+    def predict_batch(self, observations, deterministic=False):
+        """
+        Actions for a (batch, *obs_shape) array in one forward pass.
+        Args:
+            observations (np.ndarray): Stacked observations.
+            deterministic (bool or np.ndarray): Argmax instead of sampling, per batch or per row.
+        Returns:
+            np.ndarray: int64 actions, one per row.
+        """
+        start = time.perf_counter()
+        obs = torch.as_tensor(np.asarray(observations, dtype=np.float32).reshape((-1,) + self.obs_shape))
+        with torch.inference_mode():
+            logits = self.network(obs).numpy()
+        # Gumbel-max draws from the softmax distribution for the whole batch at once
+        gumbel = -np.log(-np.log(self.rng.random(logits.shape)))
+        sampled = np.argmax(logits + gumbel, axis=1)
+        actions = np.where(deterministic, np.argmax(logits, axis=1), sampled)
+        self.busy_time += time.perf_counter() - start
+        self.observations += len(actions)
+        self.batch_sizes.append(len(actions))
+        return actions
+
+    async def predict(self, observation, deterministic=False):
+        """Queue one observation for the next micro-batch and wait for its action."""
+        observation = np.asarray(observation, dtype=np.float32)
+        if observation.shape != self.obs_shape:
+            raise ValueError(f"Observation shape {observation.shape} does not match the policy's {self.obs_shape}")
+        if self._worker is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((observation, deterministic, future, time.perf_counter()))
+        return await future
+
+    def start(self):
+        """Start the micro-batching task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(requests) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    requests.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                observations = np.stack([request[0] for request in requests])
+                deterministic = np.array([request[1] for request in requests])
+                # Run the forward pass off the event loop so new requests keep queueing meanwhile
+                actions = await loop.run_in_executor(self._executor, self.predict_batch, observations, deterministic)
+            except Exception as error:
+                # Fail this batch's callers and keep serving later requests
+                for _, _, future, _ in requests:
+                    if not future.cancelled():
+                        future.set_exception(error)
+                continue
+            done = time.perf_counter()
+            for (_, _, future, submitted), action in zip(requests, actions):
+                self.latencies.append(done - submitted)
+                if not future.cancelled():
+                    future.set_result(int(action))
+
+    def metrics(self):
+        """Request latency percentiles (ms), batch sizes and throughput since startup."""
+        result = {
+            "observations": self.observations,
+            "batches": len(self.batch_sizes),
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "throughput_obs_per_sec": self.observations / self.busy_time if self.busy_time else 0.0
+        }
+        if self.latencies:
+            p50, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 99])
+            result.update({"latency_p50_ms": float(p50), "latency_p99_ms": float(p99)})
+        return result
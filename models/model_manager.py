@@ -1,25 +1,195 @@
 import os
 import json
-from stable_baselines3 import PPO
+import time
+import hashlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+# Loaded policies, shared by every ModelManager in the process: (save_dir, class, name) -> model
+_POLICY_CACHE = OrderedDict()
+
+def file_checksum(path):
+    """SHA-256 of a saved model file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def config_hash(config):
+    """Short stable hash of a config dict, stored with each model it trained."""
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:12]
 
 class ModelManager:
-    def __init__(self, save_dir="models/saved_models"):
+    """
+    Registry of saved models with an in-memory LRU cache of loaded policies.
+
+    registry.json in save_dir indexes every model (pair, version, training window, config hash,
+    metrics, checksum) so lookups never scan directories. Names are matched case-insensitively,
+    so "ppo_EURUSD_2025" finds models/saved_models/ppo_eurusd_2025/ppo_EURUSD_2025.zip.
+    Writes re-read registry.json under a lock file, so several processes (walk-forward or
+    tuning workers) can register models without losing each other's entries.
+    """
+
+    def __init__(self, save_dir="models/saved_models", cache_size=4):
         self.save_dir = save_dir
+        self.cache_size = cache_size
+        self.index_path = os.path.join(save_dir, "registry.json")
         os.makedirs(save_dir, exist_ok=True)
-    
-    def save_model(self, agent, name, metadata=None):
-        """Save agent model with metadata in its own folder."""
+        if os.path.exists(self.index_path):
+            self.index = self._read_index()
+        else:
+            self.index = self.rebuild_index()
+
+    def rebuild_index(self):
+        """
+        Index every <dir>/<name>.zip (and its _metadata.json) under save_dir and persist it.
+
+        Names that differ only in case (a legacy lowercase folder next to a newer save) resolve
+        to the most recently written zip.
+        """
+        index = {}
+        modified = {}
+        for folder in sorted(os.listdir(self.save_dir)):
+            model_dir = os.path.join(self.save_dir, folder)
+            if not os.path.isdir(model_dir):
+                continue
+            for file_name in sorted(os.listdir(model_dir)):
+                if not file_name.endswith(".zip"):
+                    continue
+                name = file_name[:-len(".zip")]
+                mtime = os.path.getmtime(os.path.join(model_dir, file_name))
+                if modified.get(name.lower(), -1.0) > mtime:
+                    continue
+                modified[name.lower()] = mtime
+                metadata_path = os.path.join(model_dir, f"{name}_metadata.json")
+                metadata = {}
+                if os.path.exists(metadata_path):
+                    with open(metadata_path) as f:
+                        metadata = json.load(f)
+                index[name.lower()] = self._entry(name, os.path.join(folder, file_name), metadata)
+        with self._index_lock():
+            self.index = index
+            self._write_index()
+        return index
+
+    def _entry(self, name, relative_path, metadata):
+        entry = {
+            "name": name,
+            "path": relative_path.replace(os.sep, "/"),
+            "pair": metadata.get("pair"),
+            "version": metadata.get("version", name.rsplit("_", 1)[-1]),
+            "train_start": metadata.get("train_start"),
+            "train_end": metadata.get("train_end"),
+            "config_hash": metadata.get("config_hash"),
+            "metrics": metadata.get("metrics", {}),
+            "sha256": file_checksum(os.path.join(self.save_dir, relative_path)),
+            "saved_at": metadata.get("saved_at", metadata.get("date"))
+        }
+        return entry
+
+    @contextmanager
+    def _index_lock(self, timeout=30.0):
+        """Exclusive lock on registry.json across processes (a lock file created with O_EXCL)."""
+        lock_path = f"{self.index_path}.lock"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not lock {self.index_path}; remove {lock_path} if no process holds it")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(lock_path)
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _write_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def save_model(self, agent, name, metadata=None, config=None):
+        """Save agent model with metadata in its own folder and register it."""
         model_dir = os.path.join(self.save_dir, name)
         os.makedirs(model_dir, exist_ok=True)  # Create folder if it doesn’t exist
-        path = os.path.join(model_dir, f"{name}.zip")
-        agent.save(path)
-        if metadata:
-            with open(os.path.join(model_dir, f"{name}_metadata.json"), "w") as f:
-                json.dump(metadata, f)
-    
-    def load_model(self, agent_class, name):
-        """Load model from its folder."""
-        path = os.path.join(self.save_dir, name, f"{name}.zip")
+        agent.save(os.path.join(model_dir, f"{name}.zip"))
+        return self.register_model(name, metadata=metadata, config=config)
+
+    def register_model(self, name, metadata=None, config=None):
+        """Register a model already saved as <save_dir>/<name>/<name>.zip (e.g. by a worker process)."""
+        model_dir = os.path.join(self.save_dir, name)
+        metadata = dict(metadata or {})
+        metadata.setdefault("saved_at", datetime.now().isoformat(timespec="seconds"))
+        if config is not None:
+            metadata["config_hash"] = config_hash(config)
+        with open(os.path.join(model_dir, f"{name}_metadata.json"), "w") as f:
+            json.dump(metadata, f)
+        key = name.lower()
+        entry = self._entry(name, os.path.join(name, f"{name}.zip"), metadata)
+        with self._index_lock():
+            # Merge into the registry as it is on disk now, not as this instance first read it
+            self.index = self._read_index()
+            self.index[key] = entry
+            self._write_index()
+        # Drop any policy cached from the file this save replaced
+        for cache_key in [k for k in _POLICY_CACHE if k[0] == os.path.abspath(self.save_dir) and k[2] == key]:
+            del _POLICY_CACHE[cache_key]
+        return self.index[key]
+
+    def resolve(self, name):
+        """Registry entry for a model name (case-insensitive)."""
+        entry = self.index.get(name.lower())
+        if entry is None:
+            # Another process may have registered it since this instance read the registry
+            self.index = self._read_index()
+            entry = self.index.get(name.lower())
+        if entry is None:
+            raise FileNotFoundError(f"Model {name} is not registered in {self.index_path}")
+        return entry
+
+    def model_path(self, name):
+        return os.path.join(self.save_dir, self.resolve(name)["path"])
+
+    def get(self, pair, version=None):
+        """Registry entry for a pair, at a given version or the most recently saved one."""
+        entries = [entry for entry in self.index.values() if entry["pair"] == pair]
+        if version is not None:
+            entries = [entry for entry in entries if str(entry["version"]) == str(version)]
+        if not entries:
+            raise FileNotFoundError(f"No model registered for pair={pair} version={version}")
+        return max(entries, key=lambda entry: entry["saved_at"] or "")
+
+    def load_model(self, agent_class, name, verify=False):
+        """Load model from its folder, serving repeat loads from the LRU cache."""
+        entry = self.resolve(name)
+        key = (os.path.abspath(self.save_dir), agent_class.__name__, entry["name"].lower())
+        if key in _POLICY_CACHE:
+            _POLICY_CACHE.move_to_end(key)
+            return _POLICY_CACHE[key]
+        path = os.path.join(self.save_dir, entry["path"])
         if not os.path.exists(path):
             raise FileNotFoundError(f"Model {path} not found")
-        return agent_class.load(path)
\ No newline at end of file
+        if verify and file_checksum(path) != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for {path}; the file changed since it was registered")
+        model = agent_class.load(path)
+        _POLICY_CACHE[key] = model
+        while len(_POLICY_CACHE) > self.cache_size:
+            _POLICY_CACHE.popitem(last=False)
+        return model
+
+    def load_agent(self, agent, name, verify=False):
+        """Point an agent wrapper (e.g. PPOAgent) at a cached policy instead of reloading the zip."""
+        agent.model = self.load_model(type(agent.model), name, verify=verify)
+        return agent
@@ -0,0 +1,103 @@
+# Unified command-line entry point: python pipsentry.py <command> [options]
+#
+# Only the standard library is imported at module level. Each command imports what it needs, so
+# `--help` and the data commands never load torch, stable-baselines3 or matplotlib, and worker
+# processes that re-import __main__ start fast.
+import argparse
+
+# Commands that forward their remaining arguments to an existing module's own parser
+PASSTHROUGH = {
+    "sweep": ("backtesting.sweep", "Parallel backtest parameter sweep"),
+    "walk-forward": ("backtesting.walk_forward", "Walk-forward PPO training and out-of-sample backtest"),
+    "monte-carlo": ("backtesting.monte_carlo", "Monte Carlo robustness test of a backtest trade log"),
+    "tune": ("agents.tuning", "Parallel PPO hyperparameter search with pruning and resume"),
+    "live": ("live_trading", "Live trading through the replay broker")
+}
+
+def cmd_fetch(args):
+    from data.data_fetcher import fetch_forex_data
+    data = fetch_forex_data(args.pair, args.timeframe, args.start, args.end, args.data_dir)
+    print(data.head())
+    print(f"Loaded {len(data)} rows of {args.pair} {args.timeframe} data.")
+
+def cmd_preprocess(args):
+    from data.economic_calendar import load_calendar
+    from data.preprocessor import load_forex_data
+    from utils.config import load_config
+    data = load_forex_data(
+        args.pair, args.timeframe, args.start, args.end, args.data_dir,
+        use_cache=not args.no_cache, calendar=load_calendar(load_config(args.config))
+    )
+    print(data.head())
+    print(f"Preprocessed {len(data)} rows with indicators.")
+
+def cmd_train(args):
+    from main import run
+    run("train", args.config)
+
+def cmd_test(args):
+    from main import run
+    run("test", args.config)
+
+def cmd_backtest(args):
+    from backtest import run_backtest
+    from utils.config import load_config
+    run_backtest(
+        args.pair, args.model, use_rule_based=args.rule_based, vectorized=args.vectorized,
+        config=load_config(args.config), plot=not args.no_plot
+    )
+
+def _add_data_arguments(parser):
+    parser.add_argument("--pair", default="EURUSD")
+    parser.add_argument("--timeframe", default="1H")
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--end", default="2025-04-12")
+    parser.add_argument("--data-dir", default="data")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pipsentry", description="PipSentry Forex Trading Bot")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    fetch = commands.add_parser("fetch", help="Load and summarize a raw CSV export")
+    _add_data_arguments(fetch)
+    fetch.set_defaults(handler=cmd_fetch)
+
+    preprocess = commands.add_parser("preprocess", help="Add indicators and fill the preprocessed-data cache")
+    _add_data_arguments(preprocess)
+    preprocess.add_argument("--config", default="config.yaml")
+    preprocess.add_argument("--no-cache", action="store_true", help="Rebuild without reading or writing the cache")
+    preprocess.set_defaults(handler=cmd_preprocess)
+
+    for name, handler, summary in [("train", cmd_train, "Train the PPO agent"), ("test", cmd_test, "Replay the saved PPO model")]:
+        command = commands.add_parser(name, help=summary)
+        command.add_argument("--config", default="config.yaml")
+        command.set_defaults(handler=handler)
+
+    backtest = commands.add_parser("backtest", help="Backtest the PPO model or the rule-based agent on 2025 data")
+    backtest.add_argument("--pair", default="EURUSD")
+    backtest.add_argument("--model", default="ppo_EURUSD_2025")
+    backtest.add_argument("--rule-based", action="store_true", help="Use the sma20/sma50 crossover agent")
+    backtest.add_argument("--vectorized", action="store_true", help="Replay rule-based signals with the batch engine")
+    backtest.add_argument("--no-plot", action="store_true", help="Skip the price/trade plots (matplotlib is not loaded)")
+    backtest.add_argument("--config", default="config.yaml")
+    backtest.set_defaults(handler=cmd_backtest)
+
+    for name, (module, summary) in PASSTHROUGH.items():
+        # No own --help: `pipsentry sweep --help` shows the module's options
+        command = commands.add_parser(name, help=summary, add_help=False)
+        command.set_defaults(module=module)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if args.command in PASSTHROUGH:
+        import importlib
+        importlib.import_module(args.module).main(rest)
+        return
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Base class for strategies that compute signals for a whole frame at once
+from abc import abstractmethod
+import numpy as np
+from agents.base_agent import BaseAgent
+from backtesting.vectorized import run_parity
+
+def _blocked_positions(targets, blocked):
+    """Position path when opens are skipped on blocked bars; one iteration per run of equal targets."""
+    position = np.zeros(len(targets), dtype=np.int64)
+    changes = np.flatnonzero(np.diff(targets)) + 1
+    bounds = np.concatenate(([0], changes, [len(targets)]))
+    holding = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        target = targets[start]
+        if target == 0:
+            holding = 0
+            continue
+        if holding != 0:
+            start += 1  # Reversal: this bar closes the old side
+        # Enter on the first unblocked bar of the run, if any
+        free = np.flatnonzero(~blocked[start:end])
+        if len(free):
+            position[start + free[0]:end] = target
+            holding = target
+        else:
+            holding = 0
+    return position
+
+def targets_to_actions(targets, blocked=None):
+    """
+    ForexEnv actions that follow a target position path (1 long, -1 short, 0 flat).
+
+    The env opens or closes one position per step, so a reversal closes on the bar the target
+    flips and opens the new side on the next bar. Along a run of consecutive flips the position
+    is therefore flat at every other bar, which run_parity() finds without a Python loop.
+    With blocked (e.g. news_blackout), entries wait for the first unblocked bar.
+    """
+    targets = np.asarray(targets, dtype=np.int64)
+    if blocked is not None and np.any(blocked):
+        position = _blocked_positions(targets, np.asarray(blocked, dtype=bool))
+    else:
+        previous_target = np.concatenate(([0], targets[:-1]))
+        flip = (targets != 0) & (previous_target == -targets)
+        position = np.where(run_parity(flip), 0, targets)
+    previous = np.concatenate(([0], position[:-1]))
+    actions = np.zeros(len(targets), dtype=np.int64)
+    opening = (previous == 0) & (position != 0)
+    closing = (previous != 0) & (position == 0)
+    actions[opening] = np.where(position[opening] == 1, 1, 2)  # Buy opens a long, sell a short
+    actions[closing] = np.where(previous[closing] == 1, 2, 1)  # Sell closes a long, buy a short
+    return actions
+
+def hold_between(events):
+    """Forward-fill a float array of events (1, -1, 0; NaN = no event) into an int target path."""
+    events = np.asarray(events, dtype=np.float64)
+    steps = np.arange(len(events))
+    last = np.maximum.accumulate(np.where(np.isnan(events), -1, steps))
+    targets = np.zeros(len(events), dtype=np.int64)
+    targets[last >= 0] = events[last[last >= 0]]
+    return targets
+
+class BaseStrategy(BaseAgent):
+    """
+    Strategy that computes its target position for every bar of a frame in one pass.
+
+    targets() is the only method to implement. batch_actions() turns targets into ForexEnv
+    actions for the vectorized engine; predict() serves step-by-step loops from the same
+    precomputed targets and the env's current position, without touching the frame per bar.
+    """
+
+    def __init__(self, env=None):
+        self.env = env
+        self._targets = None
+        self._targets_data = None
+
+    @abstractmethod
+    def targets(self, data):
+        """Target position per bar of a preprocessed frame: 1 long, -1 short, 0 flat."""
+        pass
+
+    def batch_actions(self, data):
+        """Actions predict() would take on every bar of data, computed in one pass."""
+        blocked = data["news_blackout"].to_numpy(dtype=bool) if "news_blackout" in data else None
+        return targets_to_actions(self.targets(data), blocked)
+
+    def predict(self, state, deterministic=False):
+        if self._targets_data is not self.env.data:
+            self._targets = self.targets(self.env.data)
+            self._targets_data = self.env.data
+        target = self._targets[self.env.current_step]
+        position = self.env.position
+        if position == target:
+            return 0  # Hold
+        if position != 0:
+            return 2 if position == 1 else 1  # Close before (possibly) reversing next bar
+        return 1 if target == 1 else 2
+
+    def train(self, env, timesteps):
+        pass  # No training
+
+    def save(self, path):
+        pass
+
+    def load(self, path):
+        pass
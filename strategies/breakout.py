@@ -1 +1,39 @@
 # Breakout strategies (e.g., pivot points)
+import numpy as np
+from strategies.base_strategy import BaseStrategy, hold_between
+
+class DonchianBreakout(BaseStrategy):
+    """
+    Channel breakout: long on a close above the prior window's high, short below its low.
+
+    Positions are held until the opposite breakout, or until the close crosses the shorter
+    exit_window channel against the position when exit_window is set.
+    Args:
+        env (ForexEnv): Env whose data predict() reads, None for batch use only.
+        window (int): Bars in the entry channel.
+        exit_window (int): Bars in the exit channel, None to only stop and reverse.
+        allow_short (bool): Trade downside breakouts (otherwise they just exit longs).
+    """
+
+    def __init__(self, env=None, window=20, exit_window=None, allow_short=True):
+        super().__init__(env)
+        self.window = window
+        self.exit_window = exit_window
+        self.allow_short = allow_short
+
+    def targets(self, data):
+        close = data["close"].to_numpy()
+        # Channels use the bars before the current one, so a bar can break its own channel
+        high = data["high"].rolling(self.window).max().shift(1).to_numpy()
+        low = data["low"].rolling(self.window).min().shift(1).to_numpy()
+        conditions = [close > high, close < low]
+        values = [1.0, -1.0 if self.allow_short else 0.0]
+        events = np.select(conditions, values, default=np.nan)
+        if self.exit_window:
+            exit_high = data["high"].rolling(self.exit_window).max().shift(1).to_numpy()
+            exit_low = data["low"].rolling(self.exit_window).min().shift(1).to_numpy()
+            # Exits only apply to the position they close, so resolve entries first
+            held = hold_between(events)
+            exits = ((held == 1) & (close < exit_low)) | ((held == -1) & (close > exit_high))
+            events = np.where(np.isnan(events) & exits, 0.0, events)
+        return hold_between(events)
@@ -1 +1,63 @@
 # Combine multiple agents/strategies
+import numpy as np
+from environments.forex_env import FEATURE_COLUMNS, normalize_features
+from strategies.base_strategy import BaseStrategy
+
+class PolicySignalStrategy(BaseStrategy):
+    """
+    Signals from an RL policy, evaluated for every bar in one batched forward pass.
+
+    The policy sees each bar as a flat account at its initial balance, so its action reads as
+    "what would I open here": 1 long, 2 short, 0 stay out. That makes the policy usable as an
+    ensemble member next to rule strategies; it is not the policy's own step-by-step trading.
+    Args:
+        agent: Agent with an SB3 model (PPOAgent, A2CAgent, DDPGAgent).
+        env (ForexEnv): Env whose data predict() reads, None for batch use only.
+        deterministic (bool): Greedy actions instead of sampling.
+    """
+
+    def __init__(self, agent, env=None, deterministic=True):
+        super().__init__(env)
+        self.agent = agent
+        self.deterministic = deterministic
+
+    def observations(self, data):
+        obs = np.empty((len(data), len(FEATURE_COLUMNS) + 2), dtype=np.float32)
+        obs[:, :len(FEATURE_COLUMNS)] = normalize_features(data[FEATURE_COLUMNS].to_numpy(dtype=np.float32, copy=True))
+        obs[:, -2] = 1.0  # Balance at its initial value
+        obs[:, -1] = 0.5  # Flat
+        return obs
+
+    def targets(self, data):
+        actions, _ = self.agent.model.predict(self.observations(data), deterministic=self.deterministic)
+        actions = self.agent.to_discrete(actions) if hasattr(self.agent, "to_discrete") else np.asarray(actions)
+        return np.select([actions == 1, actions == 2], [1, -1], default=0).astype(np.int64)
+
+class EnsembleStrategy(BaseStrategy):
+    """
+    Weighted vote over member strategies' target positions.
+
+    Every member is evaluated once over the whole frame; the (members x bars) target matrix is
+    reduced to a score in [-1, 1] and the ensemble goes long (short) where the score is above
+    threshold (below -threshold). Equal weights with threshold 0.5 is a strict majority vote.
+    Args:
+        strategies (list): BaseStrategy members (rule strategies, PolicySignalStrategy, ensembles).
+        env (ForexEnv): Env whose data predict() reads, None for batch use only.
+        weights (list): Member weights, equal if None.
+        threshold (float): Score a side must exceed to be taken.
+    """
+
+    def __init__(self, strategies, env=None, weights=None, threshold=0.5):
+        super().__init__(env)
+        self.strategies = strategies
+        weights = np.ones(len(strategies)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.weights = weights / np.abs(weights).sum()
+        self.threshold = threshold
+
+    def member_targets(self, data):
+        """(members, bars) matrix of each member's target positions."""
+        return np.stack([strategy.targets(data) for strategy in self.strategies])
+
+    def targets(self, data):
+        score = self.weights @ self.member_targets(data)
+        return np.select([score > self.threshold, score < -self.threshold], [1, -1], default=0).astype(np.int64)
@@ -1 +1,34 @@
 # Range strategies (e.g., RSI-based)
+import numpy as np
+from strategies.base_strategy import BaseStrategy, hold_between
+
+class RSIMeanReversion(BaseStrategy):
+    """
+    Buy oversold, sell overbought, and exit when RSI crosses back through exit_level.
+    Args:
+        env (ForexEnv): Env whose data predict() reads, None for batch use only.
+        lower (float): RSI below which to go long.
+        upper (float): RSI above which to go short (or exit a long when allow_short is False).
+        exit_level (float): RSI level whose crossing closes the position.
+        allow_short (bool): Take the overbought side too.
+    """
+
+    def __init__(self, env=None, lower=30, upper=70, exit_level=50, allow_short=True):
+        super().__init__(env)
+        self.lower = lower
+        self.upper = upper
+        self.exit_level = exit_level
+        self.allow_short = allow_short
+
+    def targets(self, data):
+        rsi = data["rsi"].to_numpy()
+        side = np.sign(rsi - self.exit_level)
+        crossed = np.concatenate(([False], side[1:] != side[:-1]))
+        # Entries win over an exit on the same bar; a long can only reach an upward cross of the
+        # exit level (and a short a downward one), so any crossing closes whatever is open
+        events = np.select(
+            [rsi < self.lower, rsi > self.upper, crossed],
+            [1.0, -1.0 if self.allow_short else 0.0, 0.0],
+            default=np.nan
+        )
+        return hold_between(events)
@@ -1 +1,31 @@
 # Trend strategies (e.g., MA crossover)
+import numpy as np
+from strategies.base_strategy import BaseStrategy, hold_between, targets_to_actions
+
+def crossover_targets(fast, slow, allow_short=False):
+    """Long while fast > slow; flat (or short) while below; unchanged on a tie or while either is NaN."""
+    below = -1.0 if allow_short else 0.0
+    return hold_between(np.where(fast > slow, 1.0, np.where(fast < slow, below, np.nan)))
+
+def crossover_actions(fast, slow):
+    """Long-only MA crossover actions: buy when fast crosses above slow, sell when it crosses below."""
+    return targets_to_actions(crossover_targets(fast, slow))
+
+class MovingAverageCrossover(BaseStrategy):
+    """
+    Moving-average crossover on two precomputed columns.
+    Args:
+        env (ForexEnv): Env whose data predict() reads, None for batch use only.
+        fast (str): Fast average column.
+        slow (str): Slow average column.
+        allow_short (bool): Go short while fast < slow instead of staying flat.
+    """
+
+    def __init__(self, env=None, fast="sma20", slow="sma50", allow_short=False):
+        super().__init__(env)
+        self.fast = fast
+        self.slow = slow
+        self.allow_short = allow_short
+
+    def targets(self, data):
+        return crossover_targets(data[self.fast].to_numpy(), data[self.slow].to_numpy(), self.allow_short)
@@ -0,0 +1,44 @@
+# Unit tests for the backtest engines
+import numpy as np
+import pytest
+from benchmarks.synthetic import synthetic_frame
+from backtesting.vectorized import simulate
+from environments.forex_env import ForexEnv
+from utils.prop_firm_rules import RuleSet
+
+@pytest.fixture(scope="module")
+def data():
+    return synthetic_frame(500, seed=2)
+
+def replay(data, actions, rules):
+    """Step ForexEnv through actions like run_backtest, stopping once passed."""
+    env = ForexEnv(data=data, rules=rules)
+    env.reset()
+    balance, equity = [], []
+    done = False
+    while not done:
+        _, _, done, _, info = env.step(int(actions[env.current_step]))
+        balance.append(info["balance"])
+        equity.append(info["equity"])
+        done = done or info["passed"]
+    return np.array(balance), np.array(equity), info, env.tracker.breached
+
+@pytest.mark.parametrize("seed,p_signal", [(0, 0.05), (1, 0.3), (2, 0.8)])
+def test_simulate_matches_forex_env(data, seed, p_signal):
+    rng = np.random.default_rng(seed)
+    actions = np.where(rng.random(len(data)) < p_signal, rng.integers(1, 3, len(data)), 0)
+    rules = RuleSet(profit_target=0.02, daily_loss_limit=0.01, max_drawdown=0.03, min_trading_days=2)
+    balance, equity, info, breached = replay(data, actions, rules)
+    result = simulate(data["close"].to_numpy(), rules.day_numbers(data.index), actions, rules=rules)
+    assert result["end_step"] == len(balance) - 1
+    np.testing.assert_allclose(result["balance"], balance)
+    np.testing.assert_allclose(result["equity"], equity)
+    assert result["trading_days"] == info["trading_days"]
+    assert result["breach"] == breached
+
+def test_simulate_without_signals(data):
+    result = simulate(data["close"].to_numpy(), np.zeros(len(data), dtype=np.int64), np.zeros(len(data)))
+    assert result["end_step"] == len(data) - 2
+    assert len(result["profit"]) == 0
+    assert result["balance"][-1] == 10000
+    assert result["open_position_step"] == -1
@@ -1 +1,75 @@
 # Unit tests for environments
+import numpy as np
+import pytest
+from benchmarks.synthetic import synthetic_frame
+from environments.forex_env import ForexEnv
+
+@pytest.fixture(scope="module")
+def data():
+    return synthetic_frame(600, seed=1)
+
+def test_observation_matches_frame_row(data):
+    env = ForexEnv(data=data)
+    state, _ = env.reset()
+    for action in [1, 0, 0, 2, 2, 0]:
+        row = data.iloc[env.current_step]
+        expected = np.array([
+            (row["open"] - 1.0) / 0.2, (row["high"] - 1.0) / 0.2, (row["low"] - 1.0) / 0.2, (row["close"] - 1.0) / 0.2,
+            row["rsi"] / 100.0, row["macd"] / 0.01, row["signal"] / 0.01, row["atr"] / 0.001,
+            env.balance / env.initial_balance, (env.position + 1) / 2
+        ], dtype=np.float32)
+        np.testing.assert_allclose(state, expected, rtol=1e-6)
+        state, _, _, _, _ = env.step(action)
+
+def test_terminal_observation_is_not_the_reset_buffer(data):
+    env = ForexEnv(data=data.iloc[:20])
+    env.reset()
+    done = False
+    while not done:
+        state, _, done, _, _ = env.step(0)
+    terminal = state.copy()
+    reset_state, _ = env.reset()
+    assert state is not reset_state
+    np.testing.assert_array_equal(state, terminal)
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_portfolio_env_with_one_pair_matches_forex_env(data, seed):
+    from environments.pair_specific_env import PortfolioEnv
+    actions = np.random.default_rng(seed).integers(0, 3, 200)
+    single = ForexEnv(data=data, daily_loss_limit=0.01, max_drawdown=0.02)
+    portfolio = PortfolioEnv({"EURUSD": data}, daily_loss_limit=0.01, max_drawdown=0.02)
+    state, _ = single.reset()
+    portfolio_state, _ = portfolio.reset()
+    np.testing.assert_allclose(portfolio_state, state, rtol=1e-6)
+    for action in actions:
+        state, reward, done, _, info = single.step(int(action))
+        portfolio_state, portfolio_reward, portfolio_done, _, portfolio_info = portfolio.step([action])
+        np.testing.assert_allclose(portfolio_state, state, rtol=1e-6)
+        assert portfolio_reward == pytest.approx(reward)
+        assert portfolio_done == done
+        for key in ["balance", "equity", "drawdown", "passed", "trading_days"]:
+            assert portfolio_info[key] == pytest.approx(info[key])
+        if done:
+            break
+
+def test_portfolio_env_records_one_step_row_per_pair(data):
+    from environments.pair_specific_env import PortfolioEnv
+    from utils.logger import STEP, EventRecorder
+    actions = np.random.default_rng(3).integers(0, 3, (50, 2))
+    single = ForexEnv(data=data, recorder=EventRecorder(level="steps"))
+    portfolio = PortfolioEnv({"EURUSD": data, "GBPUSD": data}, recorder=EventRecorder(level="steps"))
+    single.reset()
+    portfolio.reset()
+    for action in actions:
+        single.step(int(action[0]))
+        portfolio.step(action)
+    events = portfolio.recorder.events()
+    steps = events[events["kind"] == STEP]
+    assert len(steps) == 2 * len(actions)
+    np.testing.assert_array_equal(steps["pair"], np.tile([0, 1], len(actions)))
+    np.testing.assert_array_equal(steps["action"].reshape(-1, 2), actions)
+    single_events = single.recorder.events()
+    single_steps = single_events[single_events["kind"] == STEP]
+    np.testing.assert_array_equal(steps["step"][::2], single_steps["step"])
+    np.testing.assert_allclose(steps["price"][::2], single_steps["price"])
+    np.testing.assert_allclose(steps["price"][1::2], single_steps["price"])
@@ -0,0 +1,23 @@
+# Unit tests for the incremental indicator engine
+import numpy as np
+import talib
+from benchmarks.synthetic import synthetic_ohlc
+from data.indicators import IndicatorEngine
+
+def test_indicator_engine_matches_talib():
+    df = synthetic_ohlc(1500, seed=3)
+    close, high, low = df["close"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy()
+    macd, signal, _ = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    expected = {
+        "sma20": talib.SMA(close, timeperiod=20),
+        "sma50": talib.SMA(close, timeperiod=50),
+        "rsi": talib.RSI(close, timeperiod=14),
+        "macd": macd,
+        "signal": signal,
+        "atr": talib.ATR(high, low, close, timeperiod=14)
+    }
+    result = IndicatorEngine().run(df)
+    for column, values in expected.items():
+        actual = result[column].to_numpy()
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(values), err_msg=column)
+        np.testing.assert_allclose(actual, values, rtol=0, atol=1e-10, equal_nan=True, err_msg=column)
@@ -0,0 +1,29 @@
+# Unit tests for the event recorder
+import json
+import pytest
+from utils.logger import CLOSE, OPEN, EventRecorder
+
+def test_events_are_written_on_close(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    recorder = EventRecorder(path=path, capacity=2)
+    for step in range(3):
+        recorder.record(OPEN if step % 2 == 0 else CLOSE, step, action=1, price=1.1)
+    recorder.close()
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    assert [event["step"] for event in events] == [0, 1, 2]
+    assert [event["kind"] for event in events] == ["open", "close", "open"]
+
+def test_writer_error_is_raised_on_close(tmp_path):
+    # The path is a directory, so the writer thread fails on its first batch
+    recorder = EventRecorder(path=str(tmp_path), capacity=4)
+    recorder.record(OPEN, 0)
+    with pytest.raises(IsADirectoryError):
+        recorder.close()
+
+def test_writer_error_is_raised_on_flush(tmp_path):
+    recorder = EventRecorder(path=str(tmp_path), capacity=1)
+    recorder.record(OPEN, 0)
+    recorder._thread.join(timeout=5)
+    with pytest.raises(IsADirectoryError):
+        recorder.flush()
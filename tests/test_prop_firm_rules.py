@@ -0,0 +1,63 @@
+# Unit tests for the prop-firm rule engine
+import numpy as np
+import pytest
+from backtesting.monte_carlo import monte_carlo
+from utils.prop_firm_rules import RuleSet, RuleTracker, evaluate_curve
+
+def random_curve(seed, n_steps=400, initial_balance=10000):
+    """Per-step day numbers, balance, equity, realized PnL and trade flags of a random account."""
+    rng = np.random.default_rng(seed)
+    day = np.cumsum(rng.random(n_steps) < 0.05)
+    traded = rng.random(n_steps) < 0.1
+    realized = np.where(traded, rng.normal(0.0, 60.0, n_steps), 0.0)
+    balance = initial_balance + np.cumsum(realized)
+    equity = balance + rng.normal(0.0, 40.0, n_steps)
+    return day, balance, equity, realized, traded
+
+@pytest.mark.parametrize("basis", ["realized", "equity"])
+@pytest.mark.parametrize("drawdown_type", ["trailing", "static"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_evaluate_curve_matches_tracker(basis, drawdown_type, seed):
+    rules = RuleSet(profit_target=0.02, daily_loss_limit=0.01, max_drawdown=0.02, min_trading_days=3,
+                    daily_loss_basis=basis, drawdown_type=drawdown_type)
+    day, balance, equity, realized, traded = random_curve(seed)
+    status = evaluate_curve(rules, 10000, day, balance, equity, realized, traded)
+    tracker = RuleTracker(rules, 10000)
+    for step in range(len(day)):
+        breach = tracker.update(day[step], balance[step], equity[step], realized[step], traded[step])
+        assert breach == status["breach"][step]
+        assert tracker.passed == status["passed"][step]
+        assert tracker.trading_days == status["trading_days"][step]
+        assert tracker.drawdown == pytest.approx(status["drawdown"][step])
+        assert tracker.daily_loss == pytest.approx(status["daily_loss"][step])
+
+def replay_trades(rules, profits, day, initial_balance=10000):
+    """Feed a trade log through RuleTracker and return (breach, passed, trading_days, trades) at its end."""
+    tracker = RuleTracker(rules, initial_balance)
+    balance = initial_balance
+    for k, profit in enumerate(profits):
+        # A flat bar on the trade's day rolls the tracker over, then the close lands on that day
+        tracker.update(day[k], balance, balance)
+        balance += profit
+        if tracker.update(day[k], balance, balance, profit, True):
+            return True, False, tracker.trading_days, k + 1
+        if tracker.passed:
+            return False, True, tracker.trading_days, k + 1
+    return False, False, tracker.trading_days, len(profits)
+
+@pytest.mark.parametrize("drawdown_type", ["trailing", "static"])
+@pytest.mark.parametrize("seed", range(8))
+def test_monte_carlo_without_resampling_matches_tracker(drawdown_type, seed):
+    rules = RuleSet(profit_target=0.03, daily_loss_limit=0.015, max_drawdown=0.03, min_trading_days=3,
+                    drawdown_type=drawdown_type)
+    # Random lengths and drifts cover logs ending in a breach, a pass and neither
+    rng = np.random.default_rng(seed)
+    n_trades = rng.integers(5, 60)
+    profits = rng.normal(rng.uniform(-5.0, 25.0), 50.0, n_trades)
+    day = np.cumsum(rng.random(n_trades) < 0.3)
+    outcome = monte_carlo(profits, day, rules, 10000, n_sims=1, method="none").iloc[0]
+    breach, passed, trading_days, trades = replay_trades(rules, profits, day)
+    assert bool(outcome["breach"]) == breach
+    assert bool(outcome["passed"]) == passed
+    assert outcome["trading_days"] == trading_days
+    assert outcome["trades"] == trades
@@ -1 +1,47 @@
 # Unit tests for strategies
+import numpy as np
+import pytest
+from benchmarks.synthetic import synthetic_frame
+from environments.forex_env import ForexEnv
+from strategies.breakout import DonchianBreakout
+from strategies.ensemble_strategy import EnsembleStrategy
+from strategies.mean_reversion import RSIMeanReversion
+from strategies.trend_following import MovingAverageCrossover
+
+STRATEGIES = {
+    "crossover": lambda: MovingAverageCrossover(),
+    "crossover_short": lambda: MovingAverageCrossover(allow_short=True),
+    "rsi": lambda: RSIMeanReversion(),
+    "donchian": lambda: DonchianBreakout(window=10, exit_window=5),
+    "ensemble": lambda: EnsembleStrategy([MovingAverageCrossover(allow_short=True), RSIMeanReversion(), DonchianBreakout()])
+}
+
+@pytest.fixture(scope="module", params=[False, True], ids=["plain", "news_blackout"])
+def data(request):
+    data = synthetic_frame(1000, seed=4)
+    if request.param:
+        # Blackout windows of a few bars every ~50 bars
+        blocked = np.zeros(len(data), dtype=bool)
+        for start in np.random.default_rng(4).integers(0, len(data) - 5, 20):
+            blocked[start:start + 4] = True
+        data = data.assign(news_blackout=blocked)
+    return data
+
+@pytest.mark.parametrize("name", sorted(STRATEGIES))
+def test_step_actions_match_batch_actions(data, name):
+    strategy = STRATEGIES[name]()
+    expected = strategy.batch_actions(data)
+    # Loose limits so the episode runs over every bar
+    env = ForexEnv(data=data, daily_loss_limit=1.0, max_drawdown=1.0)
+    strategy.env = env
+    blocked = data["news_blackout"].to_numpy() if "news_blackout" in data else np.zeros(len(data), dtype=bool)
+    state, _ = env.reset()
+    actions = []
+    done = False
+    while not done:
+        action = strategy.predict(state)
+        # Record what the env carries out: opens on blackout bars are skipped
+        actions.append(0 if env.position == 0 and blocked[env.current_step] else action)
+        state, _, done, _, _ = env.step(action)
+    np.testing.assert_array_equal(actions, expected[:len(actions)])
+    assert np.count_nonzero(actions) > 0
@@ -0,0 +1,106 @@
+# Unit tests for the PPO hyperparameter search
+import numpy as np
+import pytest
+from agents import tuning
+from agents.tuning import COMPLETE, FAILED, PRUNED, QUEUED, RUNNING, MedianPruner, TrialStore, ValidationMonitor
+
+def record(number, values, state=COMPLETE):
+    return {"number": number, "params": {}, "state": state, "values": values, "timesteps": 0, "value": None}
+
+@pytest.fixture
+def store(tmp_path):
+    store = TrialStore(str(tmp_path / "trials"))
+    # The k-th values of the other trials: medians 2.0 at k=0 and 5.0 at k=1
+    for number, values in enumerate([[1.0, 4.0], [2.0, 5.0], [3.0, 6.0], [9.0]]):
+        store.save(record(number, values))
+    return store
+
+def test_prune_below_kth_median(store):
+    pruner = MedianPruner(n_startup_trials=3, n_warmup_evals=1)
+    assert pruner.should_prune(store, 10, [1.5])
+    assert not pruner.should_prune(store, 10, [2.5])
+    assert pruner.should_prune(store, 10, [9.0, 4.5])
+    assert not pruner.should_prune(store, 10, [0.0, 5.0])
+
+def test_prune_ignores_own_record(store):
+    # Trial 0's own values do not count: the median of the other three k=0 values is 3.0
+    assert MedianPruner(n_startup_trials=3, n_warmup_evals=1).should_prune(store, 0, [2.5])
+
+def test_startup_trials_gate_pruning(store):
+    # Only three other trials reach k=1
+    assert not MedianPruner(n_startup_trials=4, n_warmup_evals=1).should_prune(store, 10, [9.0, -100.0])
+    assert MedianPruner(n_startup_trials=4, n_warmup_evals=1).should_prune(store, 10, [-100.0])
+
+def test_warmup_evals_gate_pruning(store):
+    pruner = MedianPruner(n_startup_trials=1, n_warmup_evals=2)
+    assert not pruner.should_prune(store, 10, [-100.0])
+    assert pruner.should_prune(store, 10, [-100.0, -100.0])
+
+def test_pending_skips_finished_trials(tmp_path):
+    store = TrialStore(str(tmp_path))
+    for number, state in enumerate([COMPLETE, PRUNED, FAILED, QUEUED, RUNNING, QUEUED]):
+        store.save(record(number, [], state))
+    assert store.pending(5) == [3, 4]
+
+class FakeModel:
+    def save(self, path):
+        open(path, "wb").close()
+
+def test_final_evaluation_is_never_pruned(store, monkeypatch):
+    monkeypatch.setattr(tuning, "validation_score", lambda model, data, env_kwargs: -100.0)
+    pruner = MedianPruner(n_startup_trials=1, n_warmup_evals=1)
+    trial = record(10, [], RUNNING)
+    monitor = ValidationMonitor(trial, store, pruner, None, {}, eval_interval=100, timesteps=200)
+    assert monitor.on_step(FakeModel(), 99)
+    assert monitor.on_step(FakeModel(), 200)
+    assert not monitor.pruned and trial["values"] == [-100.0] and trial["timesteps"] == 200
+
+    trial = record(11, [], RUNNING)
+    monitor = ValidationMonitor(trial, store, pruner, None, {}, eval_interval=100, timesteps=300)
+    assert not monitor.on_step(FakeModel(), 100)
+    assert monitor.pruned and store.load(11)["state"] == PRUNED
+
+class Killed(BaseException):
+    """Stands in for the worker process dying; _run_trial only catches Exception."""
+
+def test_interrupted_trial_resumes_from_checkpoint(tmp_path, monkeypatch):
+    from benchmarks.synthetic import synthetic_frame
+    from backtesting.walk_forward import init_worker
+    from utils.shared_arrays import release_arrays, share_arrays
+
+    data = synthetic_frame(600, seed=5)
+    handles, spec = share_arrays({
+        "values": data.to_numpy(dtype=np.float64),
+        "index": np.asarray(data.index, dtype="datetime64[ns]")
+    })
+    try:
+        init_worker(spec, list(data.columns), 1)
+        store = TrialStore(str(tmp_path))
+        store.save(record(0, [], QUEUED) | {"params": {"n_steps": 64, "batch_size": 32, "n_epochs": 1}})
+        settings = {
+            "storage": str(tmp_path), "env_kwargs": {"daily_loss_limit": 1.0, "max_drawdown": 1.0},
+            "timesteps": 256, "eval_interval": 128, "n_startup_trials": 100, "n_warmup_evals": 1,
+            "n_envs": 1, "seed": 0, "ranges": (0, 450, len(data))
+        }
+        scores = iter([1.0, 2.0])
+
+        def killed_after_first(model, data, env_kwargs):
+            score = next(scores)
+            if score == 2.0:
+                raise Killed()
+            return score
+
+        monkeypatch.setattr(tuning, "validation_score", killed_after_first)
+        with pytest.raises(Killed):
+            tuning._run_trial((0, settings))
+        interrupted = store.load(0)
+        assert interrupted["state"] == RUNNING
+        assert interrupted["values"] == [1.0] and interrupted["timesteps"] == 128
+
+        monkeypatch.setattr(tuning, "validation_score", lambda model, data, env_kwargs: 3.0)
+        trial = tuning._run_trial((0, settings))
+        assert trial["state"] == COMPLETE
+        assert trial["values"] == [1.0, 3.0]
+        assert trial["timesteps"] == 256
+    finally:
+        release_arrays(handles, unlink=True)
@@ -16,8 +16,15 @@ DEFAULT_CONFIG = {
         "max_drawdown": 0.10,
         "min_trading_days": 5
     },
+    "firm": None,
     "agent": {
         "learning_rate": 0.0001,
-        "timesteps": 100000
+        "timesteps": 100000,
+        "n_envs": 8,
+        "vec_env": "subproc"
+    },
+    "events": {
+        "level": "trades",
+        "format": "jsonl"
     }
 }
\ No newline at end of file
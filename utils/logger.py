@@ -1 +1,120 @@
 # Logging trades, performance, errors
+import json
+import os
+import queue
+import threading
+import numpy as np
+
+# Verbosity levels: QUIET records nothing, TRADES fills/breaches, STEPS also every step
+QUIET, TRADES, STEPS = 0, 1, 2
+LEVELS = {"quiet": QUIET, "trades": TRADES, "steps": STEPS}
+
+EVENT_KINDS = ["step", "open", "close", "breach"]
+STEP, OPEN, CLOSE, BREACH = range(len(EVENT_KINDS))
+
+EVENT_DTYPE = np.dtype([
+    ("step", np.int64), ("kind", np.int8), ("action", np.int8), ("price", np.float64),
+    ("profit", np.float64), ("reward", np.float64), ("balance", np.float64), ("equity", np.float64),
+    ("pair", np.int16)  # Column of the pair in a PortfolioEnv, 0 for single-pair envs
+])
+
+class EventRecorder:
+    """
+    Columnar event log for environments and backtests.
+
+    Events go into a preallocated structured array. With a path, every full batch is handed
+    to a background thread that appends it to JSONL or Parquet (by file suffix), so the
+    stepping thread never waits on I/O. A write error stops the writer and is re-raised by the
+    next flush() or close(). Without a path the buffer is a ring holding the last capacity
+    events. At QUIET nothing is recorded; callers check `recorder.level` first.
+    Args:
+        level (int or str): QUIET/TRADES/STEPS or "quiet"/"trades"/"steps".
+        path (str): .jsonl or .parquet file to append to, None to keep events in memory.
+        capacity (int): Events per batch (or ring size without a path).
+    """
+
+    def __init__(self, level=TRADES, path=None, capacity=65536):
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        self.path = path
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self._size = 0
+        self._wrapped = False
+        self._queue = None
+        self._thread = None
+        self._error = None
+        if path is not None:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+
+    def record(self, kind, step, action=0, price=0.0, profit=0.0, reward=0.0, balance=0.0, equity=0.0, pair=0):
+        self._buffer[self._size] = (step, kind, action, price, profit, reward, balance, equity, pair)
+        self._size += 1
+        if self._size == self.capacity:
+            if self._queue is not None:
+                self.flush()
+            else:
+                self._size = 0
+                self._wrapped = True
+
+    def flush(self):
+        """Hand the buffered events to the writer thread and start a fresh batch."""
+        if self._error is not None:
+            raise self._error
+        if self._queue is None or self._size == 0:
+            return
+        self._queue.put(self._buffer[:self._size])
+        self._buffer = np.zeros(self.capacity, dtype=EVENT_DTYPE)
+        self._size = 0
+
+    def close(self):
+        """Flush and wait for the writer to finish, re-raising any error it hit."""
+        if self._queue is not None:
+            if self._error is None and self._size:
+                self._queue.put(self._buffer[:self._size])
+                self._size = 0
+            self._queue.put(None)
+            self._thread.join()
+            self._queue = None
+        if self._error is not None:
+            raise self._error
+
+    def events(self):
+        """In-memory events (oldest first) as a structured array."""
+        if self._wrapped:
+            return np.concatenate((self._buffer[self._size:], self._buffer[:self._size]))
+        return self._buffer[:self._size].copy()
+
+    def _write_loop(self):
+        parquet_writer = None
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    break
+                columns = {name: batch[name] for name in EVENT_DTYPE.names}
+                kinds = np.array(EVENT_KINDS)[batch["kind"]]
+                if self.path.endswith(".parquet"):
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    columns["kind"] = kinds
+                    table = pa.table(columns)
+                    if parquet_writer is None:
+                        parquet_writer = pq.ParquetWriter(self.path, table.schema)
+                    parquet_writer.write_table(table)
+                else:
+                    with open(self.path, "a") as f:
+                        for row, kind in zip(batch.tolist(), kinds.tolist()):
+                            event = dict(zip(EVENT_DTYPE.names, row))
+                            event["kind"] = kind
+                            f.write(json.dumps(event) + "\n")
+        except Exception as error:
+            # Kept for flush()/close() to raise on the stepping thread
+            self._error = error
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
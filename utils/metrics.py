@@ -0,0 +1,150 @@
+# Performance metrics over equity curves and trade arrays
+import os
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+def last_per_day(values, day):
+    """Last value of every day, for per-bar values and their (sorted) day numbers."""
+    day = np.asarray(day)
+    last = np.ones(len(day), dtype=bool)
+    last[:-1] = day[1:] != day[:-1]
+    return np.asarray(values)[last]
+
+def simple_returns(equity, initial_balance=None):
+    """Period-over-period returns, the first one relative to initial_balance if given."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if initial_balance is not None:
+        equity = np.concatenate(([initial_balance], equity))
+    return equity[1:] / equity[:-1] - 1.0
+
+def sharpe_ratio(returns, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """Annualized Sharpe ratio (zero risk-free rate); 0 when returns have no variance."""
+    returns = np.asarray(returns)
+    if len(returns) < 2:
+        return 0.0
+    std = returns.std(ddof=1)
+    return float(returns.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0
+
+def sortino_ratio(returns, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """Annualized Sortino ratio: mean return over downside deviation (target 0)."""
+    returns = np.asarray(returns)
+    if len(returns) < 2:
+        return 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    return float(returns.mean() / downside * np.sqrt(periods_per_year)) if downside > 0 else 0.0
+
+def max_drawdown(equity, initial_balance=None):
+    """
+    Deepest peak-to-trough drop and the longest time spent below a previous peak.
+    Returns:
+        tuple: (max drawdown as a fraction of the peak, longest underwater stretch in bars).
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if initial_balance is not None:
+        equity = np.concatenate(([initial_balance], equity))
+    if len(equity) == 0:
+        return 0.0, 0
+    peak = np.maximum.accumulate(equity)
+    steps = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(equity >= peak, steps, 0))
+    return float(((peak - equity) / peak).max()), int((steps - last_peak).max())
+
+def trade_stats(profits):
+    """Win rate, profit factor and average win/loss of closed-trade profits."""
+    profits = np.asarray(profits, dtype=np.float64)
+    wins = profits[profits > 0]
+    losses = profits[profits < 0]
+    gross_loss = -losses.sum()
+    return {
+        "trades": len(profits),
+        "win_rate": len(wins) / len(profits) if len(profits) else 0.0,
+        "profit_factor": wins.sum() / gross_loss if gross_loss > 0 else (np.inf if len(wins) else 0.0),
+        "avg_trade": profits.mean() if len(profits) else 0.0,
+        "avg_win": wins.mean() if len(wins) else 0.0,
+        "avg_loss": losses.mean() if len(losses) else 0.0
+    }
+
+def exposure(open_step, close_step, n_steps):
+    """Fraction of bars spent in a position (a still-open trade counts until the last bar)."""
+    open_step = np.asarray(open_step)
+    close_step = np.concatenate((close_step, np.full(len(open_step) - len(close_step), n_steps)))
+    return float((close_step - open_step).sum() / n_steps) if n_steps else 0.0
+
+def compute_metrics(equity, day, initial_balance, profits=(), open_step=(), close_step=()):
+    """
+    Summary metrics from NumPy arrays only, cheap enough to run per sweep result.
+
+    Sharpe and Sortino use daily returns (last equity of each day) annualized over 252 days.
+    Args:
+        equity (np.ndarray): Equity after every step.
+        day (np.ndarray): Day number of every step.
+        initial_balance (float): Equity before the first step.
+        profits (np.ndarray): Closed-trade profits.
+        open_step (np.ndarray): Step each trade opened at.
+        close_step (np.ndarray): Step each closed trade closed at.
+    Returns:
+        dict: Scalar metrics.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    daily_equity = last_per_day(equity, day)
+    daily_returns = simple_returns(daily_equity, initial_balance)
+    drawdown, duration = max_drawdown(equity, initial_balance)
+    metrics = {
+        "profit_pct": (equity[-1] - initial_balance) / initial_balance * 100 if len(equity) else 0.0,
+        "sharpe": sharpe_ratio(daily_returns),
+        "sortino": sortino_ratio(daily_returns),
+        "max_drawdown_pct": drawdown * 100,
+        "max_drawdown_bars": duration,
+        "exposure_pct": exposure(open_step, close_step, len(equity)) * 100
+    }
+    metrics.update(trade_stats(profits))
+    return metrics
+
+def period_table(equity, initial_balance, freq="D"):
+    """
+    PnL and return per calendar period ("D" day, "ME" month) of an equity Series.
+    Returns:
+        pd.DataFrame: Indexed by period end with end_equity, pnl and return_pct.
+    """
+    end_equity = equity.resample(freq).last().dropna()
+    start_equity = end_equity.shift(1, fill_value=initial_balance)
+    return pd.DataFrame({
+        "end_equity": end_equity,
+        "pnl": end_equity - start_equity,
+        "return_pct": (end_equity / start_equity - 1.0) * 100
+    })
+
+TABLE_FORMATS = ["csv", "parquet"]
+
+def check_table_format(table_format):
+    """
+    Fail early on a report format that export_table cannot write.
+
+    Parquet goes through pandas' pyarrow engine, so a missing pyarrow is reported here rather
+    than after a full backtest.
+    Args:
+        table_format (str): "csv" or "parquet".
+    Returns:
+        str: table_format.
+    """
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format {table_format!r}; expected one of {TABLE_FORMATS}")
+    if table_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet tables need pyarrow (pip install pyarrow) or report.format: csv") from None
+    return table_format
+
+def export_table(frame, path, index=False):
+    """Write a DataFrame as CSV or Parquet, chosen by the file suffix."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    if path.endswith(".parquet"):
+        frame.to_parquet(path, index=index)
+    else:
+        frame.to_csv(path, index=index)
+    return path
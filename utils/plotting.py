@@ -0,0 +1,111 @@
+# Backtest charts: Agg-rendered, decimated, optionally drawn in a background process
+import multiprocessing
+import os
+import numpy as np
+
+# (trade_type, time column, price column) -> marker style; one scatter call per entry
+MARKERS = {
+    ("long", "open_time", "open_price"): {"color": "green", "marker": "^", "label": "Long Open (Buy)"},
+    ("long", "close_time", "close_price"): {"color": "lime", "marker": "v", "label": "Long Close"},
+    ("short", "open_time", "open_price"): {"color": "red", "marker": "v", "label": "Short Open (Sell)"},
+    ("short", "close_time", "close_price"): {"color": "orange", "marker": "^", "label": "Short Close"}
+}
+
+def minmax_indices(values, max_points=5000):
+    """
+    Positions to keep when drawing a long series: the min and max of each bucket, plus the ends.
+    Extremes survive decimation, so spikes stay visible and the line looks the same at chart scale.
+    Args:
+        values (np.ndarray): Series to decimate.
+        max_points (int): Upper bound on the number of positions returned.
+    Returns:
+        np.ndarray: Sorted int positions into values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    size = -(-n // max(max_points // 2 - 1, 1))
+    buckets = -(-n // size)
+    # Pad the last bucket with the final value so every bucket has `size` entries
+    blocks = np.concatenate((values, np.full(buckets * size - n, values[-1]))).reshape(buckets, size)
+    starts = np.arange(buckets) * size
+    keep = np.concatenate(([0], starts + blocks.argmin(axis=1), starts + blocks.argmax(axis=1), [n - 1]))
+    return np.unique(np.minimum(keep, n - 1))
+
+def trade_markers(trade_df):
+    """Marker arrays per MARKERS key: {key: (datetime64 times, float prices)}, empty keys omitted."""
+    markers = {}
+    if len(trade_df) == 0:
+        return markers
+    trade_type = trade_df["trade_type"].to_numpy()
+    for key in MARKERS:
+        side, time_column, price_column = key
+        rows = trade_type == side
+        if rows.any():
+            markers[key] = (
+                trade_df[time_column].to_numpy(dtype="datetime64[ns]")[rows],
+                trade_df[price_column].to_numpy(dtype=np.float64)[rows]
+            )
+    return markers
+
+def render_price_with_trades(times, close, markers, path, title="EUR/USD Price with Long/Short Trades (2025)",
+                             max_points=5000, dpi=150):
+    """
+    Draw the close price and trade markers to an image file with the Agg canvas.
+
+    Uses matplotlib.figure.Figure directly rather than pyplot: no GUI backend, no global figure
+    state, nothing to show() or close(), so it is safe in worker processes and headless runs.
+    Args:
+        times (np.ndarray): datetime64 bar times.
+        close (np.ndarray): Close prices.
+        markers (dict): Output of trade_markers().
+        path (str): Image path; the format follows the extension.
+        title (str): Chart title.
+        max_points (int): Price points drawn after min/max decimation.
+        dpi (int): Output resolution.
+    Returns:
+        str: path.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(14, 7))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    keep = minmax_indices(close, max_points)
+    axes.plot(times[keep], close[keep], label="Close Price", color="blue", alpha=0.7)
+    for key, (marker_times, prices) in markers.items():
+        axes.scatter(marker_times, prices, s=100, **MARKERS[key])
+
+    axes.set_title(title)
+    axes.set_xlabel("Date")
+    axes.set_ylabel("Price")
+    axes.legend()
+    axes.grid()
+    axes.tick_params(axis="x", labelrotation=45)
+    figure.tight_layout()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    figure.savefig(path, dpi=dpi)
+    return path
+
+def plot_price_with_trades(test_data, trade_df, path, background=False, **kwargs):
+    """
+    Chart test_data["close"] with the trades of trade_df (TRADE_COLUMNS layout).
+
+    With background=True the chart is rendered in a separate process and the started
+    multiprocessing.Process is returned (join() it to wait; the interpreter also waits for it on
+    exit). Only plain arrays are sent to the child, not the frame.
+    Returns:
+        str or multiprocessing.Process: path when rendered inline, else the process.
+    """
+    times = test_data.index.to_numpy(dtype="datetime64[ns]")
+    close = test_data["close"].to_numpy(dtype=np.float64)
+    markers = trade_markers(trade_df)
+    if not background:
+        return render_price_with_trades(times, close, markers, path, **kwargs)
+    process = multiprocessing.Process(
+        target=render_price_with_trades, args=(times, close, markers, path), kwargs=kwargs, name="plot"
+    )
+    process.start()
+    return process
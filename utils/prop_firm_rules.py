@@ -1 +1,196 @@
 # Prop firm constraints (FTMO, Funding Pips)
+import numpy as np
+import pandas as pd
+from data.data_fetcher import DATA_TIMEZONE
+
+DAILY_LOSS_BASES = ("realized", "equity")
+DRAWDOWN_TYPES = ("trailing", "static")
+
+class RuleSet:
+    """
+    One firm's challenge rules.
+
+    Limits are fractions of the initial balance, except trailing drawdown, which is measured
+    from peak equity. The daily loss counts realized PnL since the day rolled over ("realized")
+    or the equity drop from the day's starting equity ("equity"). Days roll over at
+    day_start_hour in timezone; bar timestamps are wall-clock time in data_timezone.
+    Args:
+        profit_target (float): Balance gain that passes the challenge, None for no target.
+        daily_loss_limit (float): Max daily loss.
+        max_drawdown (float): Max drawdown.
+        min_trading_days (int): Days with a closed trade required before the target counts.
+        daily_loss_basis (str): "realized" or "equity".
+        drawdown_type (str): "trailing" (from peak equity) or "static" (from initial balance).
+        timezone (str): Timezone the firm's day follows, None for the data's own calendar day.
+        day_start_hour (int): Hour in timezone at which the day rolls over.
+        data_timezone (str): Timezone of the naive bar timestamps.
+    """
+
+    def __init__(self, profit_target=None, daily_loss_limit=0.05, max_drawdown=0.10, min_trading_days=0,
+                 daily_loss_basis="realized", drawdown_type="trailing", timezone=None, day_start_hour=0,
+                 data_timezone=DATA_TIMEZONE, name="challenge"):
+        if daily_loss_basis not in DAILY_LOSS_BASES:
+            raise ValueError(f"Unknown daily_loss_basis '{daily_loss_basis}', expected one of {DAILY_LOSS_BASES}")
+        if drawdown_type not in DRAWDOWN_TYPES:
+            raise ValueError(f"Unknown drawdown_type '{drawdown_type}', expected one of {DRAWDOWN_TYPES}")
+        self.name = name
+        self.profit_target = profit_target
+        self.daily_loss_limit = daily_loss_limit
+        self.max_drawdown = max_drawdown
+        self.min_trading_days = min_trading_days
+        self.daily_loss_basis = daily_loss_basis
+        self.drawdown_type = drawdown_type
+        self.timezone = timezone
+        self.day_start_hour = day_start_hour
+        self.data_timezone = data_timezone
+
+    def day_numbers(self, index):
+        """Trading day of every bar as an int64 day number in the firm's calendar."""
+        times = pd.DatetimeIndex(index)
+        if self.timezone is not None and self.timezone != self.data_timezone:
+            times = times.tz_localize(self.data_timezone, ambiguous=False, nonexistent="shift_forward")
+            times = times.tz_convert(self.timezone).tz_localize(None)
+        values = np.asarray(times, dtype="datetime64[ns]")
+        if self.day_start_hour:
+            values = values - np.timedelta64(self.day_start_hour, "h")
+        return values.astype("datetime64[D]").astype(np.int64)
+
+def load_ruleset(config, firm=None):
+    """
+    RuleSet for a firm under prop_firms in config, or the challenge section when firm is None.
+
+    The firm defaults to config["firm"]; rules a firm leaves out fall back to the challenge values.
+    """
+    firm = firm if firm is not None else config.get("firm")
+    settings = dict(config["challenge"])
+    if firm is not None and firm != "challenge":
+        firms = config.get("prop_firms", {})
+        if firm not in firms:
+            raise ValueError(f"Unknown firm '{firm}', expected one of {sorted(firms)}")
+        settings.update(firms[firm])
+    return RuleSet(name=firm or "challenge", **settings)
+
+class RuleTracker:
+    """
+    Incremental rule state for one account, O(1) per bar.
+
+    Call update() once per step with the day of the bar the step moved to (as run_backtest
+    and ForexEnv see it): the step's realized PnL counts toward the current day, the limits
+    are checked, and only then does the day roll over if it changed.
+    """
+
+    def __init__(self, rules, initial_balance):
+        self.rules = rules
+        self.initial_balance = initial_balance
+        self.reset()
+
+    def reset(self):
+        self.day = None
+        self.daily_pnl = 0.0
+        self.day_start_equity = self.initial_balance
+        self.max_equity = self.initial_balance
+        self.drawdown = 0.0
+        self.daily_loss = 0.0
+        self.trading_days = 0
+        self.last_trade_day = None
+        self.breached = False
+        self.passed = False
+        self.daily_history = []  # Finished days' realized PnL
+
+    def update(self, day, balance, equity, realized=0.0, traded=False):
+        """
+        Apply one step and return True if a rule is breached.
+        Args:
+            day (int): Day number (RuleSet.day_numbers) of the bar after the step.
+            balance (float): Balance after the step.
+            equity (float): Equity after the step.
+            realized (float): PnL realized on this step.
+            traded (bool): A trade closed (changed the balance) on this step.
+        """
+        rules = self.rules
+        self.daily_pnl += realized
+        self.max_equity = max(self.max_equity, equity)
+        if rules.drawdown_type == "trailing":
+            self.drawdown = (self.max_equity - equity) / self.max_equity
+        else:
+            self.drawdown = (self.initial_balance - equity) / self.initial_balance
+        if rules.daily_loss_basis == "realized":
+            self.daily_loss = -self.daily_pnl / self.initial_balance
+        else:
+            self.daily_loss = (self.day_start_equity - equity) / self.initial_balance
+        if traded and day != self.last_trade_day:
+            self.trading_days += 1
+            self.last_trade_day = day
+        self.breached = self.daily_loss > rules.daily_loss_limit or self.drawdown > rules.max_drawdown
+        if rules.profit_target is not None:
+            profit_pct = (balance - self.initial_balance) / self.initial_balance * 100
+            self.passed = profit_pct >= rules.profit_target * 100 and self.trading_days >= rules.min_trading_days
+        if day != self.day:
+            if self.day is not None:
+                self.daily_history.append(self.daily_pnl)
+            self.day = day
+            self.daily_pnl = 0.0
+            self.day_start_equity = equity
+        return self.breached
+
+    def daily_pnls(self):
+        """Realized PnL per day so far, the current (unfinished) day last."""
+        return self.daily_history + [self.daily_pnl]
+
+def evaluate_curve(rules, initial_balance, day, balance, equity, realized, traded):
+    """
+    Vectorized RuleTracker: evaluate whole per-step curves at once.
+
+    Inputs are per-step arrays with the same meaning as RuleTracker.update's arguments.
+    Returns:
+        dict: Per-step daily_pnl (before rollover), daily_loss, drawdown, trading_days, breach,
+              passed, and rollover (True where the day rolled over after the step).
+    """
+    day = np.asarray(day)
+    equity = np.asarray(equity, dtype=np.float64)
+    n_steps = len(day)
+    rollover = np.ones(n_steps, dtype=bool)
+    rollover[1:] = day[1:] != day[:-1]
+    starts_group = np.concatenate(([True], rollover[:-1]))
+    group = np.cumsum(starts_group) - 1
+
+    cum_realized = np.cumsum(realized)
+    group_base = np.concatenate(([0.0], cum_realized[:-1]))[starts_group]
+    daily_pnl = cum_realized - group_base[group]
+
+    if rules.daily_loss_basis == "realized":
+        daily_loss = -daily_pnl / initial_balance
+    else:
+        day_start = np.concatenate(([initial_balance], equity[rollover]))[group]
+        daily_loss = (day_start - equity) / initial_balance
+
+    if rules.drawdown_type == "trailing":
+        max_equity = np.maximum.accumulate(np.concatenate(([initial_balance], equity)))[1:]
+        drawdown = (max_equity - equity) / max_equity
+    else:
+        drawdown = (initial_balance - equity) / initial_balance
+
+    trade_steps = np.flatnonzero(traded)
+    trade_days = day[trade_steps]
+    first_of_day = np.ones(len(trade_days), dtype=bool)
+    first_of_day[1:] = trade_days[1:] != trade_days[:-1]
+    days_by_trade = np.cumsum(first_of_day)
+    last_trade = np.searchsorted(trade_steps, np.arange(n_steps), side="right") - 1
+    trading_days = np.zeros(n_steps, dtype=np.int64)
+    trading_days[last_trade >= 0] = days_by_trade[last_trade[last_trade >= 0]]
+
+    breach = (daily_loss > rules.daily_loss_limit) | (drawdown > rules.max_drawdown)
+    if rules.profit_target is not None:
+        profit_pct = (np.asarray(balance) - initial_balance) / initial_balance * 100
+        passed = (profit_pct >= rules.profit_target * 100) & (trading_days >= rules.min_trading_days)
+    else:
+        passed = np.zeros(n_steps, dtype=bool)
+    return {
+        "daily_pnl": daily_pnl,
+        "daily_loss": daily_loss,
+        "drawdown": drawdown,
+        "trading_days": trading_days,
+        "breach": breach,
+        "passed": passed,
+        "rollover": rollover
+    }
@@ -0,0 +1,45 @@
+# Share read-only NumPy arrays with worker processes without copying them
+from multiprocessing import shared_memory
+import numpy as np
+
+def share_arrays(arrays):
+    """
+    Copy arrays into shared memory blocks once.
+    Args:
+        arrays (dict): Name -> np.ndarray.
+    Returns:
+        tuple: (list of SharedMemory handles the owner must close and unlink,
+                picklable spec for attach_arrays()).
+    """
+    handles = []
+    spec = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        handles.append(shm)
+        spec[name] = (shm.name, array.shape, array.dtype.str)
+    return handles, spec
+
+def attach_arrays(spec):
+    """
+    Map the blocks described by spec into this process as read-only arrays.
+    Returns:
+        tuple: (list of SharedMemory handles to keep alive, dict of name -> np.ndarray views).
+    """
+    handles = []
+    arrays = {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        handles.append(shm)
+        arrays[name] = array
+    return handles, arrays
+
+def release_arrays(handles, unlink=False):
+    """Close shared blocks and, in the owning process, free them."""
+    for shm in handles:
+        shm.close()
+        if unlink:
+            shm.unlink()